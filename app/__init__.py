@@ -12,6 +12,12 @@ from .extensions import db, socketio, login_manager, mail
 from flask_migrate import Migrate  # if you use flask-migrate
 from flask_login import current_user
 from app.models import User
+from app.auth.principal import load_principal, principal_from_bearer_token
+from app.query_profiler import ensure_schema, full_scan_logger
+from app.query_counter import init_request_query_counter
+from app.avatars import avatar_resolver
+from app.profile.photos import photo_processor
+from app.auth.passwords import configure_native_threads
 
 # Blueprint imports
 from .main.routes import main_bp
@@ -48,11 +54,20 @@ def create_app(config_filename=None):
     # Provide user_loader so Flask-Login knows how to load user from an ID
     @login_manager.user_loader
     def load_user(user_id):
-        # Return a User object or None
-        return User.query.get(int(user_id))
+        # Cached lightweight principal; the full User row loads only on demand
+        return load_principal(user_id)
+
+    # API clients authenticate with the JWT from /api/auth/login
+    @login_manager.request_loader
+    def load_user_from_request(request):
+        return principal_from_bearer_token(request)
 
     migrate = Migrate(app, db)  # If you're using migrations
 
+    # Development: SQL statements per request in the X-Query-Count header
+    if app.config.get("QUERY_COUNT_HEADERS"):
+        init_request_query_counter(app)
+
     # Register Blueprints
     app.register_blueprint(main_bp)
     app.register_blueprint(auth_bp)
@@ -70,6 +85,9 @@ def create_app(config_filename=None):
     # Create tables if needed (or rely on migrations)
     with app.app_context():
         db.create_all()
+        ensure_schema(db.engine)
+        if app.config.get("QUERY_PROFILER"):
+            full_scan_logger.install(db.engine)
 
     # Register Socket.IO events (transcription, chat, webrtc, etc.)
     init_socketio_events(socketio)
@@ -80,4 +98,22 @@ def create_app(config_filename=None):
     register_webrtc_events(socketio)
     register_chat_events(socketio)
 
+    # Avatar URLs resolved from a cached listing of the profile pictures folder
+    avatar_resolver.init_app(app, socketio)
+
+    # Native thread pool for password hashing; its size is process-wide, set once here
+    configure_native_threads(app.config["PASSWORD_HASH_THREADS"])
+
+    # Profile photo thumbnails, generated off the request on their own threads
+    photo_processor.start(app, socketio)
+
+    # Background worker that drains the outbound mail queue
+    from app.mail_queue import worker as mail_queue_worker
+    mail_queue_worker.start(app, socketio)
+
+    # Optional batched writer for chat messages (write-behind)
+    if app.config.get("CHAT_WRITE_BEHIND"):
+        from app.websockets.chat_writer import chat_writer
+        chat_writer.start(app, socketio)
+
     return app
\ No newline at end of file
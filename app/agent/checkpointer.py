@@ -0,0 +1,214 @@
+# app/agent/checkpointer.py
+
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from sqlalchemy.engine import make_url
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+logger = logging.getLogger(__name__)
+
+# Default location of the agent conversation memory
+DEFAULT_CHECKPOINT_PATH = os.path.join("app", "agent", "chat_memory.sqlite")
+
+# Flask-SQLAlchemy resolves relative sqlite paths against the app instance folder
+INSTANCE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "instance")
+
+
+class PooledSqliteSaver(SqliteSaver):
+    """
+    SqliteSaver backed by a pool of connections instead of one shared handle.
+
+    - Every connection runs in WAL mode, so reads of one meeting's history
+      never wait on a write for another meeting.
+    - Writes are serialized on a (green) lock rather than inside SQLite's busy
+      handler, which would block the whole eventlet hub while it spins.
+    - synchronous=NORMAL lets WAL group commits: a checkpoint write does not
+      fsync, the periodic WAL checkpoint does. Pending writes of a step are
+      already stored with a single executemany.
+    """
+
+    def __init__(self, path, pool_size=4, timeout=30, serde=None):
+        self.path = path
+        self.pool_size = max(pool_size, 1)
+        self.timeout = timeout
+        self._pool = queue.LifoQueue(maxsize=self.pool_size)
+        self._created = 0
+        self._pool_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._local = threading.local()
+        super().__init__(self._connect(), serde=serde)
+
+    # The base class reads self.conn directly in a few places (e.g. list()),
+    # so it resolves to the connection borrowed by the current thread.
+    @property
+    def conn(self):
+        return getattr(self._local, "conn", None) or self._setup_conn
+
+    @conn.setter
+    def conn(self, value):
+        self._setup_conn = value
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=self.timeout)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._pool_lock:
+            if self._created < self.pool_size:
+                self._created += 1
+                return self._connect()
+        return self._pool.get(timeout=self.timeout)
+
+    @contextmanager
+    def cursor(self, transaction=True):
+        with self.lock:
+            self.setup()
+
+        conn = getattr(self._local, "conn", None)
+        borrowed = conn is None
+        if borrowed:
+            conn = self._acquire()
+            self._local.conn = conn
+        try:
+            if transaction:
+                with self._write_lock:
+                    cur = conn.cursor()
+                    try:
+                        yield cur
+                        conn.commit()
+                    except Exception:
+                        conn.rollback()
+                        raise
+                    finally:
+                        cur.close()
+            else:
+                cur = conn.cursor()
+                try:
+                    yield cur
+                finally:
+                    cur.close()
+        finally:
+            if borrowed:
+                self._local.conn = None
+                self._pool.put(conn)
+
+
+def _sqlite_path(database):
+    if not database or database == ":memory:" or os.path.isabs(database):
+        return database
+    return os.path.join(INSTANCE_PATH, database)
+
+
+def _postgres_saver(url, pool_size):
+    try:
+        from psycopg.rows import dict_row
+        from psycopg_pool import ConnectionPool
+        from langgraph.checkpoint.postgres import PostgresSaver
+    except ImportError as e:
+        raise RuntimeError(
+            "A PostgreSQL checkpointer needs the 'langgraph-checkpoint-postgres' "
+            "and 'psycopg[pool]' packages."
+        ) from e
+
+    # libpq does not understand SQLAlchemy's "+driver" suffix
+    conninfo = url.set(drivername="postgresql").render_as_string(hide_password=False)
+    pool = ConnectionPool(
+        conninfo,
+        max_size=pool_size,
+        kwargs={"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row},
+        open=True
+    )
+    saver = PostgresSaver(pool)
+    saver.setup()
+    return saver
+
+
+def build_checkpointer(target, database_uri, pool_size=4):
+    """
+    Build the LangGraph checkpointer for the agent.
+
+    `target` is either a path to a dedicated SQLite file, or "main" to
+    keep the checkpoint tables in the application database
+    (SQLALCHEMY_DATABASE_URI, SQLite or PostgreSQL).
+    """
+    if target != "main":
+        path = target or DEFAULT_CHECKPOINT_PATH
+        logger.info(f"Agent checkpointer: sqlite file {path} (pool of {pool_size})")
+        return PooledSqliteSaver(path, pool_size=pool_size)
+
+    url = make_url(database_uri)
+    backend = url.get_backend_name()
+    if backend == "sqlite":
+        path = _sqlite_path(url.database)
+        logger.info(f"Agent checkpointer: application database {path} (pool of {pool_size})")
+        return PooledSqliteSaver(path, pool_size=pool_size)
+    if backend == "postgresql":
+        logger.info(f"Agent checkpointer: application database on {url.host} (pool of {pool_size})")
+        return _postgres_saver(url, pool_size)
+    raise ValueError(f"Unsupported database for the agent checkpointer: {backend}")
+
+
+def compact_thread(checkpointer, thread_id, keep):
+    """
+    Delete all but the latest `keep` checkpoints of a thread, with their
+    pending writes. Returns the number of deleted checkpoints.
+    """
+    thread_id = str(thread_id)
+    if isinstance(checkpointer, SqliteSaver):
+        keep_ids = """
+            SELECT checkpoint_id FROM checkpoints
+            WHERE thread_id = ? AND checkpoint_ns = ''
+            ORDER BY checkpoint_id DESC LIMIT ?
+        """
+        with checkpointer.cursor() as cur:
+            cur.execute(
+                f"DELETE FROM writes WHERE thread_id = ? AND checkpoint_id NOT IN ({keep_ids})",
+                (thread_id, thread_id, keep)
+            )
+            cur.execute(
+                f"DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_id NOT IN ({keep_ids})",
+                (thread_id, thread_id, keep)
+            )
+            return cur.rowcount
+
+    # PostgresSaver keeps channel values in checkpoint_blobs, referenced
+    # from each checkpoint's channel_versions.
+    keep_ids = """
+        SELECT checkpoint_id FROM checkpoints
+        WHERE thread_id = %s AND checkpoint_ns = ''
+        ORDER BY checkpoint_id DESC LIMIT %s
+    """
+    with checkpointer._cursor() as cur:
+        cur.execute(
+            f"DELETE FROM checkpoint_writes WHERE thread_id = %s AND checkpoint_id NOT IN ({keep_ids})",
+            (thread_id, thread_id, keep)
+        )
+        cur.execute(
+            f"DELETE FROM checkpoints WHERE thread_id = %s AND checkpoint_id NOT IN ({keep_ids})",
+            (thread_id, thread_id, keep)
+        )
+        deleted = cur.rowcount
+        cur.execute(
+            """
+            DELETE FROM checkpoint_blobs b
+            WHERE b.thread_id = %s AND NOT EXISTS (
+                SELECT 1 FROM checkpoints c
+                WHERE c.thread_id = b.thread_id
+                  AND c.checkpoint_ns = b.checkpoint_ns
+                  AND c.checkpoint -> 'channel_versions' ->> b.channel = b.version
+            )
+            """,
+            (thread_id,)
+        )
+        return deleted
@@ -0,0 +1,168 @@
+# app/agent/fanout.py
+
+import bisect
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open
+LATENCY_BUCKETS_MS = (250, 500, 1000, 2000, 4000, 8000, 15000, 30000, 60000)
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram of model calls, kept per model id.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, latency_ms, ok=True):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, latency_ms)] += 1
+            self.count += 1
+            self.total_ms += latency_ms
+            self.max_ms = max(self.max_ms, latency_ms)
+            if not ok:
+                self.errors += 1
+
+    def snapshot(self):
+        with self._lock:
+            labels = [f"<={b}" for b in self.buckets] + [f">{self.buckets[-1]}"]
+            return {
+                "count": self.count,
+                "errors": self.errors,
+                "mean_ms": round(self.total_ms / self.count, 1) if self.count else None,
+                "max_ms": round(self.max_ms, 1),
+                "buckets_ms": dict(zip(labels, self.counts))
+            }
+
+
+class FanOutExecutor:
+    """
+    Shared, bounded pool for running independent model calls in parallel.
+
+    Each call gets its own timeout. If a hedge model id is configured, a
+    second request is sent to that model when the primary has not answered
+    after `hedge_after` seconds (or failed), and the first success wins.
+    A call that times out or fails is reported in its section status,
+    and the other sections are still returned.
+
+    Worker threads cannot be cancelled, so a timed-out call keeps its
+    worker until the model answers; the pool size bounds that cost.
+    """
+
+    def __init__(self, max_workers=8):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="agent-fanout")
+        self._histograms = {}
+        self._histograms_lock = threading.Lock()
+
+    def histogram(self, model_id):
+        with self._histograms_lock:
+            if model_id not in self._histograms:
+                self._histograms[model_id] = LatencyHistogram()
+            return self._histograms[model_id]
+
+    def latency_snapshot(self):
+        with self._histograms_lock:
+            models = list(self._histograms.items())
+        return {model_id: h.snapshot() for model_id, h in models}
+
+    def _timed(self, fn, model_id):
+        started = time.perf_counter()
+        try:
+            result = fn(model_id)
+        except Exception:
+            self.histogram(model_id).observe((time.perf_counter() - started) * 1000, ok=False)
+            raise
+        self.histogram(model_id).observe((time.perf_counter() - started) * 1000)
+        return result
+
+    def run(self, calls, timeout=60, hedge_model_id=None, hedge_after=None):
+        """
+        Run `calls` ({section: (fn, model_id)}) concurrently. `fn(model_id)`
+        performs the model call. Returns {section: result} where result is
+        {"status": "ok" | "timeout" | "error", "text", "model_id", "latency_ms", "error"}.
+        """
+        started = time.perf_counter()
+        deadline = started + timeout
+        pending = {}
+        attempts = {}
+        for section, (fn, model_id) in calls.items():
+            future = self._executor.submit(self._timed, fn, model_id)
+            pending[future] = (section, model_id)
+            attempts[section] = [future]
+
+        results = {}
+        hedged = set()
+        while pending:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            wait_for = deadline - now
+            if hedge_model_id and hedge_after is not None:
+                hedge_at = started + hedge_after
+                if now < hedge_at:
+                    wait_for = min(wait_for, hedge_at - now)
+            done, _ = wait(list(pending), timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                section, model_id = pending.pop(future)
+                if section in results and results[section]["status"] == "ok":
+                    continue
+                error = future.exception()
+                if error is None:
+                    results[section] = {
+                        "status": "ok",
+                        "text": future.result(),
+                        "model_id": model_id,
+                        "latency_ms": round((time.perf_counter() - started) * 1000, 1)
+                    }
+                    # Drop the sibling attempt; its result is no longer needed
+                    for other in attempts[section]:
+                        pending.pop(other, None)
+                elif not any(pending.get(f) for f in attempts[section]):
+                    logger.error(f"Fan-out call '{section}' failed on {model_id}: {error}")
+                    results[section] = {
+                        "status": "error",
+                        "text": "",
+                        "model_id": model_id,
+                        "error": str(error)
+                    }
+                    # A fast failure is retried on the hedge model right away
+                    if hedge_model_id and section not in hedged and model_id != hedge_model_id:
+                        self._hedge(calls, section, hedge_model_id, pending, attempts, hedged)
+
+            if hedge_model_id and hedge_after is not None and time.perf_counter() >= started + hedge_after:
+                for section in calls:
+                    if section not in results and section not in hedged:
+                        self._hedge(calls, section, hedge_model_id, pending, attempts, hedged)
+
+        for section in calls:
+            if section not in results:
+                results[section] = {
+                    "status": "timeout",
+                    "text": "",
+                    "model_id": calls[section][1],
+                    "error": f"No response within {timeout}s"
+                }
+        return results
+
+    def _hedge(self, calls, section, hedge_model_id, pending, attempts, hedged):
+        fn, model_id = calls[section]
+        if model_id == hedge_model_id:
+            return
+        hedged.add(section)
+        future = self._executor.submit(self._timed, fn, hedge_model_id)
+        pending[future] = (section, hedge_model_id)
+        attempts[section].append(future)
+        logger.info(f"Hedging fan-out call '{section}' to {hedge_model_id}")
@@ -0,0 +1,195 @@
+# app/agent/memory.py
+
+import logging
+import threading
+
+from langchain_core.messages import (
+    AIMessage,
+    HumanMessage,
+    RemoveMessage,
+    SystemMessage,
+    ToolMessage
+)
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+
+from app.agent.checkpointer import compact_thread
+
+logger = logging.getLogger(__name__)
+
+# Fixed id so the running summary replaces itself in the checkpoint
+# instead of piling up as a new message every time it is refreshed.
+MEMORY_MESSAGE_ID = "conversation_memory"
+
+SUMMARY_PROMPT = """
+You maintain the running memory of a conversation between meeting participants
+and a virtual meeting assistant. Merge the existing memory with the newer turns below.
+Keep decisions, open questions, action items, names and dates. Drop greetings and
+repetition. Write plain text in at most {max_words} words.
+
+Existing memory:
+{memory}
+
+Newer turns:
+{turns}
+"""
+
+
+def _message_label(message):
+    if isinstance(message, HumanMessage):
+        return "User"
+    if isinstance(message, ToolMessage):
+        return f"Tool ({message.name or 'tool'})"
+    if isinstance(message, AIMessage):
+        return "Assistant"
+    return "System"
+
+
+def _message_text(message):
+    content = message.content
+    if isinstance(content, list):
+        content = " ".join(
+            part.get("text", "") if isinstance(part, dict) else str(part)
+            for part in content
+        )
+    return str(content).strip()
+
+
+class MemoryPolicy:
+    """
+    Keeps the agent conversation stored per thread_id (meeting_id) bounded.
+
+    - Only the last `window` messages are replayed verbatim to the model.
+    - Once the history outgrows the window, older turns are folded into a
+      single memory message by the model and removed from the checkpointed
+      state, leaving about window/2 recent messages.
+    - Every `compact_every` turns, old checkpoints of the thread are deleted
+      so only the latest `keep_checkpoints` remain in the database.
+    """
+
+    def __init__(self, llm, window=12, summary_words=250, keep_checkpoints=20, compact_every=10):
+        self.llm = llm
+        self.window = max(window, 2)
+        self.summary_words = summary_words
+        self.keep_checkpoints = max(keep_checkpoints, 1)
+        self.compact_every = compact_every
+        self._turns = {}
+        self._turns_lock = threading.Lock()
+
+    # ------------------------------------------------------------
+    # Windowing and summarization (LangGraph pre_model_hook)
+    # ------------------------------------------------------------
+    def pre_model_hook(self, state, config):
+        """
+        Runs before every model call of the ReAct agent.
+        Rewrites the stored history when it outgrows the window and
+        builds the model input from system prompt, memory and recent turns.
+        """
+        memory, history = self._split_memory(state["messages"])
+        update = {}
+
+        cut = self._window_start(history)
+        if cut > 0:
+            memory = self._summarize(memory, history[:cut])
+            history = history[cut:]
+            update["messages"] = [RemoveMessage(id=REMOVE_ALL_MESSAGES)]
+            if memory is not None:
+                update["messages"].append(memory)
+            update["messages"].extend(history)
+
+        update["llm_input_messages"] = [self._system_message(memory, config)] + history
+        return update
+
+    def _split_memory(self, messages):
+        memory = None
+        history = []
+        for message in messages:
+            if isinstance(message, SystemMessage) and message.id == MEMORY_MESSAGE_ID:
+                memory = message
+            else:
+                history.append(message)
+        return memory, history
+
+    def _window_start(self, history):
+        """
+        Index of the first message to keep verbatim. Nothing is cut until the
+        history outgrows the window; then it is trimmed to about half of it,
+        so the next window/2 messages are added without another summary.
+        The cut always lands on a user message so tool calls are never
+        separated from their results.
+        """
+        if len(history) <= self.window:
+            return 0
+        human_indexes = [i for i, m in enumerate(history) if isinstance(m, HumanMessage)]
+        for keep in (self.window // 2, self.window):
+            for i in human_indexes:
+                if len(history) - i <= keep:
+                    return i
+        # A single turn longer than the window: keep that whole turn
+        return human_indexes[-1] if human_indexes else 0
+
+    def _summarize(self, memory, older):
+        turns = "\n".join(
+            f"{_message_label(m)}: {_message_text(m)}" for m in older if _message_text(m)
+        )
+        prompt = SUMMARY_PROMPT.format(
+            max_words=self.summary_words,
+            memory=_message_text(memory) if memory is not None else "(none)",
+            turns=turns
+        )
+        try:
+            response = self.llm.invoke([HumanMessage(content=prompt)])
+            summary = _message_text(response)
+        except Exception as e:
+            # Keep the previous memory; the older turns are still dropped
+            # so the stored history stays bounded.
+            logger.error(f"Failed to summarize agent memory: {e}")
+            return memory
+
+        words = summary.split()
+        if len(words) > self.summary_words:
+            summary = " ".join(words[:self.summary_words])
+        return SystemMessage(content=summary, id=MEMORY_MESSAGE_ID)
+
+    def _system_message(self, memory, config):
+        configurable = (config or {}).get("configurable", {})
+        parts = [configurable.get("system_prompt") or "You are a helpful virtual assistant for meetings."]
+        meeting_context = configurable.get("meeting_context")
+        if meeting_context:
+            parts.append(f"Meeting Context:\n{meeting_context}")
+        if memory is not None:
+            parts.append(f"Conversation memory:\n{_message_text(memory)}")
+        return SystemMessage(content="\n\n".join(parts))
+
+    # ------------------------------------------------------------
+    # Checkpoint compaction
+    # ------------------------------------------------------------
+    def maybe_compact(self, checkpointer, thread_id):
+        """
+        Count a finished turn for the thread and compact its checkpoints
+        every `compact_every` turns.
+        """
+        if not self.compact_every:
+            return 0
+        thread_id = str(thread_id)
+        with self._turns_lock:
+            turns = self._turns.get(thread_id, 0) + 1
+            self._turns[thread_id] = turns % self.compact_every
+        if turns < self.compact_every:
+            return 0
+        return self.compact(checkpointer, thread_id)
+
+    def compact(self, checkpointer, thread_id):
+        """
+        Delete all but the latest `keep_checkpoints` checkpoints (and their
+        pending writes) of a thread. Returns the number of deleted checkpoints.
+        Freed pages are reused by the database for new checkpoints, so storage
+        stops growing once every thread has reached its limit.
+        """
+        thread_id = str(thread_id)
+        try:
+            deleted = compact_thread(checkpointer, thread_id, self.keep_checkpoints)
+        except Exception as e:
+            logger.error(f"Failed to compact checkpoints for thread {thread_id}: {e}")
+            return 0
+        logger.info(f"Compacted {deleted} checkpoints for thread {thread_id}")
+        return deleted
@@ -7,7 +7,7 @@ from flask import (
     current_app
 )
 from flask_login import login_required, current_user
-from datetime import datetime
+from datetime import datetime, timedelta
 import json, re
 # Import models needed for data aggregation and storage
 from app.models import (
@@ -29,13 +29,24 @@ from app.config import Config
 from langchain_ibm import WatsonxLLM, ChatWatsonx
 from langchain_core.prompts import PromptTemplate
 from flask_mail import Message
-from concurrent.futures import ThreadPoolExecutor
+from app.mail_queue import enqueue_email
+from app.calendar.occurrences import custom_events_for_users
+from app.agent.fanout import FanOutExecutor
+from app.agent.structured_output import (
+    AGENDA_SCHEMA,
+    invoke_structured,
+    parse_stats,
+    strip_code_fences
+)
 
 from app.transcription.transcription import TranscriptionSession
 from flask_socketio import emit
 
 agent_bp = Blueprint("agent_bp", __name__, template_folder="templates", url_prefix="/agent")
 
+# Shared, bounded pool for parallel model calls across requests
+fanout = FanOutExecutor(max_workers=Config.AGENT_FANOUT_WORKERS)
+
 # Enhance aggregation to also include task documents metadata
 def aggregate_pre_meeting_data(meeting_id):
     print("AGGREGATING PRE MEETING DATA")
@@ -86,13 +97,16 @@ def aggregate_pre_meeting_data(meeting_id):
     task_files_query = TaskFile.query.join(ActionItem).filter(ActionItem.meeting_id == meeting_id).all()
     task_file_list = ", ".join([tf.filename for tf in task_files_query])
    
-    # Calendar events
-    participants = Participant.query.filter_by(meeting_id=meeting_id).all()
-    calendar_events = CalendarEvent.query.filter(
-        CalendarEvent.user_id.in_([p.user_id for p in participants]),
-        CalendarEvent.start_date >= datetime.utcnow()
-    ).all()
-    calendar_event_text = " ".join([f"{ce.title} on {ce.start_date.strftime('%Y-%m-%d')}" for ce in calendar_events])
+    # Participants' calendar events in the coming days; recurring events are
+    # expanded for that window only
+    participant_ids = [row.user_id for row in db.session.query(Participant.user_id).filter_by(meeting_id=meeting_id)]
+    window_start = datetime.utcnow()
+    window_end = window_start + timedelta(days=Config.PRE_MEETING_CALENDAR_DAYS)
+    events_by_user = custom_events_for_users(participant_ids, window_start, window_end)
+    calendar_event_text = " ".join([
+        f"{ce.title} on {ce.start.strftime('%Y-%m-%d')}"
+        for occurrences in events_by_user.values() for ce in occurrences
+    ])
     
     pre_meeting_data = f"""
         Meeting Title: {meeting.title}
@@ -119,14 +133,9 @@ def aggregate_pre_meeting_data(meeting_id):
 
 def clean_llm_output(raw_text: str) -> str:
     """
-    Optionally remove any Markdown code fences or triple backticks
-    if you want to strip them from the raw text. This is optional 
-    since you are no longer requiring valid JSON, but it can help 
-    avoid clutter in the final string.
+    Remove any Markdown code fences around free-text model output.
     """
-    cleaned = re.sub(r"```(?:json)?", "", raw_text, flags=re.IGNORECASE).strip()
-    cleaned = re.sub(r"^```\s*$", "", cleaned, flags=re.MULTILINE).strip()
-    return cleaned
+    return strip_code_fences(raw_text)
 
 
 
@@ -184,10 +193,10 @@ def generate_agent_output(pre_meeting_data):
     """
 
     # Define functions for each call
-    def get_agenda():
+    def get_agenda(model_id):
         agenda_prompt = PromptTemplate.from_template(agenda_prompt_template)
         watsonx_llm_agenda = WatsonxLLM(
-            model_id=Config.WATSONX_MODEL_ID_1,
+            model_id=model_id,
             url=Config.WATSONX_URL,
             project_id=Config.WATSONX_PROJECT_ID,
             apikey=Config.WATSONX_API_KEY,
@@ -204,10 +213,10 @@ def generate_agent_output(pre_meeting_data):
         return clean_llm_output(raw_agenda)
         #return raw_agenda
 
-    def get_invitation():
+    def get_invitation(model_id):
         invitation_prompt = PromptTemplate.from_template(invitation_prompt_template)
         watsonx_llm_invitation = WatsonxLLM(
-            model_id=Config.WATSONX_MODEL_ID_2,
+            model_id=model_id,
             url=Config.WATSONX_URL,
             project_id=Config.WATSONX_PROJECT_ID,
             apikey=Config.WATSONX_API_KEY,
@@ -224,10 +233,10 @@ def generate_agent_output(pre_meeting_data):
         return clean_llm_output(raw_invitation)
         #return raw_invitation
 
-    def get_recommendations():
+    def get_recommendations(model_id):
         recommendations_prompt = PromptTemplate.from_template(recommendations_prompt_template)
         watsonx_llm_recommendations = WatsonxLLM(
-            model_id=Config.WATSONX_MODEL_ID_3,
+            model_id=model_id,
             url=Config.WATSONX_URL,
             project_id=Config.WATSONX_PROJECT_ID,
             apikey=Config.WATSONX_API_KEY,
@@ -245,20 +254,28 @@ def generate_agent_output(pre_meeting_data):
         # return raw_recommendations
 
 
-    # Run the three calls concurrently
-    with ThreadPoolExecutor() as executor:
-        future_agenda = executor.submit(get_agenda)
-        future_invitation = executor.submit(get_invitation)
-        future_recommendations = executor.submit(get_recommendations)
-
-        agenda_text = future_agenda.result()
-        invitation_text = future_invitation.result()
-        recommendations_text = future_recommendations.result()
+    # Run the three calls concurrently on the shared fan-out pool.
+    # A slow or failed section comes back empty with its status instead
+    # of failing or stalling the other two.
+    results = fanout.run(
+        {
+            "agenda": (get_agenda, Config.WATSONX_MODEL_ID_1),
+            "invitation": (get_invitation, Config.WATSONX_MODEL_ID_2),
+            "recommendations": (get_recommendations, Config.WATSONX_MODEL_ID_3),
+        },
+        timeout=Config.AGENT_SECTION_TIMEOUT,
+        hedge_model_id=Config.AGENT_HEDGE_MODEL_ID or None,
+        hedge_after=Config.AGENT_HEDGE_AFTER
+    )
 
     return {
-        "agenda": agenda_text,
-        "invitation": invitation_text,
-        "recommendations": recommendations_text
+        "agenda": results["agenda"]["text"],
+        "invitation": results["invitation"]["text"],
+        "recommendations": results["recommendations"]["text"],
+        "status": {
+            section: {k: v for k, v in result.items() if k != "text"}
+            for section, result in results.items()
+        }
     }
 
 
@@ -266,30 +283,19 @@ def generate_agent_output(pre_meeting_data):
 
 def send_invitations(meeting, invitation_content):
     """
-    Loop through meeting participants and send invitation emails.
+    Queue invitation emails for the meeting participants.
     """
-    # Get all participants for the meeting
+    # Get all participants for the meeting, and their users in one IN query
     participants = Participant.query.filter_by(meeting_id=meeting.meeting_id).all()
+    user_ids = {participant.user_id for participant in participants}
+    users = User.query.filter(User.user_id.in_(user_ids)).all() if user_ids else []
 
     # Also include the organizer if desired
-    recipient_emails = set()
-    for participant in participants:
-        user = User.query.get(participant.user_id)
-        if user and user.email:
-            recipient_emails.add(user.email)
+    recipient_emails = {user.email for user in users if user.email}
 
     subject = f"Meeting Invitation: {meeting.title}"
-    for email in recipient_emails:
-        msg = Message(
-            subject=subject,
-            recipients=[email],
-            html=invitation_content,
-            sender=Config.MAIL_DEFAULT_SENDER
-        )
-        try:
-            mail.send(msg)
-        except Exception as e:
-            current_app.logger.error(f"Failed to send email to {email}: {str(e)}")
+    # Queued in one insert; the mail queue worker sends them in batches
+    enqueue_email(sorted(recipient_emails), subject, invitation_content, sender=Config.MAIL_DEFAULT_SENDER or None)
 
 
 
@@ -335,6 +341,25 @@ def get_agenda(meeting_id):
 
 
 
+@agent_bp.route("/model_latency", methods=["GET"])
+@login_required
+def model_latency():
+    """
+    Per-model latency histograms of the fan-out model calls.
+    """
+    return jsonify({"models": fanout.latency_snapshot()})
+
+
+@agent_bp.route("/parse_stats", methods=["GET"])
+@login_required
+def structured_parse_stats():
+    """
+    Per-model success rate of structured (JSON) outputs: parsed on the
+    first answer, after a repair re-prompt, or failed.
+    """
+    return jsonify({"models": parse_stats.snapshot()})
+
+
 @agent_bp.route("/generate_agenda/<int:meeting_id>", methods=["POST"])
 @login_required
 def generate_agenda(meeting_id):
@@ -414,10 +439,14 @@ def refine_agenda(meeting_id):
         }
     )
 
-    llm_chain = prompt | watsonx_llm
     try:
-        result = llm_chain.invoke({"pre_meeting_data": pre_meeting_data, "refinement": user_input})
-        refined_output = json.loads(result)
+        refined_output = invoke_structured(
+            watsonx_llm, prompt,
+            {"pre_meeting_data": pre_meeting_data, "refinement": user_input},
+            AGENDA_SCHEMA,
+            model_id=Config.WATSONX_MODEL_ID_3,
+            max_repairs=Config.STRUCTURED_OUTPUT_MAX_REPAIRS
+        )
     except Exception as e:
         return jsonify({"error": f"Failed to refine agenda: {str(e)}"}), 500
 
@@ -746,8 +775,14 @@ from datetime import datetime
 from app.config import Config
 from langchain.schema import HumanMessage, SystemMessage
 from langgraph.graph import START, MessagesState, StateGraph
-import sqlite3
-from langgraph.checkpoint.sqlite import SqliteSaver
+from langchain_core.runnables import RunnableConfig
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+import uuid
+import logging
+import threading
+import time
+from app.agent.checkpointer import build_checkpointer
+from app.agent.memory import MemoryPolicy
 
 
 # //////////////////////////////
@@ -808,11 +843,24 @@ workflow.add_edge(START, "model")
 # based on the conversation's messages.
 workflow.add_node("model", call_model)
 
-# Setup persistent memory with SQLite
-conn = sqlite3.connect("app/agent/chat_memory.sqlite", check_same_thread=False)
-memory = SqliteSaver(conn)
+# Setup persistent memory: pooled SQLite file (WAL) or the application database
+memory = build_checkpointer(
+    Config.AGENT_CHECKPOINT_DB,
+    Config.SQLALCHEMY_DATABASE_URI,
+    pool_size=Config.AGENT_CHECKPOINT_POOL_SIZE
+)
 app = workflow.compile(checkpointer=memory)
 
+# Bound the per-meeting history: window recent turns, summarize older ones
+# into a memory message and periodically drop old checkpoints.
+memory_policy = MemoryPolicy(
+    llm,
+    window=Config.AGENT_MEMORY_WINDOW,
+    summary_words=Config.AGENT_MEMORY_SUMMARY_WORDS,
+    keep_checkpoints=Config.AGENT_CHECKPOINTS_PER_THREAD,
+    compact_every=Config.AGENT_COMPACT_EVERY
+)
+
 # //////////////////////////////
 # 4. === TOOLS SETUP =====
 # //////////////////////////////
@@ -893,13 +941,15 @@ pdf_qa_tool = Tool(
 # b. Mark Action Item Tool
 # -----------------------------
 
-def mark_action_item_tool_func(meeting_id: int, description: str) -> str:
+def mark_action_item_tool_func(meeting_id: int, description: str, assigned_to=None) -> str:
     """
     Adds an action item to the meeting and emits a socket event.
     """
+    if assigned_to is None and current_user and current_user.is_authenticated:
+        assigned_to = current_user.user_id
     action_item = ActionItem(
         meeting_id=meeting_id,
-        assigned_to=current_user.user_id,
+        assigned_to=assigned_to,
         description=description,
         status="pending",
         priority="medium",
@@ -920,10 +970,21 @@ def mark_action_item_tool_func(meeting_id: int, description: str) -> str:
 
     return f"Action item added: {description}"
 
+def mark_action_item_from_config(description: str, config: RunnableConfig) -> str:
+    """
+    Tool entry point. The graph is shared by all meetings, so the meeting
+    and the requesting user are read from the run config of the current call.
+    """
+    configurable = config.get("configurable", {})
+    meeting_id = configurable.get("meeting_id") or configurable.get("thread_id")
+    if not meeting_id:
+        return "Error: no meeting is associated with this conversation."
+    return mark_action_item_tool_func(int(meeting_id), description, configurable.get("user_id"))
+
 # Wrap the Mark Action Item Tool as a Tool object
 action_item_tool = Tool(
             name="mark_action_item",
-            func=lambda description: mark_action_item_tool_func(meeting_id, description),
+            func=mark_action_item_from_config,
             description=(
                     "Use this tool to add action items."
                 ),
@@ -935,8 +996,12 @@ action_item_tool = Tool(
 # 6. === AGENT EXECUTOR =====
 # //////////////////////////////
 
-def create_agent_executor(meeting_id):
-    
+def create_agent_executor():
+    """
+    Build and compile the ReAct agent graph. Nothing in the graph is
+    meeting specific: the meeting id, user and meeting context travel in
+    the run config, so one compiled graph serves every request.
+    """
     # Combine All Tools
     tools = [
         pdf_qa_tool,
@@ -944,39 +1009,66 @@ def create_agent_executor(meeting_id):
     ]
 
     # Create the agent executor using the ReACT agent with Model and Tools.
-    agent_executor = create_react_agent(llm, tools, checkpointer=memory)
-
+    started = time.perf_counter()
+    agent_executor = create_react_agent(
+        llm,
+        tools,
+        checkpointer=memory,
+        pre_model_hook=memory_policy.pre_model_hook
+    )
+    compile_ms = (time.perf_counter() - started) * 1000
+    logging.getLogger(__name__).info(f"Agent graph compiled in {compile_ms:.1f} ms")
 
     return agent_executor
 
-    # Meeting ID for conversation persistence
-    # Config = {"configurable": {"thread_id": meeting_id}}
+_agent_executor = None
+_agent_executor_lock = threading.Lock()
+
+def get_agent_executor():
+    """
+    Return the process-wide compiled agent graph, compiling it on first use.
+    """
+    global _agent_executor
+    if _agent_executor is None:
+        with _agent_executor_lock:
+            if _agent_executor is None:
+                _agent_executor = create_agent_executor()
+    return _agent_executor
 
 # 3. === MAIN FUNCTION =====
 
-def process_user_query(meeting_id, user_query):
-    print("PROCESSING USER QUERY") # DEBUG CODE
+def build_agent_run(meeting_id, user_query, user_id=None):
+    """
+    Build the graph input and run config for one user turn.
+    Only the user query is stored in the conversation memory. The meeting
+    context is added to the system message for each model call instead of
+    being copied into every stored turn.
+    """
     meeting, pre_meeting_data = aggregate_pre_meeting_data(meeting_id)
     print("AGGREGATE DATA ACQUIRED")
-    agent_executor = create_agent_executor(meeting_id)
-    
-    prompt = f"""
-    You are a helpful virtual assistant for meetings.
-
-    Meeting Context:
-    {pre_meeting_data}
-
-    User Query:
-    {user_query}
+    state = {"messages": [HumanMessage(content=user_query)]}
+    config = {
+        "configurable": {
+            "thread_id": meeting_id,
+            "meeting_id": meeting_id,
+            "user_id": user_id,
+            "meeting_context": pre_meeting_data,
+            "system_prompt": (
+                "You are a helpful virtual assistant for meetings. "
+                "Please respond accurately or execute any required actions."
+            )
+        }
+    }
+    return state, config
 
-    Please respond accurately or execute any required actions.
-    """
-    # Create a state dictionary with a "messages" key
-    state = {"messages": [HumanMessage(content=prompt)]}
-    config = {"configurable": {"thread_id": meeting_id}}
+def process_user_query(meeting_id, user_query, user_id=None):
+    print("PROCESSING USER QUERY") # DEBUG CODE
+    agent_executor = get_agent_executor()
+    state, config = build_agent_run(meeting_id, user_query, user_id)
     
     try:
         result = agent_executor.invoke(state, config)
+        memory_policy.maybe_compact(memory, meeting_id)
         
         # If the result contains messages, extract the last message only
         if isinstance(result, dict) and "messages" in result:
@@ -995,9 +1087,67 @@ def process_user_query(meeting_id, user_query):
             return str(result)
     except Exception as e:
         return f"Agent execution error: {str(e)}"
-    
 
+def stream_user_query(meeting_id, user_query, user_id=None):
+    """
+    Run the agent with LangGraph streaming and emit progress to the
+    meeting room on the /agent namespace as it happens:
+      - agent_response_start    once, before the first model call
+      - agent_response_chunk    token deltas of the model answer
+      - agent_tool_progress     when a tool is called and when it returns
+    Returns the final answer text.
+    """
+    print("STREAMING USER QUERY") # DEBUG CODE
+    agent_executor = get_agent_executor()
+    state, config = build_agent_run(meeting_id, user_query, user_id)
+    room = f"meeting_{meeting_id}"
+    message_id = uuid.uuid4().hex
+
+    socketio.emit("agent_response_start", {
+        "message_id": message_id,
+        "username": "Agent"
+    }, room=room, namespace="/agent")
+
+    final_text = ""
+    try:
+        for mode, payload in agent_executor.stream(state, config, stream_mode=["messages", "updates"]):
+            if mode == "messages":
+                chunk, metadata = payload
+                # Skip the memory summarization call of the pre-model hook
+                if metadata.get("langgraph_node") != "agent" or not isinstance(chunk, AIMessageChunk):
+                    continue
+                text = chunk.content if isinstance(chunk.content, str) else ""
+                if text:
+                    socketio.emit("agent_response_chunk", {
+                        "message_id": message_id,
+                        "chunk": text
+                    }, room=room, namespace="/agent")
+                continue
+
+            for node, update in payload.items():
+                if not isinstance(update, dict):
+                    continue
+                for message in update.get("messages", []):
+                    if node == "agent" and isinstance(message, AIMessage):
+                        for tool_call in message.tool_calls:
+                            socketio.emit("agent_tool_progress", {
+                                "message_id": message_id,
+                                "tool": tool_call["name"],
+                                "status": "running"
+                            }, room=room, namespace="/agent")
+                        if not message.tool_calls:
+                            final_text = message.content
+                    elif node == "tools" and isinstance(message, ToolMessage):
+                        socketio.emit("agent_tool_progress", {
+                            "message_id": message_id,
+                            "tool": message.name,
+                            "status": "done"
+                        }, room=room, namespace="/agent")
+        memory_policy.maybe_compact(memory, meeting_id)
+    except Exception as e:
+        final_text = f"Agent execution error: {str(e)}"
 
+    return message_id, final_text
 
 @agent_bp.route("/chat_message", methods=["POST"])
 # @login_required
@@ -1032,13 +1182,28 @@ def chat_message():
     db.session.add(chat_msg)
     db.session.commit()
     
-    # Use the unified LLM chain to process the query
-    agent_response = process_user_query(meeting_id, user_message)
+    # Use the unified LLM chain to process the query, streaming by default
+    stream = data.get("stream", Config.AGENT_STREAM_RESPONSES)
+    if stream:
+        message_id, agent_response = stream_user_query(meeting_id, user_message, user_id=uid or None)
+    else:
+        message_id, agent_response = None, process_user_query(meeting_id, user_message, user_id=uid or None)
+
+    # Persist the final agent reply alongside the user's message
+    db.session.add(ChatMessage(
+        meeting_id=meeting_id,
+        user_id=None,
+        username="Agent",
+        message=agent_response,
+        timestamp=datetime.utcnow()
+    ))
+    db.session.commit()
     
     socketio.emit("agent_response", {
         "message": agent_response,
         "type": "unified",
-        "username": "Agent"
+        "username": "Agent",
+        "message_id": message_id
     }, room=f"meeting_{meeting_id}", namespace="/agent") 
     current_app.logger.info(f"Agent response emitted to meeting_{meeting_id}")
 
@@ -0,0 +1,305 @@
+# app/agent/structured_output.py
+
+import json
+import logging
+import re
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+_FENCE = re.compile(r"```[a-zA-Z]*")
+_PY_LITERALS = {"None": "null", "True": "true", "False": "false"}
+
+REPAIR_PROMPT = """
+Your previous answer could not be used: {error}
+
+Previous answer:
+{output}
+
+Return the same content as valid JSON. {schema}
+Output only the JSON, with no code fences and no explanation.
+"""
+
+
+class StructuredOutputError(ValueError):
+    """
+    Raised when model output cannot be turned into the expected structure,
+    even after repair attempts. Keeps the last raw output for debugging.
+    """
+
+    def __init__(self, message, raw_output=""):
+        super().__init__(message)
+        self.raw_output = raw_output
+
+
+# ------------------------------------------------------------
+# Tolerant JSON extraction
+# ------------------------------------------------------------
+def strip_code_fences(text):
+    """
+    Remove Markdown code fence lines (``` or ```json) around model output.
+    """
+    return _FENCE.sub("", text or "").strip()
+
+
+def _relaxed(text):
+    """
+    Rewrite Python literals (None/True/False) to JSON and drop trailing
+    commas before "]" or "}". String tokens are copied unchanged, so text
+    like "True story, None left" inside a value is not touched.
+    """
+    out = []
+    i, n = 0, len(text)
+    while i < n:
+        ch = text[i]
+        if ch == '"':
+            # Copy the string token up to its closing quote (or the end)
+            j = i + 1
+            while j < n and text[j] != '"':
+                j += 2 if text[j] == "\\" else 1
+            out.append(text[i:j + 1])
+            i = j + 1
+        elif ch == ",":
+            j = i + 1
+            while j < n and text[j].isspace():
+                j += 1
+            if j < n and text[j] in "]}":
+                i = j  # trailing comma
+            else:
+                out.append(ch)
+                i += 1
+        elif ch.isalpha() or ch == "_":
+            j = i
+            while j < n and (text[j].isalnum() or text[j] == "_"):
+                j += 1
+            word = text[i:j]
+            out.append(_PY_LITERALS.get(word, word))
+            i = j
+        else:
+            out.append(ch)
+            i += 1
+    return "".join(out)
+
+
+def _embedded_values(source):
+    """
+    (length, value) for every JSON value that starts at a "[" or "{" in
+    `source` and is not nested in an earlier one.
+    """
+    decoder = json.JSONDecoder()
+    found = []
+    i = 0
+    while i < len(source):
+        if source[i] in "[{":
+            try:
+                value, end = decoder.raw_decode(source, i)
+            except ValueError:
+                i += 1
+                continue
+            found.append((end - i, value))
+            i = end
+        else:
+            i += 1
+    return found
+
+
+def extract_json(text, validate=None):
+    """
+    Find the JSON value in model output: accepts code fences, leading
+    prose ("Here is the JSON:"), trailing commentary, trailing commas and
+    Python literals. Raises ValueError if no JSON value is found.
+
+    Values found as-is and after relaxing are considered together, largest
+    first, so a stray "[1]" in the prose does not win over a payload that
+    only needed relaxing. With `validate`, the largest value it accepts is
+    returned (validated); if it accepts none, its error for the largest
+    value is raised.
+    """
+    text = strip_code_fences(text)
+    candidates = []
+    for source in (text, _relaxed(text)):
+        try:
+            candidates.append((len(source), json.loads(source)))
+        except ValueError:
+            candidates.extend(_embedded_values(source))
+    if not candidates:
+        raise ValueError("No JSON object or array found in model output")
+
+    candidates.sort(key=lambda c: c[0], reverse=True)
+    if validate is None:
+        return candidates[0][1]
+    first_error = None
+    for _, value in candidates:
+        try:
+            return validate(value)
+        except ValueError as e:
+            first_error = first_error or e
+    raise first_error
+
+
+# ------------------------------------------------------------
+# Schemas
+# ------------------------------------------------------------
+class Schema:
+    """
+    A named output shape: `describe` is told to the model when repairing,
+    `validate(value)` returns the normalized value or raises ValueError.
+    """
+
+    def __init__(self, name, describe, validate):
+        self.name = name
+        self.describe = describe
+        self.validate = validate
+
+
+TASK_STATUSES = {"pending", "in_progress", "completed"}
+TASK_PRIORITIES = {"low", "medium", "high"}
+
+
+def _iso_date_or_none(value):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(str(value).strip()[:10], "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def _int_or_none(value):
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def validate_tasks(value):
+    if isinstance(value, dict):
+        # {"tasks": [...]} or a single task object
+        value = value.get("tasks", value.get("action_items", [value]))
+    if not isinstance(value, list):
+        raise ValueError("expected a JSON array of task objects")
+
+    tasks = []
+    for item in value:
+        if not isinstance(item, dict):
+            continue
+        description = str(item.get("description") or "").strip()
+        if not description:
+            continue
+        status = str(item.get("status") or "pending").strip().lower()
+        priority = str(item.get("priority") or "medium").strip().lower()
+        tasks.append({
+            "description": description,
+            "assigned_to": _int_or_none(item.get("assigned_to")),
+            "status": status if status in TASK_STATUSES else "pending",
+            "priority": priority if priority in TASK_PRIORITIES else "medium",
+            "start_date": _iso_date_or_none(item.get("start_date")),
+            "due_date": _iso_date_or_none(item.get("due_date")),
+        })
+    if value and not tasks:
+        raise ValueError("no item has a non-empty \"description\" string")
+    return tasks
+
+
+def _as_text(value):
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, list):
+        return "\n".join(_as_text(v) for v in value)
+    return json.dumps(value)
+
+
+def validate_agenda(value):
+    if not isinstance(value, dict):
+        raise ValueError("expected a JSON object")
+    missing = [k for k in ("agenda", "invitation", "recommendations") if k not in value]
+    if missing:
+        raise ValueError(f"missing keys: {', '.join(missing)}")
+    return {k: _as_text(value[k]) for k in ("agenda", "invitation", "recommendations")}
+
+
+TASKS_SCHEMA = Schema(
+    "tasks",
+    'The JSON must be an array of objects with keys "description" (string, required), '
+    '"assigned_to" (integer or null), "status" ("pending", "in_progress" or "completed"), '
+    '"priority" ("low", "medium" or "high"), "start_date" and "due_date" (YYYY-MM-DD or null).',
+    validate_tasks
+)
+
+AGENDA_SCHEMA = Schema(
+    "agenda",
+    'The JSON must be an object with the string keys "agenda", "invitation" and "recommendations".',
+    validate_agenda
+)
+
+
+# ------------------------------------------------------------
+# Parse statistics per model
+# ------------------------------------------------------------
+class ParseStats:
+    """
+    Counts, per model id, how structured outputs were obtained:
+    parsed on the first answer, after a repair re-prompt, or not at all.
+    """
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def record(self, model_id, outcome):
+        with self._lock:
+            counts = self._counts.setdefault(model_id, {"ok": 0, "repaired": 0, "failed": 0})
+            counts[outcome] += 1
+
+    def snapshot(self):
+        with self._lock:
+            result = {}
+            for model_id, counts in self._counts.items():
+                total = sum(counts.values())
+                result[model_id] = dict(
+                    counts,
+                    total=total,
+                    first_try_rate=round(counts["ok"] / total, 3) if total else None,
+                    success_rate=round((counts["ok"] + counts["repaired"]) / total, 3) if total else None
+                )
+            return result
+
+
+parse_stats = ParseStats()
+
+
+def _parse(output, schema):
+    return extract_json(output, schema.validate)
+
+
+def invoke_structured(llm, prompt, variables, schema, model_id="", max_repairs=1):
+    """
+    Run `prompt | llm` and return the output parsed and validated against
+    `schema`. On failure the model gets a short repair prompt with its own
+    answer and the error, instead of regenerating from the full input.
+    Raises StructuredOutputError when no usable output was produced.
+    """
+    output = (prompt | llm).invoke(variables)
+    try:
+        value = _parse(output, schema)
+        parse_stats.record(model_id, "ok")
+        return value
+    except ValueError as e:
+        error = e
+
+    for attempt in range(max_repairs):
+        logger.warning(f"Structured output ({schema.name}) from {model_id} rejected: {error}; repair {attempt + 1}")
+        repair = REPAIR_PROMPT.format(error=error, output=output[:4000], schema=schema.describe)
+        output = llm.invoke(repair)
+        try:
+            value = _parse(output, schema)
+            parse_stats.record(model_id, "repaired")
+            return value
+        except ValueError as e:
+            error = e
+
+    parse_stats.record(model_id, "failed")
+    raise StructuredOutputError(f"Invalid {schema.name} output: {error}", raw_output=output)
@@ -0,0 +1,142 @@
+# app/auth/passwords.py
+
+import logging
+import threading
+
+from passlib.hash import bcrypt
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasherBusy(RuntimeError):
+    """
+    Raised when too many password hashes are already waiting for a worker.
+    """
+
+
+_native_threads = None
+
+
+def configure_native_threads(threads):
+    """
+    Size eventlet's native thread pool (tpool), which runs password hashing.
+
+    The size is global to the process and must be set before tpool is first
+    used, so it is set once, from app setup; a later call with another size
+    is ignored with a warning. Image work does not use tpool (see
+    app/profile/photos.py).
+    """
+    global _native_threads
+    if _native_threads is not None:
+        if threads != _native_threads:
+            logger.warning(f"Native thread pool already sized to {_native_threads}; ignoring {threads}")
+        return
+    _native_threads = threads
+    try:
+        from eventlet import tpool
+    except ImportError:
+        return
+    tpool.set_num_threads(threads)
+
+
+def native_executor():
+    """
+    Return a function that runs a call on a real OS thread.
+
+    Under eventlet, `threading` is green, so CPU-bound work (bcrypt) would
+    run on the hub and stall every other green thread; eventlet.tpool runs
+    it on native threads instead. Without eventlet the calling request
+    thread is already native.
+    """
+    try:
+        from eventlet import patcher, tpool
+    except ImportError:
+        return lambda fn, *args: fn(*args)
+    if not patcher.is_monkey_patched("thread"):
+        return lambda fn, *args: fn(*args)
+    return tpool.execute
+
+
+class PasswordHasher:
+    """
+    bcrypt hashing and verification off the eventlet hub.
+
+    - Calls run on eventlet's native thread pool, sized once at app setup
+      with configure_native_threads(PASSWORD_HASH_THREADS).
+    - At most `max_pending` calls may wait or run at once; beyond that
+      PasswordHasherBusy is raised instead of queueing without bound.
+    - `rounds` is the bcrypt cost for new hashes. verify_and_update()
+      rehashes on login when a stored hash uses another cost.
+    """
+
+    def __init__(self, rounds=12, max_pending=64):
+        self.rounds = rounds
+        self._scheme = bcrypt.using(rounds=rounds)
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._execute = None
+        self._execute_lock = threading.Lock()
+
+    def _run(self, fn, *args):
+        if self._execute is None:
+            with self._execute_lock:
+                if self._execute is None:
+                    self._execute = native_executor()
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy("Too many password operations in progress")
+        try:
+            return self._execute(fn, *args)
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(self._scheme.hash, password)
+
+    def is_valid_hash(self, password_hash):
+        """
+        True if the stored value parses as a bcrypt hash.
+        """
+        if not password_hash or not self._scheme.identify(password_hash):
+            return False
+        try:
+            self._scheme.from_string(password_hash)
+        except ValueError:
+            return False
+        return True
+
+    def verify(self, password, password_hash):
+        """
+        False for a wrong password and for a missing, unknown or malformed
+        stored hash. Backend and runtime errors are logged and re-raised
+        rather than reported as a failed login.
+        """
+        if not self.is_valid_hash(password_hash):
+            return False
+        try:
+            return self._run(self._scheme.verify, password, password_hash)
+        except PasswordHasherBusy:
+            raise
+        except Exception as e:
+            logger.error(f"Password verification failed: {e}")
+            raise
+
+    def needs_rehash(self, password_hash):
+        return self._scheme.needs_update(password_hash)
+
+    def verify_and_update(self, password, password_hash):
+        """
+        Verify a password. Returns (valid, new_hash); new_hash is set when the
+        stored hash should be replaced because the configured cost changed.
+        """
+        if not self.verify(password, password_hash):
+            return False, None
+        if self.needs_rehash(password_hash):
+            return True, self.hash(password)
+        return True, None
+
+
+hasher = PasswordHasher(
+    rounds=Config.BCRYPT_ROUNDS,
+    max_pending=Config.PASSWORD_HASH_MAX_PENDING
+)
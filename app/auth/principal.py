@@ -0,0 +1,148 @@
+# app/auth/principal.py
+
+import threading
+import time
+from collections import OrderedDict
+
+import jwt
+from flask_login import UserMixin
+from sqlalchemy import event
+
+from app.avatars import avatar_url
+from app.config import Config
+from app.extensions import db
+from app.models import User
+
+# Columns kept in the cached principal; everything else loads the User row
+PRINCIPAL_FIELDS = ("user_id", "username", "email", "role", "profile_pic_url", "email_verified")
+
+
+class PrincipalCache:
+    """
+    Short-TTL, size-bounded in-process cache of principal fields per user id.
+    Entries are dropped as soon as the User row is updated in this process;
+    other processes see the change after at most `ttl` seconds.
+    """
+
+    def __init__(self, ttl=30, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, data = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return data
+
+    def put(self, user_id, data):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, data)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+principal_cache = PrincipalCache(ttl=Config.AUTH_PRINCIPAL_TTL, max_entries=Config.AUTH_PRINCIPAL_CACHE_SIZE)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_principal(mapper, connection, target):
+    principal_cache.invalidate(target.user_id)
+
+
+class Principal(UserMixin):
+    """
+    The logged-in user as seen by handlers (current_user).
+
+    Holds the cached id, username, email, role, avatar and verification flag.
+    Any other attribute (relationships, password, ...) loads the full User
+    row on first access, once per request, and reads or writes go to it.
+    """
+
+    def __init__(self, data):
+        object.__setattr__(self, "_data", data)
+        object.__setattr__(self, "_user", None)
+
+    @property
+    def user(self):
+        if self._user is None:
+            object.__setattr__(self, "_user", db.session.get(User, self._data["user_id"]))
+        return self._user
+
+    def get_id(self):
+        return str(self._data["user_id"])
+
+    @property
+    def avatar_url(self):
+        return avatar_url(self._data["user_id"], self._data["profile_pic_url"])
+
+    def __getattr__(self, name):
+        data = object.__getattribute__(self, "_data")
+        if name in data:
+            return data[name]
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.user, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.user, name, value)
+        if name in self._data:
+            object.__setattr__(self, "_data", dict(self._data, **{name: value}))
+
+    def __eq__(self, other):
+        return getattr(other, "user_id", None) == self._data["user_id"]
+
+    def __hash__(self):
+        return hash(self._data["user_id"])
+
+
+def load_principal(user_id):
+    """
+    Principal for a user id from the cache, or from one narrow query.
+    Returns None for unknown users.
+    """
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+    data = principal_cache.get(user_id)
+    if data is None:
+        row = (
+            db.session.query(*(getattr(User, f) for f in PRINCIPAL_FIELDS))
+            .filter(User.user_id == user_id)
+            .first()
+        )
+        if row is None:
+            return None
+        data = dict(zip(PRINCIPAL_FIELDS, row))
+        principal_cache.put(user_id, data)
+    return Principal(data)
+
+
+def principal_from_bearer_token(request):
+    """
+    Verify an "Authorization: Bearer <jwt>" header (tokens from
+    generate_token / api_login) and return the cached principal.
+    """
+    header = request.headers.get("Authorization", "")
+    if not header.lower().startswith("bearer "):
+        return None
+    try:
+        payload = jwt.decode(header[7:].strip(), Config.SECRET_KEY, algorithms=["HS256"])
+    except jwt.InvalidTokenError:
+        return None
+    return load_principal(payload.get("user_id"))
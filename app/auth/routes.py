@@ -7,11 +7,12 @@ import secrets
 
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app
 from flask_login import login_user, logout_user, login_required, current_user
-from passlib.hash import bcrypt
+from app.auth.passwords import PasswordHasherBusy, hasher
 from sqlalchemy import or_
 from itsdangerous import URLSafeTimedSerializer, SignatureExpired, BadSignature
 # Flask-Mail
 from flask_mail import Message
+from app.mail_queue import enqueue_email
 
 # Import database & models
 from app.extensions import db, login_manager, mail
@@ -19,6 +20,17 @@ from app.models import User
 
 auth_bp = Blueprint("auth_bp", __name__, template_folder="templates")
 
+
+@auth_bp.app_errorhandler(PasswordHasherBusy)
+def password_hasher_busy(error):
+    """
+    Too many logins/registrations hashing at once: ask the client to retry.
+    """
+    if request.path.startswith("/api/") or request.is_json:
+        return jsonify({"error": "Server busy, please retry."}), 503
+    flash("The server is busy, please try again in a moment.", "warning")
+    return redirect(request.url)
+
 # SECRET_KEY for JWT or token generation (in production, load from config)
 SECRET_KEY = os.environ.get("SECRET_KEY", "change_me_in_env")
 
@@ -27,17 +39,15 @@ SECRET_KEY = os.environ.get("SECRET_KEY", "change_me_in_env")
 ########################################################
 def send_email(to_address, subject, body_html):
     """
-    Uses Flask-Mail to send an HTML email.
+    Queue an HTML email; the mail queue worker sends it with Flask-Mail.
     Make sure your app.config[MAIL_*] settings are correct.
     """
-    msg = Message(
-        subject, 
-        sender=("Meeting Ledger", "patrickndille@gmail.com"),
-        recipients=[to_address]
-        )
-    msg.html = body_html
-    mail.send(msg)
-    print("Email Verification message sent") # DEBUG
+    enqueue_email(
+        [to_address],
+        subject,
+        body_html,
+        sender=("Meeting Ledger", "patrickndille@gmail.com")
+    )
 
 ########################################################
 # Registration
@@ -72,8 +82,8 @@ def register():
             flash("That email is already taken.", "danger")
             return redirect(url_for("auth_bp.register"))
 
-        # Hash password with passlib
-        hashed_pw = bcrypt.hash(password)
+        # Hash password with passlib (off the eventlet hub)
+        hashed_pw = hasher.hash(password)
 
         # Generate verification token
         verification_token = secrets.token_urlsafe(32)
@@ -203,9 +213,14 @@ def login():
             flash("Invalid email or password.", "danger")
             return redirect(url_for("auth_bp.login"))
 
-        if not bcrypt.verify(password, user.password):
+        valid, new_hash = hasher.verify_and_update(password, user.password)
+        if not valid:
             flash("Invalid email or password.", "danger")
             return redirect(url_for("auth_bp.login"))
+        if new_hash:
+            # bcrypt cost changed since this hash was made
+            user.password = new_hash
+            db.session.commit()
 
         if not user.email_verified:
             flash("Your email is not verified. Please check your inbox.", "danger")
@@ -298,7 +313,7 @@ def reset_password(token):
             return redirect(url_for("auth_bp.reset_password", token=token))
 
         # Update password
-        user.password = bcrypt.hash(new_password)
+        user.password = hasher.hash(new_password)
         # Clear reset token
         user.reset_token = None
         user.reset_token_expires = None
@@ -337,7 +352,7 @@ def admin_only():
 import jwt
 import datetime
 
-SECRET_KEY = "your_secret_key_here"  # Use from config in production
+# Tokens are signed with the SECRET_KEY above, which the request loader verifies
 
 def generate_token(user):
     """Generate JWT token for authentication"""
@@ -356,8 +371,14 @@ def api_login():
     password = data.get("password")
 
     user = User.query.filter_by(email=email).first()
-    if not user or not bcrypt.verify(password, user.password):
+    if not user:
         return jsonify({"error": "Invalid credentials"}), 401
+    valid, new_hash = hasher.verify_and_update(password, user.password)
+    if not valid:
+        return jsonify({"error": "Invalid credentials"}), 401
+    if new_hash:
+        user.password = new_hash
+        db.session.commit()
 
     if not user.email_verified:
         return jsonify({"error": "Email not verified"}), 403
@@ -397,7 +418,7 @@ def api_register():
         return jsonify({"error": "Email or username already taken"}), 400
 
     verification_token = secrets.token_urlsafe(32)
-    hashed_pw = bcrypt.hash(password)
+    hashed_pw = hasher.hash(password)
     new_user = User(
         email=email,
         password=hashed_pw,
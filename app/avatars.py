@@ -0,0 +1,117 @@
+# app/avatars.py
+
+import logging
+import os
+import threading
+import time
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_AVATAR = "default-profile.png"
+PROFILE_PICS_DIR = "uploads/profile_pics"
+
+
+class AvatarResolver:
+    """
+    Resolves a user's profile_pic_url to a /static/ URL that exists,
+    falling back to the default avatar.
+
+    - Results are kept per user id and reused as long as the stored
+      profile_pic_url is unchanged, so renders do no filesystem calls.
+    - Files under static/uploads/profile_pics are known from a directory
+      listing, refreshed every `rescan_seconds` by a background task
+      (0 disables it); a photo outside that folder is checked once.
+    - update_photo calls note_upload() and invalidate() so a new photo
+      shows immediately.
+    """
+
+    def __init__(self, rescan_seconds=300):
+        self.rescan_seconds = rescan_seconds
+        self.static_folder = None
+        self._urls = {}  # user_id -> (profile_pic_url, resolved url)
+        self._files = None  # relative paths present in PROFILE_PICS_DIR
+        self._lock = threading.Lock()
+        self._started = False
+
+    def init_app(self, app, socketio=None):
+        self.static_folder = app.static_folder
+        if socketio is not None and self.rescan_seconds > 0 and not self._started:
+            self._started = True
+            socketio.start_background_task(self._rescan_loop)
+
+    def _scan(self):
+        folder = os.path.join(self.static_folder, PROFILE_PICS_DIR)
+        try:
+            with os.scandir(folder) as entries:
+                return {f"{PROFILE_PICS_DIR}/{e.name}" for e in entries if e.is_file()}
+        except FileNotFoundError:
+            return set()
+
+    def _rescan_loop(self):
+        while True:
+            time.sleep(self.rescan_seconds)
+            try:
+                self.rescan()
+            except Exception as e:
+                logger.error(f"Avatar rescan failed: {e}")
+
+    def rescan(self):
+        """
+        Reload the profile picture listing and forget resolved URLs, so photos
+        deleted or restored on disk are picked up.
+        """
+        files = self._scan()
+        with self._lock:
+            self._files = files
+            self._urls.clear()
+
+    def _exists(self, relative_path):
+        if relative_path.startswith(PROFILE_PICS_DIR + "/"):
+            if self._files is None:
+                files = self._scan()
+                with self._lock:
+                    if self._files is None:
+                        self._files = files
+            return relative_path in self._files
+        return os.path.isfile(os.path.join(self.static_folder, relative_path))
+
+    def url(self, user_id, profile_pic_url):
+        """
+        /static/ URL of the user's avatar.
+        """
+        cached = self._urls.get(user_id)
+        if cached is not None and cached[0] == profile_pic_url:
+            return cached[1]
+
+        relative_path = (profile_pic_url or "").removeprefix("/static/")
+        if relative_path and self.static_folder and self._exists(relative_path):
+            resolved = f"/static/{relative_path}"
+        elif relative_path and not self.static_folder:
+            # Not initialised (scripts, tests): trust the stored path
+            resolved = f"/static/{relative_path}"
+        else:
+            resolved = f"/static/{DEFAULT_AVATAR}"
+        with self._lock:
+            self._urls[user_id] = (profile_pic_url, resolved)
+        return resolved
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._urls.pop(user_id, None)
+
+    def note_upload(self, relative_path):
+        """
+        Record a file just written to PROFILE_PICS_DIR without rescanning.
+        """
+        with self._lock:
+            if self._files is not None:
+                self._files.add(relative_path)
+
+
+avatar_resolver = AvatarResolver(rescan_seconds=Config.AVATAR_RESCAN_SECONDS)
+
+
+def avatar_url(user_id, profile_pic_url):
+    return avatar_resolver.url(user_id, profile_pic_url)
@@ -0,0 +1,172 @@
+# app/calendar/feed.py
+
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, func, or_, select, true
+
+from app.extensions import db
+from app.models import ActionItem, CalendarEvent, Meeting, Participant
+
+DEFAULT_MEETING_DURATION = timedelta(hours=1)
+# Meetings are matched on their start time; one that started this long
+# before the window can still overlap it
+MAX_MEETING_SPAN = timedelta(days=1)
+
+
+def parse_range_param(value):
+    """
+    Parse a FullCalendar `start`/`end` parameter ("2026-10-01",
+    "2026-10-01T00:00:00", "...-04:00" or "...Z") into a naive UTC datetime,
+    the way timestamps are stored. Returns None for an empty value and
+    raises ValueError for one that does not parse.
+    """
+    if not value:
+        return None
+    # An unencoded "+" in the offset arrives as a space
+    parsed = datetime.fromisoformat(value.strip().replace(" ", "+").replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def meeting_end(meeting):
+    return meeting.date_time + (meeting.duration or DEFAULT_MEETING_DURATION)
+
+
+def user_meetings_clause(user_id):
+    """
+    Meetings the user organizes or participates in, as one WHERE clause.
+    """
+    return or_(
+        Meeting.organizer_id == user_id,
+        Meeting.meeting_id.in_(select(Participant.meeting_id).where(Participant.user_id == user_id))
+    )
+
+
+def _recurring_overlap(model, start_col, start, end):
+    """
+    A recurring row can have occurrences in [start, end) if it starts before
+    the end and its last occurrence does not end before the start.
+    """
+    filters = [model.recurrence_rule.isnot(None)]
+    if start is not None:
+        filters.append(or_(model.recurrence_until.is_(None), model.recurrence_until >= start))
+    if end is not None:
+        filters.append(start_col < end)
+    return and_(*filters)
+
+
+def single_meeting_overlap(start, end):
+    filters = [Meeting.recurrence_rule.is_(None)]
+    if start is not None:
+        filters.append(Meeting.date_time >= start - MAX_MEETING_SPAN)
+    if end is not None:
+        filters.append(Meeting.date_time < end)
+    return and_(*filters)
+
+
+def _meeting_filters(user_id, start, end):
+    return [
+        user_meetings_clause(user_id),
+        or_(single_meeting_overlap(start, end), _recurring_overlap(Meeting, Meeting.date_time, start, end))
+    ]
+
+
+def _task_filters(user_id, start, end):
+    filters = [ActionItem.assigned_to == user_id, ActionItem.due_date.isnot(None)]
+    if start is not None:
+        filters.append(ActionItem.due_date >= start.date())
+    if end is not None:
+        # The end is exclusive; a due date is the whole day
+        filters.append(ActionItem.due_date <= (end - timedelta(microseconds=1)).date())
+    return filters
+
+
+def single_custom_event_overlap(start, end):
+    filters = [CalendarEvent.recurrence_rule.is_(None)]
+    if start is not None:
+        filters.append(or_(
+            CalendarEvent.end_date >= start,
+            (CalendarEvent.end_date.is_(None)) & (CalendarEvent.start_date >= start)
+        ))
+    if end is not None:
+        filters.append(CalendarEvent.start_date < end)
+    return and_(*filters)
+
+
+def _custom_event_filters(user_id, start, end):
+    return [
+        CalendarEvent.user_id == user_id,
+        or_(
+            single_custom_event_overlap(start, end),
+            _recurring_overlap(CalendarEvent, CalendarEvent.start_date, start, end)
+        )
+    ]
+
+
+def meetings_in_range(user_id, start=None, end=None):
+    """
+    One-off meetings the user organizes or attends that overlap
+    [start, end), in one query. Either bound may be None. Recurring
+    meetings are expanded by app.calendar.occurrences.
+    """
+    meetings = (
+        Meeting.query
+        .filter(user_meetings_clause(user_id), single_meeting_overlap(start, end))
+        .order_by(Meeting.date_time)
+        .all()
+    )
+    if start is None:
+        return meetings
+    return [m for m in meetings if meeting_end(m) > start]
+
+
+def tasks_due_in_range(user_id, start=None, end=None):
+    return ActionItem.query.filter(*_task_filters(user_id, start, end)).order_by(ActionItem.due_date).all()
+
+
+def custom_events_in_range(user_id, start=None, end=None):
+    """
+    One-off custom events of the user overlapping [start, end).
+    """
+    return (
+        CalendarEvent.query
+        .filter(CalendarEvent.user_id == user_id, single_custom_event_overlap(start, end))
+        .order_by(CalendarEvent.start_date)
+        .all()
+    )
+
+
+def feed_etag(user_id, start=None, end=None):
+    """
+    Weak validator for the user's feed over [start, end): the row count and
+    max(updated_timestamp) of each source, read in a single statement.
+    Recurring meetings and events that can occur in the range are counted
+    too. Edits move the max, additions and removals (including being added
+    to or dropped from a meeting) change the count.
+    """
+    def summary(model, updated, filters):
+        return (
+            select(func.count(), func.max(updated)).select_from(model).where(*filters)
+        ).subquery()
+
+    meetings = summary(
+        Meeting, func.coalesce(Meeting.updated_timestamp, Meeting.created_timestamp),
+        _meeting_filters(user_id, start, end)
+    )
+    tasks = summary(
+        ActionItem, func.coalesce(ActionItem.updated_timestamp, ActionItem.created_timestamp),
+        _task_filters(user_id, start, end)
+    )
+    events = summary(
+        CalendarEvent, func.coalesce(CalendarEvent.updated_timestamp, CalendarEvent.start_date),
+        _custom_event_filters(user_id, start, end)
+    )
+    # Each summary is a single row, so joining them on TRUE yields one row
+    row = db.session.execute(
+        select(meetings, tasks, events).select_from(meetings.join(tasks, true()).join(events, true()))
+    ).one()
+
+    key = "|".join(str(value) for value in (user_id, start, end, *row))
+    return hashlib.sha1(key.encode()).hexdigest()
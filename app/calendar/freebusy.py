@@ -0,0 +1,154 @@
+# app/calendar/freebusy.py
+
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import select, union_all
+
+from app.calendar.feed import (
+    DEFAULT_MEETING_DURATION, MAX_MEETING_SPAN, single_custom_event_overlap, single_meeting_overlap
+)
+from app.calendar.occurrences import occurrence_cache
+from app.extensions import db
+from app.models import ActionItem, CalendarEvent, Meeting, OrganizationMember, Participant
+
+
+def merge_intervals(intervals):
+    """
+    Sweep line over (start, end) pairs: sort by start and extend the current
+    run while the next interval starts before it ends. Touching intervals
+    are joined. O(n log n); returns a new sorted, disjoint list.
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def busy_intervals(user_ids, start, end, task_minutes=60):
+    """
+    Merged busy intervals per user within [start, end): {user_id: [(s, e)]}.
+
+    Busy time is every meeting the user organizes or attends (recurring ones
+    expanded for the window), every custom event with an end, and
+    `task_minutes` before the end of the due day of each task assigned to
+    them (0 leaves tasks out). One-off rows for all users come from three
+    indexed queries; recurring series come from the occurrence cache.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    raw = {user_id: [] for user_id in user_ids}
+    if not user_ids:
+        return {}
+
+    def add(user_id, s, e):
+        s, e = max(s, start), min(e, end)
+        if s < e:
+            raw[user_id].append((s, e))
+
+    organized = (
+        select(Meeting.organizer_id.label("user_id"), Meeting.date_time, Meeting.duration)
+        .where(Meeting.organizer_id.in_(user_ids), single_meeting_overlap(start, end))
+    )
+    attended = (
+        select(Participant.user_id, Meeting.date_time, Meeting.duration)
+        .join(Meeting, Meeting.meeting_id == Participant.meeting_id)
+        .where(Participant.user_id.in_(user_ids), single_meeting_overlap(start, end))
+    )
+    for user_id, date_time, duration in db.session.execute(union_all(organized, attended)):
+        add(user_id, date_time, date_time + (duration or DEFAULT_MEETING_DURATION))
+
+    events = db.session.execute(
+        select(CalendarEvent.user_id, CalendarEvent.start_date, CalendarEvent.end_date)
+        .where(CalendarEvent.user_id.in_(user_ids), single_custom_event_overlap(start, end))
+    )
+    for user_id, s, e in events:
+        if e is not None:
+            add(user_id, s, e)
+
+    if task_minutes:
+        block = timedelta(minutes=task_minutes)
+        tasks = db.session.execute(
+            select(ActionItem.assigned_to, ActionItem.due_date)
+            .where(
+                ActionItem.assigned_to.in_(user_ids),
+                ActionItem.due_date >= start.date(),
+                ActionItem.due_date <= (end - timedelta(microseconds=1)).date()
+            )
+        )
+        for user_id, due_date in tasks:
+            day_end = datetime.combine(due_date, time()) + timedelta(days=1)
+            add(user_id, day_end - block, day_end)
+
+    recurring = occurrence_cache.occurrences_for_users(user_ids, start, end)
+    for user_id, occurrences in recurring.items():
+        for occurrence in occurrences:
+            add(user_id, occurrence.start, occurrence.end)
+
+    return {user_id: merge_intervals(intervals) for user_id, intervals in raw.items()}
+
+
+def free_slots(busy, start, end, duration, step=timedelta(minutes=30),
+               day_start=time(9), day_end=time(17), weekdays_only=True, limit=10):
+    """
+    Up to `limit` [s, s + duration) slots in [start, end) that fall inside
+    working hours and overlap no interval of `busy` (sorted, disjoint).
+    Slot starts are aligned to `step` from midnight.
+
+    Walks the working-hours windows and the busy list together, so the
+    cost is linear in the number of days and busy intervals.
+    """
+    slots = []
+    i = 0
+    step_seconds = int(step.total_seconds())
+    day = start.date()
+    while day <= end.date() and len(slots) < limit:
+        if weekdays_only and day.weekday() >= 5:
+            day += timedelta(days=1)
+            continue
+        midnight = datetime.combine(day, time())
+        window_start = max(start, datetime.combine(day, day_start))
+        window_end = min(end, datetime.combine(day, day_end))
+        # Align to the step grid
+        offset = int((window_start - midnight).total_seconds())
+        candidate = midnight + timedelta(seconds=-(-offset // step_seconds) * step_seconds)
+
+        while candidate + duration <= window_end and len(slots) < limit:
+            while i < len(busy) and busy[i][1] <= candidate:
+                i += 1
+            if i < len(busy) and busy[i][0] < candidate + duration:
+                # Jump past the blocking interval, back onto the grid
+                offset = int((busy[i][1] - midnight).total_seconds())
+                candidate = midnight + timedelta(seconds=-(-offset // step_seconds) * step_seconds)
+                continue
+            slots.append((candidate, candidate + duration))
+            candidate += step
+        day += timedelta(days=1)
+    return slots
+
+
+def conflicts(user_id, start, end, task_minutes=60):
+    """
+    The user's merged busy intervals overlapping [start, end).
+    """
+    return busy_intervals([user_id], start, end, task_minutes)[user_id]
+
+
+def visible_user_ids(viewer_id, user_ids):
+    """
+    The subset of user_ids whose availability viewer_id may see: themselves
+    and active members of an organization they are an active member of.
+    """
+    my_orgs = select(OrganizationMember.org_id).where(
+        OrganizationMember.user_id == viewer_id, OrganizationMember.status == "active"
+    )
+    rows = db.session.execute(
+        select(OrganizationMember.user_id).where(
+            OrganizationMember.org_id.in_(my_orgs),
+            OrganizationMember.status == "active",
+            OrganizationMember.user_id.in_(list(user_ids))
+        )
+    )
+    return {row.user_id for row in rows} | ({viewer_id} & set(user_ids))
@@ -0,0 +1,289 @@
+# app/calendar/occurrences.py
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, select
+
+from app.calendar.feed import DEFAULT_MEETING_DURATION, single_custom_event_overlap
+from app.calendar.recurrence import RecurrenceRule
+from app.config import Config
+from app.extensions import db
+from app.models import CalendarEvent, Meeting, Participant
+
+
+class Occurrence:
+    """
+    One generated instance of a recurring meeting ("meeting") or custom
+    event ("custom"), or a one-off custom event.
+    """
+
+    __slots__ = ("kind", "source_id", "title", "start", "end")
+
+    def __init__(self, kind, source_id, title, start, end):
+        self.kind = kind
+        self.source_id = source_id
+        self.title = title
+        self.start = start
+        self.end = end
+
+
+class _SeriesRule:
+    __slots__ = ("kind", "source_id", "title", "dtstart", "duration", "rule")
+
+    def __init__(self, kind, source_id, title, dtstart, duration, rule):
+        self.kind = kind
+        self.source_id = source_id
+        self.title = title
+        self.dtstart = dtstart
+        self.duration = duration
+        self.rule = rule
+
+    def between(self, start, end, limit):
+        for occurrence in self.rule.between(self.dtstart, start, end, self.duration, limit):
+            yield Occurrence(self.kind, self.source_id, self.title, occurrence, occurrence + self.duration)
+
+
+class _UserEntry:
+    __slots__ = ("expires_at", "rules", "meeting_ids", "windows")
+
+    def __init__(self, expires_at, rules):
+        self.expires_at = expires_at
+        self.rules = rules
+        self.meeting_ids = {r.source_id for r in rules if r.kind == "meeting"}
+        self.windows = OrderedDict()  # (start, end) -> [Occurrence]
+
+
+class OccurrenceCache:
+    """
+    Per-user cache of recurring series and their expanded occurrences.
+
+    - A user's recurring meetings (organized or attended) and custom events
+      are loaded once, in three queries, as parsed rules: storage and loading
+      cost follow the number of rules, not of occurrences.
+    - Occurrences are generated only for the window asked for, and the last
+      `max_windows` windows per user are kept (calendar navigation goes
+      back and forth over the same months).
+    - At most `max_users` users are kept (least recently used go first).
+      Entries are dropped when a meeting, participant or event affecting
+      the user changes in this process, and expire after `ttl` seconds for
+      changes made by other processes.
+    """
+
+    def __init__(self, ttl=300, max_users=1000, max_windows=8, max_occurrences=1000):
+        self.ttl = ttl
+        self.max_users = max_users
+        self.max_windows = max_windows
+        self.max_occurrences = max_occurrences
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entries_for(self, user_ids):
+        """
+        Cache entries for the users; the series of all users not cached are
+        loaded together.
+        """
+        now = time.monotonic()
+        entries, missing = {}, []
+        with self._lock:
+            for user_id in user_ids:
+                entry = self._entries.get(user_id)
+                if entry is not None and entry.expires_at >= now:
+                    self._entries.move_to_end(user_id)
+                    entries[user_id] = entry
+                else:
+                    missing.append(user_id)
+        if missing:
+            loaded = load_series_for_users(missing)
+            with self._lock:
+                for user_id in missing:
+                    entry = entries[user_id] = _UserEntry(now + self.ttl, loaded[user_id])
+                    self._entries[user_id] = entry
+                    self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_users:
+                    self._entries.popitem(last=False)
+        return entries
+
+    def _expand(self, entry, start, end):
+        key = (start, end)
+        with self._lock:
+            cached = entry.windows.get(key)
+            if cached is not None:
+                entry.windows.move_to_end(key)
+                return cached
+
+        occurrences = sorted(
+            (o for series in entry.rules for o in series.between(start, end, self.max_occurrences)),
+            key=lambda o: o.start
+        )
+        with self._lock:
+            entry.windows[key] = occurrences
+            while len(entry.windows) > self.max_windows:
+                entry.windows.popitem(last=False)
+        return occurrences
+
+    def occurrences(self, user_id, start=None, end=None):
+        """
+        Occurrences of the user's recurring meetings and custom events that
+        overlap [start, end), sorted by start. An open end stops
+        RECURRENCE_HORIZON_DAYS from now.
+        """
+        return self.occurrences_for_users([user_id], start, end)[user_id]
+
+    def occurrences_for_users(self, user_ids, start=None, end=None):
+        """
+        occurrences() for several users: {user_id: [Occurrence]}. Users not
+        cached yet cost three queries together, not per user.
+        """
+        if end is None:
+            end = datetime.utcnow() + timedelta(days=Config.RECURRENCE_HORIZON_DAYS)
+        entries = self._entries_for(user_ids)
+        return {user_id: self._expand(entries[user_id], start, end) for user_id in user_ids}
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def invalidate_meeting(self, meeting_id):
+        with self._lock:
+            for user_id in [u for u, e in self._entries.items() if meeting_id in e.meeting_ids]:
+                del self._entries[user_id]
+
+
+def load_series_for_users(user_ids):
+    """
+    Each user's recurring meetings (organized or attended) and custom
+    events as parsed rules, in three queries: {user_id: [series]}. Rows
+    whose rule no longer parses are left out.
+    """
+    series = {user_id: [] for user_id in user_ids}
+    if not series:
+        return series
+    ids = list(series)
+
+    recurring = Meeting.recurrence_rule.isnot(None)
+    rows = db.session.query(Meeting.organizer_id, Meeting).filter(Meeting.organizer_id.in_(ids), recurring).all()
+    rows += (
+        db.session.query(Participant.user_id, Meeting)
+        .join(Meeting, Meeting.meeting_id == Participant.meeting_id)
+        .filter(Participant.user_id.in_(ids), recurring)
+        .all()
+    )
+    meeting_series = {}
+    seen = set()
+    for user_id, meeting in rows:
+        if (user_id, meeting.meeting_id) in seen:
+            continue
+        seen.add((user_id, meeting.meeting_id))
+        if meeting.meeting_id not in meeting_series:
+            rule = _parse_stored(meeting.recurrence_rule)
+            meeting_series[meeting.meeting_id] = rule and _SeriesRule(
+                "meeting", meeting.meeting_id, meeting.title, meeting.date_time,
+                meeting.duration or DEFAULT_MEETING_DURATION, rule
+            )
+        if meeting_series[meeting.meeting_id] is not None:
+            series[user_id].append(meeting_series[meeting.meeting_id])
+
+    events = CalendarEvent.query.filter(CalendarEvent.user_id.in_(ids), CalendarEvent.recurrence_rule.isnot(None)).all()
+    for ce in events:
+        rule = _parse_stored(ce.recurrence_rule)
+        if rule is not None:
+            series[ce.user_id].append(_SeriesRule("custom", ce.event_id, ce.title, ce.start_date, _series_duration(ce), rule))
+    return series
+
+
+def _parse_stored(text):
+    try:
+        return RecurrenceRule.parse(text)
+    except ValueError:
+        return None
+
+
+occurrence_cache = OccurrenceCache(
+    ttl=Config.RECURRENCE_CACHE_TTL,
+    max_users=Config.RECURRENCE_CACHE_USERS,
+    max_windows=Config.RECURRENCE_CACHE_WINDOWS,
+    max_occurrences=Config.RECURRENCE_MAX_OCCURRENCES
+)
+
+
+def custom_events_for_users(user_ids, start, end):
+    """
+    Custom events of several users overlapping [start, end): one-off
+    events from one query, recurring ones expanded from each user's cached
+    rules. Returns {user_id: [Occurrence]}.
+    """
+    by_user = {user_id: [] for user_id in user_ids}
+    if not by_user:
+        return by_user
+    singles = CalendarEvent.query.filter(
+        CalendarEvent.user_id.in_(list(by_user)), single_custom_event_overlap(start, end)
+    ).all()
+    for ce in singles:
+        by_user[ce.user_id].append(Occurrence("custom", ce.event_id, ce.title, ce.start_date, ce.end_date or ce.start_date))
+    recurring = occurrence_cache.occurrences_for_users(list(by_user), start, end)
+    for user_id, occurrences in by_user.items():
+        occurrences.extend(o for o in recurring[user_id] if o.kind == "custom")
+        occurrences.sort(key=lambda o: o.start)
+    return by_user
+
+
+# ---------------------------------------------------------------------------
+# Keep recurrence_until in sync and the cache fresh
+# ---------------------------------------------------------------------------
+
+def _series_duration(target):
+    if isinstance(target, Meeting):
+        return target.duration or DEFAULT_MEETING_DURATION
+    if target.end_date and target.end_date > target.start_date:
+        return target.end_date - target.start_date
+    return timedelta(0)
+
+
+@event.listens_for(Meeting, "before_insert")
+@event.listens_for(Meeting, "before_update")
+@event.listens_for(CalendarEvent, "before_insert")
+@event.listens_for(CalendarEvent, "before_update")
+def _set_recurrence_until(mapper, connection, target):
+    dtstart = target.date_time if isinstance(target, Meeting) else target.start_date
+    rule = _parse_stored(target.recurrence_rule) if target.recurrence_rule else None
+    if rule is None or dtstart is None:
+        target.recurrence_until = None
+        return
+    last = rule.last_start(dtstart)
+    duration = _series_duration(target)
+    # A series ending at the edge of the datetime range is stored as open
+    if last is None or last > datetime.max - duration:
+        target.recurrence_until = None
+    else:
+        target.recurrence_until = last + duration
+
+
+@event.listens_for(Meeting, "after_insert")
+@event.listens_for(Meeting, "after_update")
+@event.listens_for(Meeting, "after_delete")
+def _invalidate_meeting(mapper, connection, target):
+    """
+    Drop the cache of everyone the meeting can appear for: the organizer,
+    users already holding it as a series and its current participants (a
+    one-off meeting made recurring is in no series yet).
+    """
+    occurrence_cache.invalidate_meeting(target.meeting_id)
+    occurrence_cache.invalidate(target.organizer_id)
+    participants = connection.execute(
+        select(Participant.user_id).where(Participant.meeting_id == target.meeting_id)
+    )
+    for (user_id,) in participants:
+        occurrence_cache.invalidate(user_id)
+
+
+@event.listens_for(Participant, "after_insert")
+@event.listens_for(Participant, "after_update")
+@event.listens_for(Participant, "after_delete")
+@event.listens_for(CalendarEvent, "after_insert")
+@event.listens_for(CalendarEvent, "after_update")
+@event.listens_for(CalendarEvent, "after_delete")
+def _invalidate_user(mapper, connection, target):
+    occurrence_cache.invalidate(target.user_id)
@@ -0,0 +1,254 @@
+# app/calendar/recurrence.py
+
+import calendar as _calendar
+from datetime import datetime, timedelta
+
+from app.config import Config
+
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+# Largest INTERVAL per frequency: about a century between occurrences
+MAX_INTERVAL = {"DAILY": 36525, "WEEKLY": 5218, "MONTHLY": 1200, "YEARLY": 100}
+
+
+class InvalidRecurrence(ValueError):
+    """
+    Raised for a recurrence rule outside the supported RRULE subset.
+    """
+
+
+class RecurrenceRule:
+    """
+    The subset of RFC 5545 RRULE the calendar supports:
+
+        FREQ=DAILY|WEEKLY|MONTHLY|YEARLY   (required)
+        INTERVAL=n                         every n-th period (default 1)
+        COUNT=n or UNTIL=YYYYMMDD[THHMMSS[Z]]
+        BYDAY=MO,WE,FR                     WEEKLY only
+        BYMONTHDAY=1,15,-1                 MONTHLY only (-1 = last day)
+
+    Occurrences keep the time of day of the first start (dtstart). Times are
+    naive UTC like every stored timestamp. Dates that do not exist in a
+    period (the 31st in a 30-day month, 29 February) are skipped. COUNT is
+    capped at RECURRENCE_MAX_OCCURRENCES and INTERVAL at about a century.
+    """
+
+    __slots__ = ("freq", "interval", "count", "until", "by_day", "by_month_day")
+
+    def __init__(self, freq, interval=1, count=None, until=None, by_day=None, by_month_day=None):
+        self.freq = freq
+        self.interval = interval
+        self.count = count
+        self.until = until
+        self.by_day = by_day
+        self.by_month_day = by_month_day
+
+    @classmethod
+    def parse(cls, text):
+        """
+        Parse "FREQ=WEEKLY;BYDAY=MO,TH;COUNT=10" (an "RRULE:" prefix is
+        allowed). Raises InvalidRecurrence.
+        """
+        text = (text or "").strip()
+        if text.upper().startswith("RRULE:"):
+            text = text[6:]
+        parts = {}
+        for part in filter(None, text.upper().split(";")):
+            name, sep, value = part.partition("=")
+            if not sep or not value or name in parts:
+                raise InvalidRecurrence(f"Malformed rule part: {part}")
+            parts[name] = value
+
+        unknown = set(parts) - {"FREQ", "INTERVAL", "COUNT", "UNTIL", "BYDAY", "BYMONTHDAY"}
+        if unknown:
+            raise InvalidRecurrence(f"Unsupported rule parts: {', '.join(sorted(unknown))}")
+        freq = parts.get("FREQ")
+        if freq not in FREQUENCIES:
+            raise InvalidRecurrence("FREQ must be DAILY, WEEKLY, MONTHLY or YEARLY")
+        if "COUNT" in parts and "UNTIL" in parts:
+            raise InvalidRecurrence("COUNT and UNTIL cannot be combined")
+
+        try:
+            interval = int(parts.get("INTERVAL", "1"))
+            count = int(parts["COUNT"]) if "COUNT" in parts else None
+        except ValueError:
+            raise InvalidRecurrence("INTERVAL and COUNT must be integers")
+        if interval < 1 or (count is not None and count < 1):
+            raise InvalidRecurrence("INTERVAL and COUNT must be positive")
+        if interval > MAX_INTERVAL[freq]:
+            raise InvalidRecurrence(f"INTERVAL can be at most {MAX_INTERVAL[freq]} with FREQ={freq}")
+        if count is not None and count > Config.RECURRENCE_MAX_OCCURRENCES:
+            raise InvalidRecurrence(f"COUNT can be at most {Config.RECURRENCE_MAX_OCCURRENCES}")
+
+        until = _parse_until(parts["UNTIL"]) if "UNTIL" in parts else None
+
+        by_day = None
+        if "BYDAY" in parts:
+            if freq != "WEEKLY":
+                raise InvalidRecurrence("BYDAY is only supported with FREQ=WEEKLY")
+            days = parts["BYDAY"].split(",")
+            if any(day not in WEEKDAYS for day in days):
+                raise InvalidRecurrence("BYDAY takes MO, TU, WE, TH, FR, SA, SU")
+            by_day = tuple(sorted({WEEKDAYS.index(day) for day in days}))
+
+        by_month_day = None
+        if "BYMONTHDAY" in parts:
+            if freq != "MONTHLY":
+                raise InvalidRecurrence("BYMONTHDAY is only supported with FREQ=MONTHLY")
+            try:
+                by_month_day = tuple(int(day) for day in parts["BYMONTHDAY"].split(","))
+            except ValueError:
+                raise InvalidRecurrence("BYMONTHDAY takes day numbers")
+            if any(day == 0 or not -31 <= day <= 31 for day in by_month_day):
+                raise InvalidRecurrence("BYMONTHDAY days are 1..31 or -31..-1")
+
+        return cls(freq, interval, count, until, by_day, by_month_day)
+
+    def __str__(self):
+        parts = [f"FREQ={self.freq}"]
+        if self.interval != 1:
+            parts.append(f"INTERVAL={self.interval}")
+        if self.by_day:
+            parts.append("BYDAY=" + ",".join(WEEKDAYS[d] for d in self.by_day))
+        if self.by_month_day:
+            parts.append("BYMONTHDAY=" + ",".join(str(d) for d in self.by_month_day))
+        if self.count is not None:
+            parts.append(f"COUNT={self.count}")
+        if self.until is not None:
+            parts.append("UNTIL=" + self.until.strftime("%Y%m%dT%H%M%SZ"))
+        return ";".join(parts)
+
+    # ------------------------------------------------------------------
+    # Expansion
+    # ------------------------------------------------------------------
+
+    def _period(self, dtstart, k):
+        """
+        Sorted occurrence starts of the k-th period (0 = the one holding
+        dtstart), before COUNT/UNTIL are applied. Raises OverflowError or
+        ValueError once the period is past datetime.max.
+        """
+        if self.freq == "DAILY":
+            return [dtstart + timedelta(days=k * self.interval)]
+        if self.freq == "WEEKLY":
+            week_start = dtstart - timedelta(days=dtstart.weekday()) + timedelta(weeks=k * self.interval)
+            days = self.by_day or (dtstart.weekday(),)
+            return [week_start + timedelta(days=d) for d in days if week_start + timedelta(days=d) >= dtstart]
+        if self.freq == "MONTHLY":
+            year, month = divmod(dtstart.year * 12 + dtstart.month - 1 + k * self.interval, 12)
+            month += 1
+            month_days = _calendar.monthrange(year, month)[1]
+            wanted = self.by_month_day or (dtstart.day,)
+            days = sorted({d if d > 0 else month_days + 1 + d for d in wanted if abs(d) <= month_days})
+            starts = [dtstart.replace(year=year, month=month, day=d) for d in days]
+            return [s for s in starts if s >= dtstart]
+        year = dtstart.year + k * self.interval
+        if dtstart.month == 2 and dtstart.day == 29 and not _calendar.isleap(year):
+            return []
+        return [dtstart.replace(year=year)]
+
+    def _first_period(self, dtstart, not_before):
+        """
+        Index of the first period that can hold a start >= not_before,
+        computed rather than iterated so far-off windows cost the same as
+        near ones. Returns (period index, occurrences in earlier periods).
+        """
+        if not_before <= dtstart:
+            return 0, 0
+        if self.freq == "DAILY":
+            k = (not_before - dtstart).days // self.interval
+            return k, k
+        if self.freq == "WEEKLY":
+            week_start = dtstart - timedelta(days=dtstart.weekday())
+            k = (not_before - week_start).days // (7 * self.interval)
+            if k == 0:
+                return 0, 0
+            per_week = len(self.by_day or (dtstart.weekday(),))
+            return k, len(self._period(dtstart, 0)) + (k - 1) * per_week
+        if self.count is not None:
+            # Monthly/yearly periods can be empty; COUNT bounds the walk anyway
+            return 0, 0
+        if self.freq == "MONTHLY":
+            months = (not_before.year - dtstart.year) * 12 + not_before.month - dtstart.month
+            return max(0, months // self.interval), None
+        return max(0, (not_before.year - dtstart.year) // self.interval), None
+
+    def between(self, dtstart, start, end, duration=timedelta(0), limit=1000):
+        """
+        Yield the occurrence starts whose span [s, s + duration) overlaps
+        [start, end), in order, at most `limit` of them. Either bound may be
+        None. Only the periods inside the window are generated, and the
+        expansion stops at the end of the datetime range.
+        """
+        not_before = dtstart
+        if start is not None and start - datetime.min > duration:
+            not_before = max(dtstart, start - duration)
+        k, seen = self._first_period(dtstart, not_before)
+        yielded = 0
+        empty_periods = 0
+        while yielded < limit:
+            try:
+                occurrences = self._period(dtstart, k)
+            except (OverflowError, ValueError):
+                return
+            k += 1
+            if not occurrences:
+                # An impossible BYMONTHDAY or 29 February yearly rule never matches
+                empty_periods += 1
+                if empty_periods > 48:
+                    return
+                continue
+            empty_periods = 0
+            for occurrence in occurrences:
+                if seen is not None:
+                    seen += 1
+                    if self.count is not None and seen > self.count:
+                        return
+                if self.until is not None and occurrence > self.until:
+                    return
+                if end is not None and occurrence >= end:
+                    return
+                if occurrence > datetime.max - duration:
+                    return
+                if start is None or occurrence + duration > start or (duration == timedelta(0) and occurrence >= start):
+                    yield occurrence
+                    yielded += 1
+                    if yielded >= limit:
+                        return
+
+    def last_start(self, dtstart):
+        """
+        Upper bound for the start of the final occurrence, or None if the
+        rule repeats forever. Used to skip finished rules in SQL.
+        """
+        if self.until is not None:
+            return self.until
+        if self.count is not None:
+            last = dtstart
+            for last in self.between(dtstart, None, None, limit=self.count):
+                pass
+            return last
+        return None
+
+
+def _parse_until(value):
+    for fmt in ("%Y%m%dT%H%M%SZ", "%Y%m%dT%H%M%S", "%Y%m%d"):
+        try:
+            until = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        if fmt != "%Y%m%d":
+            return until
+        # A date-only UNTIL includes that whole day
+        return until.replace(hour=23, minute=59, second=59, microsecond=999999)
+    raise InvalidRecurrence(f"UNTIL must be YYYYMMDD or YYYYMMDDTHHMMSSZ, not {value}")
+
+
+def parse_rule(text):
+    """
+    Normalised rule string for a form value, or None for an empty one.
+    Raises InvalidRecurrence.
+    """
+    if not (text or "").strip():
+        return None
+    return str(RecurrenceRule.parse(text))
@@ -13,6 +13,13 @@ from app.config import Config
 from flask_login import current_user
 from app.models import ActionItem, User, Meeting, TaskComment, CalendarEvent
 from app.extensions import db
+from app.calendar.feed import (
+    parse_range_param, feed_etag, meeting_end,
+    meetings_in_range, tasks_due_in_range, custom_events_in_range
+)
+from app.calendar.occurrences import occurrence_cache
+from app.calendar.recurrence import InvalidRecurrence, parse_rule
+from app.calendar.freebusy import busy_intervals, free_slots, merge_intervals, visible_user_ids
 from datetime import datetime
 
 
@@ -30,34 +37,53 @@ def calendar_view():
 @calendar_bp.route("/events")
 @login_required
 def get_events():
-    """ Return all calendar events for the logged-in user. """
-    meetings = Meeting.query.filter(Meeting.organizer_id == current_user.user_id).all()
-    tasks = ActionItem.query.filter(ActionItem.assigned_to == current_user.user_id).all()
-    custom_events = CalendarEvent.query.filter_by(user_id=current_user.user_id).all()
-
+    """
+    Return the logged-in user's calendar events in the FullCalendar
+    `start`/`end` range (both optional): meetings they organize or attend,
+    tasks due and custom events. Carries a weak ETag; an unchanged range
+    is answered with 304 without loading any rows.
+    """
+    try:
+        start = parse_range_param(request.args.get("start"))
+        end = parse_range_param(request.args.get("end"))
+    except ValueError:
+        return jsonify({"error": "Invalid start or end"}), 400
+
+    user_id = current_user.user_id
+    etag = feed_etag(user_id, start, end)
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = jsonify(calendar_events_json(user_id, start, end))
+    response.set_etag(etag, weak=True)
+    # Revalidate on every navigation instead of serving a stale range
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def calendar_events_json(user_id, start=None, end=None):
     events = []
 
-    for meeting in meetings:
+    for meeting in meetings_in_range(user_id, start, end):
         events.append({
             "id": f"meeting-{meeting.meeting_id}",
             "title": meeting.title,
             "start": meeting.date_time.isoformat(),
-            "end": (meeting.date_time + (meeting.duration or timedelta(hours=1))).isoformat(),
+            "end": meeting_end(meeting).isoformat(),
             "color": "blue",
             "url": url_for("meeting_bp.meeting_details", meeting_id=meeting.meeting_id)
         })
 
-    for task in tasks:
-        if task.due_date:
-            events.append({
-                "id": f"task-{task.action_item_id}",
-                "title": task.description,
-                "start": task.due_date.isoformat(),
-                "color": "red",
-                "url": url_for("task_bp.edit_task", task_id=task.action_item_id)
-            })
-
-    for event in custom_events:
+    for task in tasks_due_in_range(user_id, start, end):
+        events.append({
+            "id": f"task-{task.action_item_id}",
+            "title": task.description,
+            "start": task.due_date.isoformat(),
+            "color": "red",
+            "url": url_for("task_bp.edit_task", task_id=task.action_item_id)
+        })
+
+    for event in custom_events_in_range(user_id, start, end):
         events.append({
             "id": f"custom-{event.event_id}",
             "title": event.title,
@@ -66,7 +92,81 @@ def get_events():
             "color": "green",
         })
 
-    return jsonify(events)
+    # Recurring meetings and events, generated for this range only
+    for occurrence in occurrence_cache.occurrences(user_id, start, end):
+        stamp = occurrence.start.strftime("%Y%m%dT%H%M%S")
+        item = {
+            "id": f"{occurrence.kind}-{occurrence.source_id}-{stamp}",
+            "groupId": f"{occurrence.kind}-{occurrence.source_id}",
+            "title": occurrence.title,
+            "start": occurrence.start.isoformat(),
+            "end": occurrence.end.isoformat(),
+        }
+        if occurrence.kind == "meeting":
+            item["color"] = "blue"
+            item["url"] = url_for("meeting_bp.meeting_details", meeting_id=occurrence.source_id)
+        else:
+            item["color"] = "green"
+        events.append(item)
+
+    return events
+
+
+@calendar_bp.route("/freebusy")
+@login_required
+def freebusy():
+    """
+    Availability of several users and candidate meeting slots.
+
+    GET /calendar/freebusy?users=3,7,12&start=...&end=...&duration=30&limit=10
+    Optional day_start/day_end ("HH:MM", UTC) override the working hours.
+    Users must share an active organization with the caller.
+    """
+    try:
+        user_ids = [int(u) for u in request.args.get("users", "").split(",") if u.strip()]
+        start = parse_range_param(request.args.get("start"))
+        end = parse_range_param(request.args.get("end"))
+        duration = timedelta(minutes=request.args.get("duration", 30, type=int))
+        limit = min(request.args.get("limit", 10, type=int), 100)
+        day_start = datetime.strptime(request.args.get("day_start", Config.FREEBUSY_DAY_START), "%H:%M").time()
+        day_end = datetime.strptime(request.args.get("day_end", Config.FREEBUSY_DAY_END), "%H:%M").time()
+    except ValueError:
+        return jsonify({"error": "Invalid users, start, end, duration or working hours"}), 400
+
+    if not user_ids:
+        user_ids = [current_user.user_id]
+    if start is None:
+        start = datetime.utcnow()
+    if end is None:
+        end = start + timedelta(days=7)
+    if end <= start or duration <= timedelta(0):
+        return jsonify({"error": "end must be after start and duration positive"}), 400
+    if end - start > timedelta(days=Config.FREEBUSY_MAX_DAYS) or len(user_ids) > Config.FREEBUSY_MAX_USERS:
+        return jsonify({"error": f"At most {Config.FREEBUSY_MAX_USERS} users over {Config.FREEBUSY_MAX_DAYS} days"}), 400
+
+    hidden = set(user_ids) - visible_user_ids(current_user.user_id, user_ids)
+    if hidden:
+        return jsonify({"error": f"Not allowed to view availability of users {sorted(hidden)}"}), 403
+
+    busy = busy_intervals(user_ids, start, end, Config.FREEBUSY_TASK_MINUTES)
+    combined = merge_intervals(interval for intervals in busy.values() for interval in intervals)
+    slots = free_slots(
+        combined, start, end, duration,
+        step=timedelta(minutes=Config.FREEBUSY_SLOT_STEP_MINUTES),
+        day_start=day_start, day_end=day_end,
+        weekdays_only=Config.FREEBUSY_WEEKDAYS_ONLY, limit=limit
+    )
+
+    def as_json(intervals):
+        return [{"start": s.isoformat(), "end": e.isoformat()} for s, e in intervals]
+
+    return jsonify({
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "busy": {str(user_id): as_json(intervals) for user_id, intervals in busy.items()},
+        "combined_busy": as_json(combined),
+        "slots": as_json(slots),
+    })
 
 
 @calendar_bp.route("/events/new", methods=["POST"])
@@ -78,13 +178,18 @@ def create_event():
     event_type = data.get("event_type")
     start_date = datetime.strptime(data.get("start_date"), "%Y-%m-%dT%H:%M:%S")
     end_date = datetime.strptime(data.get("end_date"), "%Y-%m-%dT%H:%M:%S") if data.get("end_date") else None
+    try:
+        recurrence_rule = parse_rule(data.get("recurrence_rule"))
+    except InvalidRecurrence as e:
+        return jsonify({"error": f"Invalid repeat rule: {e}"}), 400
 
     event = CalendarEvent(
         title=title,
         event_type=event_type,
         start_date=start_date,
         end_date=end_date,
-        user_id=current_user.user_id
+        user_id=current_user.user_id,
+        recurrence_rule=recurrence_rule
     )
     db.session.add(event)
     db.session.commit()
@@ -1,14 +1,13 @@
 # app/chat/routes.py
 
 from flask import Blueprint, request, jsonify
-import os
 from werkzeug.utils import secure_filename
 from flask_login import current_user
 from app.models import ChatFile, db
+from app.storage import store_upload
 
 chat_bp = Blueprint("chat", __name__)
 
-UPLOAD_FOLDER = "app/static/uploads/documents"
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf', 'docx', 'xlsx'}
 
 def allowed_file(filename):
@@ -25,10 +24,8 @@ def upload_file():
 
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
-        file_path = os.path.join(UPLOAD_FOLDER, filename)
-        
-        os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-        file.save(file_path)
+        # Stored by content hash; the original name is kept for display
+        blob = store_upload(file)
 
         user = current_user if current_user.is_authenticated else None
         username = user.username if user else "Anonymous"
@@ -38,7 +35,8 @@ def upload_file():
             user_id=user.user_id if user else None,
             username=username,
             filename=filename,
-            file_url=f"/static/uploads/documents/{filename}"
+            file_url=blob.url,
+            blob_sha256=blob.sha256
         )
         db.session.add(chat_file)
         db.session.commit()
@@ -46,7 +44,7 @@ def upload_file():
         return jsonify({
             "success": True,
             "filename": filename,
-            "file_url": f"/static/uploads/documents/{filename}"
+            "file_url": blob.url
         })
 
     return jsonify({"error": "Invalid file type"}), 400
\ No newline at end of file
@@ -27,3 +27,89 @@ class Config:
     MAIL_USERNAME = os.environ.get("MAIL_USERNAME", "")
     MAIL_PASSWORD = os.environ.get("MAIL_PASSWORD", "")
     MAIL_DEFAULT_SENDER = os.environ.get("MAIL_DEFAULT_SENDER", "")
+
+    # Agent conversation memory (per meeting thread)
+    AGENT_MEMORY_WINDOW = int(os.environ.get("AGENT_MEMORY_WINDOW", "12"))
+    AGENT_MEMORY_SUMMARY_WORDS = int(os.environ.get("AGENT_MEMORY_SUMMARY_WORDS", "250"))
+    AGENT_CHECKPOINTS_PER_THREAD = int(os.environ.get("AGENT_CHECKPOINTS_PER_THREAD", "20"))
+    AGENT_COMPACT_EVERY = int(os.environ.get("AGENT_COMPACT_EVERY", "10"))
+
+    # Agent checkpointer: path to a SQLite file, or "main" to use SQLALCHEMY_DATABASE_URI
+    AGENT_CHECKPOINT_DB = os.environ.get("AGENT_CHECKPOINT_DB", "app/agent/chat_memory.sqlite")
+    AGENT_CHECKPOINT_POOL_SIZE = int(os.environ.get("AGENT_CHECKPOINT_POOL_SIZE", "4"))
+
+    # Stream agent chat answers token by token over the /agent namespace
+    AGENT_STREAM_RESPONSES = os.environ.get("AGENT_STREAM_RESPONSES", "true").lower() == "true"
+
+    # Parallel agenda / invitation / recommendations generation
+    AGENT_FANOUT_WORKERS = int(os.environ.get("AGENT_FANOUT_WORKERS", "8"))
+    AGENT_SECTION_TIMEOUT = float(os.environ.get("AGENT_SECTION_TIMEOUT", "60"))
+    AGENT_HEDGE_MODEL_ID = os.environ.get("AGENT_HEDGE_MODEL_ID", "")  # empty disables hedging
+    AGENT_HEDGE_AFTER = float(os.environ.get("AGENT_HEDGE_AFTER", "20"))
+
+    # Transcript autocorrect pipeline
+    AUTOCORRECT_CHUNK_CHARS = int(os.environ.get("AUTOCORRECT_CHUNK_CHARS", "1200"))
+    AUTOCORRECT_MAX_WORKERS = int(os.environ.get("AUTOCORRECT_MAX_WORKERS", "4"))
+
+    # Repair re-prompts allowed when a model returns unusable JSON
+    STRUCTURED_OUTPUT_MAX_REPAIRS = int(os.environ.get("STRUCTURED_OUTPUT_MAX_REPAIRS", "1"))
+
+    # Incremental task extraction: similarity above which a task is a duplicate
+    TASK_DEDUPE_THRESHOLD = float(os.environ.get("TASK_DEDUPE_THRESHOLD", "0.85"))
+
+    # Outbound mail queue (drained in the background, one SMTP connection per batch)
+    MAIL_QUEUE_BATCH_SIZE = int(os.environ.get("MAIL_QUEUE_BATCH_SIZE", "50"))
+    MAIL_QUEUE_POLL_SECONDS = float(os.environ.get("MAIL_QUEUE_POLL_SECONDS", "10"))
+    MAIL_QUEUE_MAX_ATTEMPTS = int(os.environ.get("MAIL_QUEUE_MAX_ATTEMPTS", "5"))
+    MAIL_QUEUE_BACKOFF_SECONDS = float(os.environ.get("MAIL_QUEUE_BACKOFF_SECONDS", "30"))
+
+    # Password hashing (bcrypt on a native thread pool, off the eventlet hub)
+    BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", "12"))
+    PASSWORD_HASH_THREADS = int(os.environ.get("PASSWORD_HASH_THREADS", "4"))
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get("PASSWORD_HASH_MAX_PENDING", "64"))
+
+    # Cached login principal (id, username, role, avatar) used by current_user
+    AUTH_PRINCIPAL_TTL = float(os.environ.get("AUTH_PRINCIPAL_TTL", "30"))
+    AUTH_PRINCIPAL_CACHE_SIZE = int(os.environ.get("AUTH_PRINCIPAL_CACHE_SIZE", "10000"))
+
+    # Chat write-behind: broadcast first, store messages in batched INSERTs
+    CHAT_WRITE_BEHIND = os.environ.get("CHAT_WRITE_BEHIND", "false").lower() == "true"
+    CHAT_WRITE_BATCH_SIZE = int(os.environ.get("CHAT_WRITE_BATCH_SIZE", "100"))
+    CHAT_WRITE_FLUSH_MS = int(os.environ.get("CHAT_WRITE_FLUSH_MS", "200"))
+    CHAT_WRITE_MAX_RETRIES = int(os.environ.get("CHAT_WRITE_MAX_RETRIES", "3"))  # then row by row, dropping bad rows
+
+    # Chat / transcript history rendered on the meeting page and per lazy-loaded page
+    MEETING_HISTORY_PAGE_SIZE = int(os.environ.get("MEETING_HISTORY_PAGE_SIZE", "50"))
+
+    # Development: log SELECTs whose SQLite query plan scans a whole table
+    QUERY_PROFILER = os.environ.get("QUERY_PROFILER", "false").lower() == "true"
+
+    # Development: per-request SQL statement count in an X-Query-Count header
+    QUERY_COUNT_HEADERS = os.environ.get("QUERY_COUNT_HEADERS", "false").lower() == "true"
+    QUERY_COUNT_WARN = int(os.environ.get("QUERY_COUNT_WARN", "0"))  # 0 disables the warning
+
+    # Avatar resolver: seconds between profile picture folder rescans (0 disables)
+    AVATAR_RESCAN_SECONDS = float(os.environ.get("AVATAR_RESCAN_SECONDS", "300"))
+
+    # Documents page: files per page (keyset-paginated)
+    DOCUMENTS_PAGE_SIZE = int(os.environ.get("DOCUMENTS_PAGE_SIZE", "50"))
+
+    # Recurring meetings/events: occurrences are generated per requested window
+    # and cached per user (rules plus the last few windows)
+    RECURRENCE_CACHE_TTL = float(os.environ.get("RECURRENCE_CACHE_TTL", "300"))
+    RECURRENCE_CACHE_USERS = int(os.environ.get("RECURRENCE_CACHE_USERS", "1000"))
+    RECURRENCE_CACHE_WINDOWS = int(os.environ.get("RECURRENCE_CACHE_WINDOWS", "8"))
+    RECURRENCE_MAX_OCCURRENCES = int(os.environ.get("RECURRENCE_MAX_OCCURRENCES", "1000"))  # per series per window
+    RECURRENCE_HORIZON_DAYS = int(os.environ.get("RECURRENCE_HORIZON_DAYS", "365"))  # for windows without an end
+
+    # Agent pre-meeting context: participants' calendar events this many days ahead
+    PRE_MEETING_CALENDAR_DAYS = int(os.environ.get("PRE_MEETING_CALENDAR_DAYS", "14"))
+
+    # Free/busy: working hours (UTC) and slot grid for suggested meeting times
+    FREEBUSY_DAY_START = os.environ.get("FREEBUSY_DAY_START", "09:00")
+    FREEBUSY_DAY_END = os.environ.get("FREEBUSY_DAY_END", "17:00")
+    FREEBUSY_WEEKDAYS_ONLY = os.environ.get("FREEBUSY_WEEKDAYS_ONLY", "true").lower() == "true"
+    FREEBUSY_SLOT_STEP_MINUTES = int(os.environ.get("FREEBUSY_SLOT_STEP_MINUTES", "30"))
+    FREEBUSY_TASK_MINUTES = int(os.environ.get("FREEBUSY_TASK_MINUTES", "60"))  # busy time before a task's due day ends; 0 ignores tasks
+    FREEBUSY_MAX_USERS = int(os.environ.get("FREEBUSY_MAX_USERS", "100"))
+    FREEBUSY_MAX_DAYS = int(os.environ.get("FREEBUSY_MAX_DAYS", "62"))
@@ -1,24 +1,15 @@
 # app/dashboard/routes.py
 
-import os
-from flask import Blueprint, render_template, flash, redirect, url_for, current_app
+from flask import Blueprint, render_template, flash, redirect, url_for
 from flask_login import login_required, current_user
+from app.extensions import db
 from app.models import User, Meeting, Participant, ActionItem, OrganizationMember, Invitation
 from sqlalchemy import or_, desc
-import os
+from sqlalchemy.orm import joinedload
+from app.avatars import avatar_url
 
 dashboard_bp = Blueprint("dashboard_bp", __name__, template_folder="templates")
 
-def path_exists_in_static(relative_path: str) -> bool:
-    """
-    Given a relative path like 'uploads/profile_pics/3_user.png',
-    build an absolute path in 'static/' and check if the file exists.
-    """
-    if not relative_path:
-        return False
-    full_path = os.path.join(current_app.static_folder, relative_path)
-    return os.path.isfile(full_path)
-
 @dashboard_bp.route("/")
 @login_required
 def dashboard():
@@ -27,37 +18,75 @@ def dashboard():
         flash("Access denied.", "danger")
         return redirect(url_for("main_bp.index"))
 
-    # Validate profile pic
-    if not path_exists_in_static(current_user.profile_pic_url):
-        current_user.profile_pic_url = ""
+    # Validated profile pic URL (cached, no filesystem access per render)
+    user_pic = current_user.avatar_url
 
-    # Gather the user’s meetings
+    # Gather the user’s meetings: organized ones, then the ones they attend
     organized_meetings = Meeting.query.filter_by(organizer_id=current_user.user_id).all()
-    participation = Participant.query.filter_by(user_id=current_user.user_id).all()
-    participant_meetings = [p.meeting for p in participation if p.meeting.organizer_id != current_user.user_id]
+    participant_meetings = (
+        Meeting.query
+        .join(Participant, Participant.meeting_id == Meeting.meeting_id)
+        .filter(Participant.user_id == current_user.user_id, Meeting.organizer_id != current_user.user_id)
+        .all()
+    )
     meetings = organized_meetings + participant_meetings
 
     # Gather tasks
     meeting_ids = list(set(m.meeting_id for m in meetings))
-    tasks = ActionItem.query.filter(ActionItem.meeting_id.in_(meeting_ids)).all()
+    tasks = ActionItem.query.filter(ActionItem.meeting_id.in_(meeting_ids)).all() if meeting_ids else []
+
+    # Active and pending memberships in one query, organizations loaded with them
+    memberships = (
+        OrganizationMember.query
+        .options(joinedload(OrganizationMember.organization))
+        .filter(
+            OrganizationMember.user_id == current_user.user_id,
+            OrganizationMember.status.in_(["active", "invited"])
+        )
+        .all()
+    )
+    my_orgs = [m.organization for m in memberships if m.status == "active"]
+    pending_org_ids = [m.org_id for m in memberships if m.status == "invited"]
 
-    # Gather members
-    members = User.query.all()
-    for member in members:
-        if not path_exists_in_static(member.profile_pic_url):
-            member.profile_pic_url = "default-profile.png"
+    # Gather members: people in the user's organizations, not every account
+    members = []
+    if my_orgs:
+        members = (
+            db.session.query(User.user_id, User.first_name, User.last_name, User.profile_pic_url)
+            .join(OrganizationMember, OrganizationMember.user_id == User.user_id)
+            .filter(
+                OrganizationMember.org_id.in_([org.org_id for org in my_orgs]),
+                OrganizationMember.status == "active"
+            )
+            .distinct()
+            .order_by(User.first_name, User.last_name)
+            .all()
+        )
+        members = [
+            {
+                "user_id": m.user_id,
+                "first_name": m.first_name,
+                "last_name": m.last_name,
+                "avatar_url": avatar_url(m.user_id, m.profile_pic_url),
+            }
+            for m in members
+        ]
 
-    # Get active memberships:
-    my_org_memberships = OrganizationMember.query.filter_by(user_id=current_user.user_id, status="active").all()
-    my_orgs = [membership.organization for membership in my_org_memberships]
-    # Also get pending invitations (for memberships with status "invited")
-    pending_memberships = OrganizationMember.query.filter_by(user_id=current_user.user_id, status="invited").all()
-    # Optionally, get the corresponding Invitation record for each pending membership:
+    # The invitation record for each pending membership, in a single IN query
     pending_invitations = []
-    for membership in pending_memberships:
-        invitation = Invitation.query.filter_by(org_id=membership.org_id, email=current_user.email).first()
-        if invitation:
-            pending_invitations.append(invitation)
+    if pending_org_ids:
+        invitations = (
+            Invitation.query
+            .options(joinedload(Invitation.organization))
+            .filter(Invitation.org_id.in_(pending_org_ids), Invitation.email == current_user.email)
+            .order_by(Invitation.invitation_id.asc())
+            .all()
+        )
+        # One invitation per organization, as before
+        by_org = {}
+        for invitation in invitations:
+            by_org.setdefault(invitation.org_id, invitation)
+        pending_invitations = list(by_org.values())
             
             
             
@@ -70,6 +99,7 @@ def dashboard():
             
     return render_template("dashboard.html",
                            user=current_user,
+                           user_pic=user_pic,
                            meetings=meetings,
                            tasks=tasks,
                            members=members,
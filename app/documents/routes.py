@@ -7,8 +7,10 @@ from flask_login import login_required, current_user
 
 # Import your own modules as needed:
 from app.config import Config
-from app.models import TaskFile, ChatFile
+from app.models import TaskFile, ChatFile, ActionItem, Participant, StoredBlob, User
 from app.extensions import db
+from app.meeting.history import InvalidCursor, encode_cursor, decode_cursor
+from sqlalchemy import select, union_all, literal, case, func, or_, and_, true
 from datetime import datetime
 import os
 
@@ -50,77 +52,32 @@ def documents_view():
     except ValueError:
         pass  # If there's an error, just ignore for now
 
-    # -------------- 2) Query both ChatFile and TaskFile from the DB --------------
-    chat_files = ChatFile.query.all()
-    task_files = TaskFile.query.all()
-    
-    # -------------- 3) Convert them into a single list of dicts  --------------
-    all_docs = []
-    
-    # For ChatFile
-    for cf in chat_files:
-        # If you store the meeting ID in ChatFile.meeting_id
-        doc_info = {
-            "source": "Chat File",
-            "filename": cf.filename,
-            "file_url": cf.file_url,
-            "uploader": cf.username,
-            "uploaded_at": cf.uploaded_at,
-            "meeting_id": cf.meeting_id,   # add so we can filter by meeting
-        }
-        all_docs.append(doc_info)
-
-    # For TaskFile
-    for tf in task_files:
-        # If your TaskFile is related to a task which references meeting,
-        # you can do tf.task.meeting_id if you want the meeting filter
-        meeting_id_val = tf.task.meeting_id if (tf.task and tf.task.meeting_id) else None
-
-        doc_info = {
-            "source": "Task File",
-            "filename": tf.filename,
-            "file_url": f"/static/uploads/{tf.filename}",
-            "uploader": tf.task.assignee.username if tf.task and tf.task.assignee else "Unknown",
-            "uploaded_at": tf.uploaded_at,
-            "meeting_id": meeting_id_val,  # might be None if not set
-        }
-        all_docs.append(doc_info)
-
-    # -------------- 4) Apply filters in Python  --------------
-    filtered_docs = []
-
-    for doc in all_docs:
-        # Filter by Type
-        if filter_source and doc["source"] != filter_source:
-            continue
-
-        # Filter by Uploader
-        if filter_uploader and doc["uploader"] != filter_uploader:
-            continue
-
-        # Filter by Meeting
-        # If the user typed in a numeric meeting_id, we check doc's meeting_id
-        if filter_meeting:
-            try:
-                requested_meeting_id = int(filter_meeting)
-                if doc["meeting_id"] != requested_meeting_id:
-                    continue
-            except ValueError:
-                pass  # If invalid, ignore filter
-
-        # Filter by date range
-        if start_dt and doc["uploaded_at"] and doc["uploaded_at"] < start_dt:
-            continue
-        if end_dt and doc["uploaded_at"] and doc["uploaded_at"] > end_dt:
-            continue
-
-        # If it passes all filters, keep it
-        filtered_docs.append(doc)
-
-    # Sort the final list if desired (descending by time)
-    filtered_docs.sort(
-        key=lambda doc: doc["uploaded_at"] or datetime.min,
-        reverse=True
+    # Meeting filter; an invalid value is ignored
+    meeting_id = None
+    if filter_meeting:
+        try:
+            meeting_id = int(filter_meeting)
+        except ValueError:
+            pass
+
+    # A cursor that does not decode starts again at the newest page
+    before = request.args.get("before") or None
+    if before:
+        try:
+            decode_cursor(before)
+        except InvalidCursor:
+            before = None
+
+    # -------------- 2) One page of both file tables, filtered in SQL --------------
+    filtered_docs, next_cursor = documents_page(
+        user_id=current_user.user_id,
+        source=filter_source,
+        uploader=filter_uploader,
+        meeting_id=meeting_id,
+        start_dt=start_dt,
+        end_dt=end_dt,
+        before=before,
+        limit=Config.DOCUMENTS_PAGE_SIZE
     )
 
     # -------------- 5) Render the template  --------------
@@ -131,5 +88,101 @@ def documents_view():
         filter_uploader=filter_uploader,
         filter_meeting=filter_meeting,
         filter_start=filter_start,
-        filter_end=filter_end
-    )
\ No newline at end of file
+        filter_end=filter_end,
+        next_cursor=next_cursor,
+        is_first_page=before is None
+    )
+
+
+def documents_page(user_id, source="", uploader="", meeting_id=None, start_dt=None, end_dt=None, before=None, limit=50):
+    """
+    One page of chat and task files from meetings the user takes part in,
+    newest first, as a single UNION ALL query.
+
+    Every filter is applied in each branch's WHERE, and each branch is
+    limited to the page size before the union, so the cost follows the page
+    size rather than the number of stored files. Pages are keyset-paginated
+    on (uploaded_at, doc_key), where doc_key = file_id * 2 for chat files
+    and file_id * 2 + 1 for task files, keeping it unique across both.
+
+    Returns (list of document dicts, cursor for the next page or None).
+    """
+    my_meetings = select(Participant.meeting_id).where(Participant.user_id == user_id)
+    after = decode_cursor(before) if before else None
+
+    def keyset(uploaded_at, doc_key):
+        if after is None:
+            return true()
+        return or_(uploaded_at < after[0], and_(uploaded_at == after[0], doc_key < after[1]))
+
+    branches = []
+    if source in ("", "Chat File"):
+        doc_key = ChatFile.file_id * 2
+        query = (
+            select(
+                literal("Chat File").label("source"),
+                doc_key.label("doc_key"),
+                ChatFile.filename.label("filename"),
+                ChatFile.file_url.label("file_url"),
+                ChatFile.username.label("uploader"),
+                ChatFile.uploaded_at.label("uploaded_at"),
+                ChatFile.meeting_id.label("meeting_id"),
+            )
+            .where(ChatFile.meeting_id.in_(my_meetings), keyset(ChatFile.uploaded_at, doc_key))
+        )
+        if uploader:
+            query = query.where(ChatFile.username == uploader)
+        if meeting_id is not None:
+            query = query.where(ChatFile.meeting_id == meeting_id)
+        if start_dt:
+            query = query.where(ChatFile.uploaded_at >= start_dt)
+        if end_dt:
+            query = query.where(ChatFile.uploaded_at <= end_dt)
+        branches.append(query.order_by(ChatFile.uploaded_at.desc(), doc_key.desc()).limit(limit + 1))
+
+    if source in ("", "Task File"):
+        doc_key = TaskFile.file_id * 2 + 1
+        uploader_name = func.coalesce(User.username, "Unknown")
+        query = (
+            select(
+                literal("Task File").label("source"),
+                doc_key.label("doc_key"),
+                TaskFile.filename.label("filename"),
+                case(
+                    (StoredBlob.storage_path.isnot(None), literal("/static/") + StoredBlob.storage_path),
+                    else_=literal("/static/uploads/documents/") + TaskFile.filename
+                ).label("file_url"),
+                uploader_name.label("uploader"),
+                TaskFile.uploaded_at.label("uploaded_at"),
+                ActionItem.meeting_id.label("meeting_id"),
+            )
+            .join(ActionItem, ActionItem.action_item_id == TaskFile.task_id)
+            .outerjoin(User, User.user_id == ActionItem.assigned_to)
+            .outerjoin(StoredBlob, StoredBlob.sha256 == TaskFile.blob_sha256)
+            .where(ActionItem.meeting_id.in_(my_meetings), keyset(TaskFile.uploaded_at, doc_key))
+        )
+        if uploader:
+            query = query.where(uploader_name == uploader)
+        if meeting_id is not None:
+            query = query.where(ActionItem.meeting_id == meeting_id)
+        if start_dt:
+            query = query.where(TaskFile.uploaded_at >= start_dt)
+        if end_dt:
+            query = query.where(TaskFile.uploaded_at <= end_dt)
+        branches.append(query.order_by(TaskFile.uploaded_at.desc(), doc_key.desc()).limit(limit + 1))
+
+    if not branches:
+        return [], None
+
+    # Each branch is wrapped so its ORDER BY / LIMIT apply before the union
+    parts = [select(*b.subquery().c) for b in branches]
+    docs = union_all(*parts).subquery() if len(parts) > 1 else parts[0].subquery()
+    rows = db.session.execute(
+        select(docs).order_by(docs.c.uploaded_at.desc(), docs.c.doc_key.desc()).limit(limit + 1)
+    ).mappings().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["uploaded_at"], rows[-1]["doc_key"])
+    return [dict(row) for row in rows], next_cursor
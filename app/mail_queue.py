@@ -0,0 +1,212 @@
+# app/mail_queue.py
+
+import logging
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from flask_mail import Message
+from sqlalchemy import insert, update
+
+from app.config import Config
+from app.extensions import db, mail
+from app.models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+# A message claimed for longer than this is assumed lost (worker died)
+STALE_CLAIM = timedelta(minutes=10)
+
+_wakeup = threading.Event()
+
+
+def enqueue_email(recipients, subject, html, sender=None):
+    """
+    Queue one email per recipient and wake the worker. `sender` is an
+    address or a (name, address) tuple; None uses MAIL_DEFAULT_SENDER.
+    Commits, and returns the number of queued messages.
+    """
+    if isinstance(recipients, str):
+        recipients = [recipients]
+    if isinstance(sender, (tuple, list)):
+        sender_name, sender_email = sender
+    else:
+        sender_name, sender_email = None, sender
+
+    now = datetime.utcnow()
+    rows = [{
+        "recipient": recipient,
+        "subject": subject,
+        "html": html,
+        "sender_name": sender_name,
+        "sender_email": sender_email,
+        "status": "queued",
+        "attempts": 0,
+        "next_attempt_at": now,
+        "created_timestamp": now,
+    } for recipient in dict.fromkeys(r for r in recipients if r)]
+    if not rows:
+        return 0
+    db.session.execute(insert(OutboundEmail), rows)
+    db.session.commit()
+    _wakeup.set()
+    return len(rows)
+
+
+def _build_message(email):
+    if email.sender_email:
+        sender = (email.sender_name, email.sender_email) if email.sender_name else email.sender_email
+    else:
+        sender = Config.MAIL_DEFAULT_SENDER
+    return Message(subject=email.subject, recipients=[email.recipient], html=email.html, sender=sender)
+
+
+class MailQueueWorker:
+    """
+    Drains the outbound_emails table in the background.
+
+    - Claims up to `batch_size` due messages at a time with a claim token,
+      so several app processes never send the same message twice.
+    - Sends a whole batch over one SMTP connection (`mailer.connect()`).
+    - A failed message is retried with exponential backoff and marked
+      "failed" after `max_attempts`; every message keeps its status,
+      attempt count and last error.
+    """
+
+    def __init__(self, mailer=None, batch_size=50, poll_seconds=10, max_attempts=5, backoff_seconds=30):
+        self.mailer = mailer or mail
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self._started = False
+        self._lock = threading.Lock()
+
+    def start(self, app, socketio):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        socketio.start_background_task(self._run, app)
+
+    def _run(self, app):
+        while True:
+            _wakeup.wait(self.poll_seconds)
+            _wakeup.clear()
+            try:
+                with app.app_context():
+                    while self.drain_batch():
+                        pass
+            except Exception as e:
+                logger.error(f"Mail queue worker error: {e}")
+                with app.app_context():
+                    db.session.rollback()
+
+    def _claim(self):
+        now = datetime.utcnow()
+        # Release claims of a worker that died mid-batch
+        db.session.execute(
+            update(OutboundEmail)
+            .where(OutboundEmail.status == "sending", OutboundEmail.claimed_at < now - STALE_CLAIM)
+            .values(status="queued", claim_token=None)
+        )
+        due_ids = [
+            row.email_id for row in
+            db.session.query(OutboundEmail.email_id)
+            .filter(OutboundEmail.status == "queued", OutboundEmail.next_attempt_at <= now)
+            .order_by(OutboundEmail.email_id.asc())
+            .limit(self.batch_size)
+        ]
+        if not due_ids:
+            db.session.commit()
+            return []
+        token = uuid.uuid4().hex
+        db.session.execute(
+            update(OutboundEmail)
+            .where(OutboundEmail.email_id.in_(due_ids), OutboundEmail.status == "queued")
+            .values(status="sending", claim_token=token, claimed_at=now)
+        )
+        db.session.commit()
+        return OutboundEmail.query.filter_by(claim_token=token).all()
+
+    def drain_batch(self):
+        """
+        Send one batch of due messages. Returns the number of messages claimed.
+        """
+        batch = self._claim()
+        if not batch:
+            return 0
+
+        results = {}
+        try:
+            with self.mailer.connect() as connection:
+                for email in batch:
+                    try:
+                        connection.send(_build_message(email))
+                        results[email.email_id] = None
+                    except Exception as e:
+                        results[email.email_id] = str(e)
+        except Exception as e:
+            # Connection or login failed: the unsent rest of the batch is retried
+            logger.error(f"Mail queue could not reach the SMTP server: {e}")
+            for email in batch:
+                results.setdefault(email.email_id, str(e))
+
+        now = datetime.utcnow()
+        changes = []
+        for email in batch:
+            error = results[email.email_id]
+            attempts = (email.attempts or 0) + 1
+            change = {"email_id": email.email_id, "attempts": attempts, "claim_token": None, "last_error": error}
+            if error is None:
+                change.update(status="sent", sent_timestamp=now)
+            elif attempts >= self.max_attempts:
+                change.update(status="failed")
+                logger.error(f"Giving up on email {email.email_id} to {email.recipient}: {error}")
+            else:
+                delay = self.backoff_seconds * (2 ** (attempts - 1))
+                change.update(status="queued", next_attempt_at=now + timedelta(seconds=delay))
+            changes.append(change)
+        db.session.execute(update(OutboundEmail), changes)
+        db.session.commit()
+        sent = sum(1 for e in results.values() if e is None)
+        logger.info(f"Mail queue batch: {sent} sent, {len(batch) - sent} deferred or failed")
+        return len(batch)
+
+
+class RecordingMailer:
+    """
+    SMTP stand-in for tests and local development. Implements the part of
+    Flask-Mail the worker uses (`connect()` / `send()`), records sent
+    messages in `outbox` and can fail the first `fail_times` sends.
+
+        worker = MailQueueWorker(mailer=RecordingMailer(), backoff_seconds=0)
+    """
+
+    def __init__(self, fail_times=0, fail_connect=False):
+        self.outbox = []
+        self.connections = 0
+        self.fail_times = fail_times
+        self.fail_connect = fail_connect
+
+    @contextmanager
+    def connect(self):
+        if self.fail_connect:
+            raise ConnectionRefusedError("SMTP stand-in refused the connection")
+        self.connections += 1
+        yield self
+
+    def send(self, message):
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise OSError("SMTP stand-in rejected the message")
+        self.outbox.append(message)
+
+
+worker = MailQueueWorker(
+    batch_size=Config.MAIL_QUEUE_BATCH_SIZE,
+    poll_seconds=Config.MAIL_QUEUE_POLL_SECONDS,
+    max_attempts=Config.MAIL_QUEUE_MAX_ATTEMPTS,
+    backoff_seconds=Config.MAIL_QUEUE_BACKOFF_SECONDS
+)
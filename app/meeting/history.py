@@ -0,0 +1,116 @@
+# app/meeting/history.py
+
+import base64
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import joinedload
+
+from app.avatars import avatar_url
+from app.extensions import db
+from app.models import ChatMessage, Transcript, User
+
+
+class InvalidCursor(ValueError):
+    """
+    Raised for a history cursor that was not produced by encode_cursor().
+    """
+
+
+def encode_cursor(timestamp, row_id):
+    """
+    Opaque cursor for the position (timestamp, id) of the oldest row on a page.
+    """
+    raw = f"{timestamp.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, row_id = raw.split("|")
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(cursor) from e
+
+
+def keyset_page(query, timestamp_col, id_col, before=None, limit=50):
+    """
+    One page of `query`, newest first on (timestamp, id), strictly older than
+    the `before` cursor. Unlike OFFSET, the cost of a page does not grow with
+    how far back it is.
+
+    Returns (rows oldest-first, cursor for the next older page or None).
+    Rows may be entities or (entity, extra columns...) rows; the cursor is
+    read from the entity.
+    """
+    if before:
+        timestamp, row_id = decode_cursor(before)
+        query = query.filter(or_(
+            timestamp_col < timestamp,
+            and_(timestamp_col == timestamp, id_col < row_id)
+        ))
+    rows = query.order_by(timestamp_col.desc(), id_col.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    rows.reverse()
+
+    next_cursor = None
+    if has_more:
+        oldest = rows[0]
+        if not hasattr(oldest, id_col.key):
+            oldest = oldest[0]
+        next_cursor = encode_cursor(
+            getattr(oldest, timestamp_col.key),
+            getattr(oldest, id_col.key)
+        )
+    return rows, next_cursor
+
+
+def chat_history_page(meeting_id, before=None, limit=50):
+    """
+    A page of a meeting's chat as template/JSON-ready dicts plus the cursor
+    for older messages. Messages without a user (agent replies) keep their
+    stored username and get the default avatar.
+    """
+    query = (
+        db.session.query(ChatMessage, User.profile_pic_url)
+        .outerjoin(User, ChatMessage.user_id == User.user_id)
+        .filter(ChatMessage.meeting_id == meeting_id)
+    )
+    rows, next_cursor = keyset_page(query, ChatMessage.timestamp, ChatMessage.message_id, before, limit)
+    messages = [
+        {
+            "message_id": msg.message_id,
+            "username": msg.username,
+            "message": msg.message,
+            "timestamp": msg.timestamp,
+            "client_id": msg.client_id,
+            "profile_pic_url": avatar_url(msg.user_id, profile_pic),
+        }
+        for msg, profile_pic in rows
+    ]
+    return messages, next_cursor
+
+
+def transcript_history_page(meeting_id, before=None, limit=50):
+    """
+    A page of a meeting's saved transcripts (speaker loaded in the same
+    query) plus the cursor for older transcripts.
+    """
+    query = (
+        Transcript.query
+        .options(joinedload(Transcript.speaker))
+        .filter(Transcript.meeting_id == meeting_id)
+    )
+    return keyset_page(query, Transcript.created_timestamp, Transcript.transcript_id, before, limit)
+
+
+def transcript_to_dict(transcript):
+    return {
+        "transcript_id": transcript.transcript_id,
+        "speaker": transcript.speaker.username if transcript.speaker else "Unknown Speaker",
+        "raw_transcript": transcript.raw_transcript,
+        "processed_transcript": transcript.processed_transcript or "",
+        "created_timestamp": transcript.created_timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+    }
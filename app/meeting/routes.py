@@ -18,10 +18,20 @@ from app.extensions import db, socketio
 from app.config import Config
 from app.models import (
     Meeting, Participant, Transcript, Summary, ActionItem,
-    User, ChatMessage
+    User, ChatMessage, ChatFile
     )
 
 from app.transcription.transcription import TranscriptionSession  # if you keep Watson STT in a separate module
+from app.transcription.autocorrect import correct_transcript, start_meeting_autocorrect
+from app.agent.structured_output import StructuredOutputError
+from app.task.extraction import extract_tasks_incremental
+from app.storage import store_upload
+from app.meeting.history import (
+    InvalidCursor, chat_history_page, transcript_history_page, transcript_to_dict
+    )
+from app.calendar.recurrence import InvalidRecurrence, parse_rule
+from app.calendar.feed import DEFAULT_MEETING_DURATION
+from app.calendar.freebusy import conflicts
 from sqlalchemy import desc  # Add this import
 meeting_bp = Blueprint("meeting_bp", __name__, template_folder="templates")
 
@@ -43,10 +53,14 @@ def meeting_list():
     """
     user_id = current_user.user_id
     organized = Meeting.query.filter_by(organizer_id=user_id).order_by(Meeting.date_time.desc()).all()
-    participation = Participant.query.filter_by(user_id=user_id).all()
-
-    participant_meetings = [p.meeting for p in participation if p.meeting.organizer_id != user_id]
-    participant_meetings.sort(key=lambda m: m.date_time, reverse=True)  # Sort participant meetings in descending order
+    # Meetings the user attends but did not organize, newest first, in one query
+    participant_meetings = (
+        Meeting.query
+        .join(Participant, Participant.meeting_id == Meeting.meeting_id)
+        .filter(Participant.user_id == user_id, Meeting.organizer_id != user_id)
+        .order_by(Meeting.date_time.desc())
+        .all()
+    )
 
     # Suppose you fetch a meeting or default to None
     meeting = Meeting.query.first()
@@ -101,13 +115,23 @@ def new_meeting():
                 flash("Invalid duration format.", "danger")
                 return redirect(url_for("meeting_bp.new_meeting"))
 
+        try:
+            recurrence_rule = parse_rule(request.form.get("recurrence_rule"))
+        except InvalidRecurrence as e:
+            flash(f"Invalid repeat rule: {e}", "danger")
+            return redirect(url_for("meeting_bp.new_meeting"))
+
+        # Checked before the meeting exists, so it does not conflict with itself
+        busy = conflicts(current_user.user_id, dt, dt + (duration or DEFAULT_MEETING_DURATION), Config.FREEBUSY_TASK_MINUTES)
+
         meeting = Meeting(
             title=title,
             description=description,
             date_time=dt,
             duration=duration,
             organizer_id=current_user.user_id,
-            org_id=org_id # Associate the new meeting with the chosen org
+            org_id=org_id, # Associate the new meeting with the chosen org
+            recurrence_rule=recurrence_rule
         )
         db.session.add(meeting)
         db.session.commit()
@@ -122,6 +146,8 @@ def new_meeting():
         db.session.commit()
 
         flash("Meeting created successfully.", "success")
+        if busy:
+            flash(f"You already have something scheduled at that time ({_format_busy(busy)}).", "warning")
         return redirect(url_for("meeting_bp.meeting_list"))
 
     return render_template("meeting_form.html", now=datetime.utcnow(), user_orgs=user_orgs)
@@ -138,31 +164,16 @@ def meeting_details(meeting_id):
         flash("You are not a participant of this meeting.", "danger")
         return redirect(url_for("meeting_bp.meeting_list"))
 
-    transcripts = Transcript.query.filter_by(meeting_id=meeting_id).order_by(Transcript.created_timestamp.asc()).all()
+    # Only the latest page of transcripts and chat; older pages are fetched on scroll
+    page_size = Config.MEETING_HISTORY_PAGE_SIZE
+    transcripts, transcripts_cursor = transcript_history_page(meeting_id, limit=page_size)
     #summary = Summary.query.filter_by(meeting_id=meeting_id, summary_type='detailed').order_by(Summary.created_timestamp.desc()).first()
 
     tasks = ActionItem.query.filter_by(meeting_id=meeting_id).order_by(ActionItem.created_timestamp.asc()).all()
     participants = Participant.query.filter_by(meeting_id=meeting_id).all()
 
-    # Fetch chat messages with user profile pictures
-    chat_messages = (
-        db.session.query(ChatMessage, User.profile_pic_url)
-        .join(User, ChatMessage.user_id == User.user_id)
-        .filter(ChatMessage.meeting_id == meeting_id)
-        .order_by(ChatMessage.timestamp.asc())
-        .all()
-    )
-    
-    # Convert chat messages into a structured list
-    chat_messages_data = [
-        {
-            "username": msg.username,
-            "message": msg.message,
-            "timestamp": msg.timestamp,
-            "profile_pic_url": f"/static/{profile_pic}" if profile_pic else "/static/default-profile.png",
-        }
-        for msg, profile_pic in chat_messages
-    ]
+    # Chat messages with user profile pictures
+    chat_messages_data, chat_cursor = chat_history_page(meeting_id, limit=page_size)
     
     
     # Retrieve the latest 'agenda' summary from the DB
@@ -190,9 +201,57 @@ def meeting_details(meeting_id):
         tasks=tasks,
         participants=participants,
         chat_messages=chat_messages_data, # Updated to pass profile_pic_url
+        chat_cursor=chat_cursor,
+        transcripts_cursor=transcripts_cursor,
         agenda_data=agenda_data
     )
 
+
+def _history_args():
+    """
+    (before, limit) query args for the history endpoints.
+    """
+    limit = min(request.args.get("limit", Config.MEETING_HISTORY_PAGE_SIZE, type=int), 200)
+    return request.args.get("before") or None, max(limit, 1)
+
+
+@meeting_bp.route("/<int:meeting_id>/chat_history", methods=["GET"])
+@login_required
+def chat_history(meeting_id):
+    """
+    Older chat messages, newest page first. Pass the returned `next_cursor`
+    as `before` to get the page before it; it is null on the first message.
+    """
+    if not Participant.query.filter_by(meeting_id=meeting_id, user_id=current_user.user_id).first():
+        return jsonify({"error": "You are not a participant of this meeting."}), 403
+    before, limit = _history_args()
+    try:
+        messages, next_cursor = chat_history_page(meeting_id, before, limit)
+    except InvalidCursor:
+        return jsonify({"error": "Invalid cursor."}), 400
+    for message in messages:
+        message["timestamp"] = message["timestamp"].strftime("%Y-%m-%d %H:%M:%S")
+    return jsonify({"messages": messages, "next_cursor": next_cursor})
+
+
+@meeting_bp.route("/<int:meeting_id>/transcript_history", methods=["GET"])
+@login_required
+def transcript_history(meeting_id):
+    """
+    Older saved transcripts, paginated like chat_history.
+    """
+    if not Participant.query.filter_by(meeting_id=meeting_id, user_id=current_user.user_id).first():
+        return jsonify({"error": "You are not a participant of this meeting."}), 403
+    before, limit = _history_args()
+    try:
+        transcripts, next_cursor = transcript_history_page(meeting_id, before, limit)
+    except InvalidCursor:
+        return jsonify({"error": "Invalid cursor."}), 400
+    return jsonify({
+        "transcripts": [transcript_to_dict(t) for t in transcripts],
+        "next_cursor": next_cursor
+    })
+
 @meeting_bp.route("/<int:meeting_id>/edit", methods=["GET", "POST"])
 @login_required
 def edit_meeting(meeting_id):
@@ -228,6 +287,12 @@ def edit_meeting(meeting_id):
                 flash("Invalid duration format.", "danger")
                 return redirect(url_for("meeting_bp.edit_meeting", meeting_id=meeting_id))
 
+        try:
+            meeting.recurrence_rule = parse_rule(request.form.get("recurrence_rule"))
+        except InvalidRecurrence as e:
+            flash(f"Invalid repeat rule: {e}", "danger")
+            return redirect(url_for("meeting_bp.edit_meeting", meeting_id=meeting_id))
+
         db.session.commit()
         flash("Meeting updated successfully.", "success")
         return redirect(url_for("meeting_bp.meeting_list"))
@@ -245,11 +310,17 @@ def delete_meeting(meeting_id):
         flash("You are not authorized to delete this meeting.", "danger")
         return redirect(url_for("meeting_bp.meeting_list"))
 
+    # One DELETE for the participants instead of loading each row for the cascade
+    Participant.query.filter_by(meeting_id=meeting_id).delete(synchronize_session=False)
+    db.session.expire(meeting, ["participants"])
     db.session.delete(meeting)
     db.session.commit()
     flash("Meeting deleted successfully.", "success")
     return redirect(url_for("meeting_bp.meeting_list"))
 
+def _format_busy(intervals):
+    return ", ".join(f"{s.strftime('%Y-%m-%d %H:%M')}-{e.strftime('%H:%M')}" for s, e in intervals)
+
 ##############################################################################
 # PARTICIPANTS
 ##############################################################################
@@ -281,6 +352,9 @@ def add_participant(meeting_id):
             flash("User is already a participant.", "warning")
             return redirect(url_for("meeting_bp.add_participant", meeting_id=meeting_id))
 
+        meeting_end = meeting.date_time + (meeting.duration or DEFAULT_MEETING_DURATION)
+        busy = conflicts(user_id, meeting.date_time, meeting_end, Config.FREEBUSY_TASK_MINUTES)
+
         participant = Participant(
             meeting_id=meeting_id,
             user_id=user_id,
@@ -290,6 +364,8 @@ def add_participant(meeting_id):
         db.session.commit()
 
         flash("Participant added successfully.", "success")
+        if busy:
+            flash(f"{participant.user.username} is busy during this meeting ({_format_busy(busy)}).", "warning")
         return redirect(url_for("meeting_bp.meeting_details", meeting_id=meeting_id))
 
     existing_ids = [p.user_id for p in Participant.query.filter_by(meeting_id=meeting_id).all()]
@@ -310,6 +386,7 @@ def update_transcript(transcript_id):
 
     transcript = Transcript.query.get_or_404(transcript_id)
     transcript.processed_transcript = new_text
+    transcript.processed_edits = None  # hand edits are stored as text only
     db.session.commit()
 
     return jsonify({
@@ -339,45 +416,28 @@ def autocorrect_transcript(transcript_id):
     Use WatsonxLLM to autocorrect grammar (while preserving style).
     """
     transcript = Transcript.query.get_or_404(transcript_id)
-    text_to_correct = transcript.raw_transcript.strip()
-
-    from langchain_ibm import WatsonxLLM
-    from langchain_core.prompts import PromptTemplate
-
-    watsonx_llm = WatsonxLLM(
-        model_id=Config.WATSONX_MODEL_ID_1,
-        url=Config.WATSONX_URL,
-        project_id=Config.WATSONX_PROJECT_ID,
-        apikey=Config.WATSONX_API_KEY,
-        params={
-            "decoding_method": "sample",
-            "max_new_tokens": 1200,
-            "temperature": 0.8,
-            "top_k": 25,
-            "top_p": 1,
-        }
-    )
-
-    template = """
-    Correct grammar without changing original meaning of transcript to keep speakers style.
-
-    Text to correct:
-    {text}
-
-    Output only the final corrected text. No explanation or description.
-    """
-    prompt = PromptTemplate.from_template(template)
-    llm_chain = prompt | watsonx_llm
-    corrected_text = llm_chain.invoke({"text": text_to_correct})
-
-    transcript.processed_transcript = corrected_text.strip()
+    edits = correct_transcript(transcript)
     db.session.commit()
 
     return jsonify({
         "transcript_id": transcript.transcript_id,
-        "processed_transcript": transcript.processed_transcript
+        "processed_transcript": transcript.processed_transcript,
+        "edits": edits
     })
 
+@meeting_bp.route("/<int:meeting_id>/autocorrect_all", methods=["POST"])
+@login_required
+def autocorrect_all_transcripts(meeting_id):
+    """
+    Autocorrect every transcript of the meeting in the background.
+    Progress is streamed per transcript on the /transcription namespace.
+    """
+    Meeting.query.get_or_404(meeting_id)
+    started = start_meeting_autocorrect(current_app._get_current_object(), socketio, meeting_id)
+    if not started:
+        return jsonify({"error": "Autocorrect is already running for this meeting."}), 409
+    return jsonify({"meeting_id": meeting_id, "status": "started"}), 202
+
 @meeting_bp.route("/transcript/<int:transcript_id>/reset", methods=["POST"])
 @login_required
 def reset_transcript(transcript_id):
@@ -386,6 +446,7 @@ def reset_transcript(transcript_id):
     """
     transcript = Transcript.query.get_or_404(transcript_id)
     transcript.processed_transcript = ""
+    transcript.processed_edits = None
     db.session.commit()
 
     return jsonify({
@@ -401,21 +462,10 @@ def reset_transcript(transcript_id):
 @login_required
 def extract_tasks():
     """
-    Combine all transcripts for a meeting, feed them to a WatsonxLLM prompt,
-    parse the resulting JSON to create ActionItem tasks in the DB.
+    Feed the transcripts added since the last extraction to a WatsonxLLM
+    prompt and merge the resulting tasks into the meeting's ActionItems.
+    Pass "full": true to reprocess every transcript of the meeting.
     """
-    from datetime import datetime
-    import re
-    import json
-
-    def parse_iso_date(date_str):
-        if not date_str or date_str.lower() == "null":
-            return None
-        try:
-            return datetime.strptime(date_str, "%Y-%m-%d").date()
-        except ValueError:
-            return None
-
     data = request.get_json() or {}
     meeting_id_str = data.get("meeting_id")
     if not meeting_id_str:
@@ -426,12 +476,6 @@ def extract_tasks():
     except ValueError:
         return jsonify({"error": "Invalid meeting_id"}), 400
 
-    transcripts = Transcript.query.filter_by(meeting_id=meeting_id).all()
-    full_text = " ".join([
-        t.processed_transcript if t.processed_transcript else t.raw_transcript
-        for t in transcripts
-    ])
-
     from langchain_ibm import WatsonxLLM
     from langchain_core.prompts import PromptTemplate
 
@@ -469,46 +513,22 @@ def extract_tasks():
     Remember that start_date and due_date must be either null or in the exact format YYYY-MM-DD.
     """
     prompt = PromptTemplate.from_template(prompt_template)
-    llm_chain = prompt | watsonx_llm
 
-    result = llm_chain.invoke({"text": full_text})
-    print("===== LLM Raw Result =====")
-    print(result)
+    # Only transcripts added since the last extraction are sent to the model;
+    # the results are merged into the existing tasks.
     try:
-        tasks = json.loads(result)
-    except Exception as e:
+        result = extract_tasks_incremental(
+            meeting_id, watsonx_llm, prompt, Config.WATSONX_MODEL_ID_2,
+            full=bool(data.get("full"))
+        )
+    except StructuredOutputError as e:
         return jsonify({
             "error": "Failed to parse tasks JSON",
             "details": str(e),
-            "raw_output": result
+            "raw_output": e.raw_output
         }), 500
-    print(tasks) # DEBUG CODE
-    # Remove existing tasks for this meeting, then re-create them
-    existing_tasks = ActionItem.query.filter_by(meeting_id=meeting_id).all()
-    for t in existing_tasks:
-        db.session.delete(t)
-    db.session.commit()
-
-    new_tasks = []
-    for tdata in tasks:
-        description = tdata.get("description", "").strip()
-        if not description:
-            # Skip empty tasks
-            continue
-        new_task = ActionItem(
-            meeting_id=meeting_id,
-            description=description,
-            assigned_to=tdata.get("assigned_to"),
-            status=tdata.get("status", "pending"),
-            priority=tdata.get("priority", "medium"),
-            start_date=parse_iso_date(tdata.get("start_date")),
-            due_date=parse_iso_date(tdata.get("due_date")),
-        )
-        db.session.add(new_task)
-        new_tasks.append(new_task)
-
-    db.session.commit()
 
+    tasks = ActionItem.query.filter_by(meeting_id=meeting_id).order_by(ActionItem.action_item_id.asc()).all()
     tasks_list = [{
         "action_item_id": t.action_item_id,
         "description": t.description,
@@ -518,9 +538,9 @@ def extract_tasks():
         "start_date": t.start_date.isoformat() if t.start_date else None,
         "due_date": t.due_date.isoformat() if t.due_date else None,
         "created_timestamp": t.created_timestamp.strftime("%Y-%m-%d %H:%M:%S")
-    } for t in new_tasks]
+    } for t in tasks]
 
-    return jsonify({"tasks": tasks_list})
+    return jsonify({"tasks": tasks_list, **result})
 
 ##############################################################################
 # ACTION ITEMS: Update Status, Update Details
@@ -588,24 +608,31 @@ def upload_file():
         return jsonify({"error": "No file part"}), 400
 
     file = request.files["file"]
-    meeting_id = request.form.get("meeting_id")
+    meeting_id = request.form.get("meeting_id", type=int)
 
     if file.filename == "":
         return jsonify({"error": "No selected file"}), 400
 
+    if meeting_id is None:
+        return jsonify({"error": "meeting_id is required"}), 400
+
     if not allowed_file(file.filename):
         return jsonify({"error": "File type not allowed"}), 400
 
-    # Save file to uploads folder
-    upload_folder = current_app.config.get("UPLOAD_FOLDER", "static/uploads")
-    os.makedirs(upload_folder, exist_ok=True)
-
+    # Content-addressed storage: identical uploads share one file. The
+    # ChatFile row is the reference that keeps the blob from being released.
     filename = secure_filename(file.filename)
-    unique_filename = f"{datetime.utcnow().strftime('%Y%m%d%H%M%S')}_{filename}"
-    save_path = os.path.join(upload_folder, unique_filename)
-    file.save(save_path)
-
-    file_url = url_for("static", filename=f"uploads/{unique_filename}")
+    blob = store_upload(file)
+    db.session.add(ChatFile(
+        meeting_id=meeting_id,
+        user_id=current_user.user_id,
+        username=current_user.username,
+        filename=filename,
+        file_url=blob.url,
+        blob_sha256=blob.sha256
+    ))
+    db.session.commit()
+    file_url = blob.url
 
     # Broadcast to the chat for that meeting
     socketio.emit(
@@ -6,11 +6,15 @@ from .extensions import db
 # ---------------- Transcript Model ----------------
 class Transcript(db.Model):
     __tablename__ = 'transcripts'
+    __table_args__ = (
+        db.Index('ix_transcripts_meeting_created', 'meeting_id', 'created_timestamp', 'transcript_id'),
+    )
     transcript_id = db.Column(db.Integer, primary_key=True)
     meeting_id = db.Column(db.Integer, nullable=False)
     speaker_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
     raw_transcript = db.Column(db.Text, nullable=False)
     processed_transcript = db.Column(db.Text, default='')
+    processed_edits = db.Column(db.Text, nullable=True)  # JSON word-level edit list against raw_transcript
     language = db.Column(db.String(10), default='en')
     created_timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
@@ -19,6 +23,9 @@ class Transcript(db.Model):
 # ---------------- Summary Model ----------------
 class Summary(db.Model):
     __tablename__ = 'summaries'
+    __table_args__ = (
+        db.Index('ix_summaries_meeting_type_created', 'meeting_id', 'summary_type', 'created_timestamp'),
+    )
     summary_id = db.Column(db.Integer, primary_key=True)
     meeting_id = db.Column(db.Integer, nullable=False)
     summary_text = db.Column(db.Text, nullable=False)
@@ -28,6 +35,11 @@ class Summary(db.Model):
 # ---------------- ActionItem Model ----------------
 class ActionItem(db.Model):
     __tablename__ = 'action_items'
+    __table_args__ = (
+        db.Index('ix_action_items_meeting_created', 'meeting_id', 'created_timestamp'),
+        db.Index('ix_action_items_assigned_status', 'assigned_to', 'status'),
+        db.Index('ix_action_items_assigned_due', 'assigned_to', 'due_date'),
+    )
     action_item_id = db.Column(db.Integer, primary_key=True)
     meeting_id = db.Column(db.Integer, db.ForeignKey('meetings.meeting_id'), nullable=False)
     assigned_to = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=True)
@@ -38,6 +50,7 @@ class ActionItem(db.Model):
     due_date = db.Column(db.Date, nullable=True)
     notes = db.Column(db.Text, nullable=True)
     created_timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_timestamp = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     assignee = db.relationship("User", backref="tasks")
     meeting = db.relationship("Meeting", backref="tasks")
@@ -110,6 +123,9 @@ class User(db.Model, UserMixin):
 # ---------------- Meeting Model ----------------
 class Meeting(db.Model):
     __tablename__ = 'meetings'
+    __table_args__ = (
+        db.Index('ix_meetings_organizer_date', 'organizer_id', 'date_time'),
+    )
     meeting_id = db.Column(db.Integer, primary_key=True)
     org_id = db.Column(db.Integer, db.ForeignKey("organizations.org_id"), nullable=True)  # optional
     title = db.Column(db.String(255), nullable=False)
@@ -120,7 +136,10 @@ class Meeting(db.Model):
     meeting_type = db.Column(db.String(100), nullable=True)  # Added field for meeting type
     meeting_objectives = db.Column(db.Text, nullable=True)  # Added field for meeting objectives
     conference_active = db.Column(db.Boolean, default=False)
+    recurrence_rule = db.Column(db.String(255), nullable=True)  # RRULE subset, see app/calendar/recurrence.py
+    recurrence_until = db.Column(db.DateTime, nullable=True)  # end of the last occurrence; None repeats forever
     created_timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_timestamp = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     organizer = db.relationship("User", foreign_keys=[organizer_id], overlaps="meetings_organized")
 
@@ -131,6 +150,10 @@ class Meeting(db.Model):
 # ---------------- Participant Model ----------------
 class Participant(db.Model):
     __tablename__ = 'participants'
+    __table_args__ = (
+        db.Index('ix_participants_meeting_user', 'meeting_id', 'user_id'),
+        db.Index('ix_participants_user', 'user_id'),
+    )
     participant_id = db.Column(db.Integer, primary_key=True)
     meeting_id = db.Column(db.Integer, db.ForeignKey('meetings.meeting_id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
@@ -142,16 +165,23 @@ class Participant(db.Model):
 # ---------------- ChatMessage Model ----------------
 class ChatMessage(db.Model):
     __tablename__ = 'chat_messages'
+    __table_args__ = (
+        db.Index('ix_chat_messages_meeting_timestamp', 'meeting_id', 'timestamp', 'message_id'),
+    )
     message_id = db.Column(db.Integer, primary_key=True)
     meeting_id = db.Column(db.Integer, nullable=False)
     user_id = db.Column(db.Integer, nullable=True)
     username = db.Column(db.String(100), nullable=False)
     message = db.Column(db.Text, nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    client_id = db.Column(db.String(64), nullable=True)  # id the sender's browser generated
 
 # ---------------- CalendarEvent Model ----------------
 class CalendarEvent(db.Model):
     __tablename__ = 'calendar_events'
+    __table_args__ = (
+        db.Index('ix_calendar_events_user_start', 'user_id', 'start_date'),
+    )
     event_id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(255), nullable=False)
     event_type = db.Column(db.String(20), nullable=False)  # "meeting", "task", "custom"
@@ -159,29 +189,49 @@ class CalendarEvent(db.Model):
     end_date = db.Column(db.DateTime, nullable=True)
     related_id = db.Column(db.Integer, nullable=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
-    
+    recurrence_rule = db.Column(db.String(255), nullable=True)  # RRULE subset, see app/calendar/recurrence.py
+    recurrence_until = db.Column(db.DateTime, nullable=True)  # end of the last occurrence; None repeats forever
+    updated_timestamp = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
     user = db.relationship("User", back_populates="calendar_events")
 
 
 # ---------------- TaskFile Model ----------------
 class TaskFile(db.Model):
     __tablename__ = 'task_files'
+    __table_args__ = (
+        db.Index('ix_task_files_uploaded', 'uploaded_at'),
+        db.Index('ix_task_files_task', 'task_id'),
+    )
     file_id = db.Column(db.Integer, primary_key=True)
     task_id = db.Column(db.Integer, db.ForeignKey('action_items.action_item_id'), nullable=False)
     filename = db.Column(db.String(255), nullable=False)
+    blob_sha256 = db.Column(db.String(64), db.ForeignKey('stored_blobs.sha256'), nullable=True)  # None for legacy uploads
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     task = db.relationship("ActionItem", backref="files")
+    blob = db.relationship("StoredBlob")
+
+    @property
+    def file_url(self):
+        if self.blob is not None:
+            return self.blob.url
+        return f"/static/uploads/documents/{self.filename}"
 
 # ---------------- ChatFile Model ----------------
 class ChatFile(db.Model):
     __tablename__ = 'chat_files'
+    __table_args__ = (
+        db.Index('ix_chat_files_meeting_uploaded', 'meeting_id', 'uploaded_at'),
+        db.Index('ix_chat_files_uploaded', 'uploaded_at'),
+    )
     file_id = db.Column(db.Integer, primary_key=True)
     meeting_id = db.Column(db.Integer, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=True)
     username = db.Column(db.String(100), nullable=False)
     filename = db.Column(db.String(255), nullable=False)
     file_url = db.Column(db.String(255), nullable=False)
+    blob_sha256 = db.Column(db.String(64), db.ForeignKey('stored_blobs.sha256'), nullable=True)  # None for legacy uploads
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     user = db.relationship("User", back_populates="chat_files")
@@ -203,6 +253,10 @@ class Organization(db.Model):
 # ---------------- OrganizationMember Model ----------------
 class OrganizationMember(db.Model):
     __tablename__ = 'organization_members'
+    __table_args__ = (
+        db.Index('ix_organization_members_user_status', 'user_id', 'status'),
+        db.Index('ix_organization_members_org_user', 'org_id', 'user_id'),
+    )
     member_id = db.Column(db.Integer, primary_key=True)
     org_id = db.Column(db.Integer, db.ForeignKey('organizations.org_id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
@@ -227,3 +281,51 @@ class Invitation(db.Model):
     # Add relationship so you can reference the organization from the invitation
     organization = db.relationship("Organization", backref="invitations")
 
+
+# ---------------- AutocorrectChunk Model ----------------
+class AutocorrectChunk(db.Model):
+    __tablename__ = 'autocorrect_chunks'
+    # sha256 of model, prompt version and normalized chunk text
+    content_hash = db.Column(db.String(64), primary_key=True)
+    corrected_text = db.Column(db.Text, nullable=False)
+    created_timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+
+# ---------------- TaskExtractionState Model ----------------
+class TaskExtractionState(db.Model):
+    __tablename__ = 'task_extraction_state'
+    meeting_id = db.Column(db.Integer, db.ForeignKey('meetings.meeting_id'), primary_key=True)
+    # Highest transcript_id already processed for task extraction
+    last_transcript_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_timestamp = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# ---------------- OutboundEmail Model ----------------
+class OutboundEmail(db.Model):
+    __tablename__ = 'outbound_emails'
+    email_id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(255), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    html = db.Column(db.Text, nullable=False)
+    sender_name = db.Column(db.String(100), nullable=True)
+    sender_email = db.Column(db.String(255), nullable=True)  # None => MAIL_DEFAULT_SENDER
+    status = db.Column(db.String(20), default='queued', index=True)  # queued, sending, sent, failed
+    attempts = db.Column(db.Integer, default=0)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    claim_token = db.Column(db.String(32), nullable=True, index=True)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_timestamp = db.Column(db.DateTime, nullable=True)
+
+
+# ---------------- StoredBlob Model ----------------
+class StoredBlob(db.Model):
+    __tablename__ = 'stored_blobs'
+    sha256 = db.Column(db.String(64), primary_key=True)  # hex digest of the content
+    storage_path = db.Column(db.String(255), nullable=False)  # relative to the static folder
+    size = db.Column(db.BigInteger, nullable=False)
+    content_type = db.Column(db.String(255), nullable=True)
+    created_timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @property
+    def url(self):
+        return f"/static/{self.storage_path}"
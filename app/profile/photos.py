@@ -0,0 +1,236 @@
+# app/profile/photos.py
+
+import hashlib
+import io
+import logging
+import os
+import queue
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+from app.avatars import PROFILE_PICS_DIR, avatar_resolver
+from app.extensions import db
+from app.models import User
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; without it originals are stored as uploaded
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# Square WebP thumbnail sizes; profile_pic_url points at DEFAULT_SIZE
+AVATAR_SIZES = (32, 64, 128)
+DEFAULT_SIZE = 64
+WEBP_OPTIONS = {"quality": 82, "method": 4}
+
+# Content-hashed names are never rewritten, so they can be cached for a year
+HASHED_NAME = re.compile(r"^[0-9a-f]{16}(_\d+)?\.(webp|jpg|jpeg|png|gif)$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def sized_avatar(profile_pic_url, size):
+    """
+    The `size` px variant of a processed avatar path ("<hash>_64.webp" ->
+    "<hash>_128.webp"); other paths are returned unchanged.
+    """
+    if not profile_pic_url:
+        return profile_pic_url
+    return re.sub(r"_(\d+)\.(webp|jpg)$", lambda m: f"_{size}.{m.group(2)}", profile_pic_url)
+
+
+def make_thumbnails(data):
+    """
+    Decode an uploaded image and return {size: WebP bytes} for every
+    AVATAR_SIZES: EXIF orientation applied, centre-cropped to a square,
+    metadata (EXIF, GPS, ICC comments) dropped by re-encoding.
+    Raises ValueError for data that is not a decodable image.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image = ImageOps.exif_transpose(image)
+            image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+            image.load()
+    except Exception as e:
+        raise ValueError(f"Not a readable image: {e}") from e
+
+    variants = {}
+    for size in AVATAR_SIZES:
+        out = io.BytesIO()
+        ImageOps.fit(image, (size, size), Image.LANCZOS).save(out, "WEBP", **WEBP_OPTIONS)
+        variants[size] = out.getvalue()
+    return variants
+
+
+class NativeThreadPool:
+    """
+    A fixed number of OS threads for image decoding, separate from
+    eventlet's tpool (which runs password hashing), so a burst of uploads
+    cannot hold up logins and neither pool's size depends on the other.
+
+    Under eventlet the workers are unpatched threads fed from an unpatched
+    queue, as tpool does internally; the calling green thread polls for the
+    result with eventlet.sleep so the hub keeps running. Without eventlet
+    it is a plain ThreadPoolExecutor.
+    """
+
+    def __init__(self, threads=2, poll_interval=0.02):
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._jobs = None
+        self._executor = None
+        self._green_sleep = None
+
+    def _start(self):
+        try:
+            from eventlet import patcher, sleep
+        except ImportError:
+            patcher = None
+        if patcher is None or not patcher.is_monkey_patched("thread"):
+            self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="photo")
+            return
+        native_threading = patcher.original("threading")
+        self._jobs = patcher.original("queue").Queue()
+        self._green_sleep = sleep
+        for n in range(self.threads):
+            native_threading.Thread(target=self._work, name=f"photo-{n}", daemon=True).start()
+
+    def _work(self):
+        while True:
+            job = self._jobs.get()
+            try:
+                job["result"] = job["fn"](*job["args"])
+            except BaseException as e:
+                job["error"] = e
+            job["done"] = True
+
+    def run(self, fn, *args):
+        """
+        Run fn(*args) on a pool thread and return its result; only the
+        calling (green) thread waits.
+        """
+        if self._executor is None and self._jobs is None:
+            with self._lock:
+                if self._executor is None and self._jobs is None:
+                    self._start()
+        if self._executor is not None:
+            return self._executor.submit(fn, *args).result()
+
+        job = {"fn": fn, "args": args, "done": False}
+        self._jobs.put(job)
+        while not job["done"]:
+            self._green_sleep(self.poll_interval)
+        if "error" in job:
+            raise job["error"]
+        return job["result"]
+
+
+class ProfilePhotoProcessor:
+    """
+    Turns uploaded profile photos into small, metadata-free thumbnails in
+    the background.
+
+    update_photo hands the upload to submit(); a background task decodes it
+    on the processor's own native threads (off the eventlet hub, apart from
+    the password hashing pool), writes
+    <hash>_<size>.webp for every size into PROFILE_PICS_DIR and points
+    the user's profile_pic_url at the DEFAULT_SIZE WebP. Until then the
+    previous avatar keeps showing.
+
+    Without Pillow the upload is stored as-is under a content-hashed name.
+    """
+
+    def __init__(self, threads=2):
+        self.threads = threads
+        self._jobs = queue.Queue()
+        self._pool = NativeThreadPool(threads)
+        self._app = None
+
+    def start(self, app, socketio):
+        if self._app is not None:
+            return
+        self._app = app
+        socketio.start_background_task(self._run)
+
+    def submit(self, user_id, data, ext):
+        """
+        Queue an upload for processing. Without a running worker (scripts,
+        tests) or without Pillow it is handled right away. Returns the new
+        profile_pic_url when handled synchronously, else None.
+        Raises ValueError if the data is not an image.
+        """
+        if Image is None:
+            return self._store_original(user_id, data, ext)
+        # Header check only (no pixel decoding) so bad uploads fail in the request
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image.verify()
+        except Exception as e:
+            raise ValueError(f"Not a readable image: {e}") from e
+        if self._app is None:
+            return self.process(user_id, data)
+        self._jobs.put((user_id, data))
+        return None
+
+    def _run(self):
+        while True:
+            user_id, data = self._jobs.get()
+            try:
+                with self._app.app_context():
+                    self.process(user_id, data)
+            except Exception as e:
+                logger.error(f"Profile photo processing failed for user {user_id}: {e}")
+
+    def _folder(self):
+        folder = os.path.join(current_app.static_folder, PROFILE_PICS_DIR)
+        os.makedirs(folder, exist_ok=True)
+        return folder
+
+    def process(self, user_id, data):
+        """
+        Write the thumbnails for one upload and update the user. Returns the
+        new profile_pic_url.
+        """
+        digest = content_hash(data)
+        # Synchronous calls (no worker started) decode on the calling thread
+        execute = self._pool.run if self._app is not None else (lambda fn, *args: fn(*args))
+        variants = execute(make_thumbnails, data)
+
+        folder = self._folder()
+        for size, blob in variants.items():
+            name = f"{digest}_{size}.webp"
+            path = os.path.join(folder, name)
+            if not os.path.exists(path):
+                with open(path, "wb") as f:
+                    f.write(blob)
+            avatar_resolver.note_upload(f"{PROFILE_PICS_DIR}/{name}")
+        return self._set_profile_pic(user_id, f"{PROFILE_PICS_DIR}/{digest}_{DEFAULT_SIZE}.webp")
+
+    def _store_original(self, user_id, data, ext):
+        name = f"{content_hash(data)}.{ext}"
+        path = os.path.join(self._folder(), name)
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(data)
+        avatar_resolver.note_upload(f"{PROFILE_PICS_DIR}/{name}")
+        return self._set_profile_pic(user_id, f"{PROFILE_PICS_DIR}/{name}")
+
+    def _set_profile_pic(self, user_id, relative_url):
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        user.profile_pic_url = relative_url
+        db.session.commit()
+        avatar_resolver.invalidate(user_id)
+        return relative_url
+
+
+photo_processor = ProfilePhotoProcessor()
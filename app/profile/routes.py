@@ -1,10 +1,11 @@
 # app/profile/routes.py
 
-import os
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
+from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
-from passlib.hash import bcrypt
+from app.auth.passwords import hasher
+from app.avatars import avatar_url
+from app.profile.photos import photo_processor, sized_avatar, HASHED_NAME, IMMUTABLE_CACHE_CONTROL
 from app.models import User, db
 
 profile_bp = Blueprint("profile_bp", __name__, template_folder="templates")
@@ -15,15 +16,16 @@ ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif"}
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def path_exists_in_static(relative_path: str) -> bool:
+@profile_bp.after_app_request
+def cache_hashed_profile_pics(response):
     """
-    Given a relative path (e.g., "uploads/profile_pics/3_user.png"),
-    build the absolute path using current_app.static_folder and check if the file exists.
+    Processed avatars have content-hashed names and never change in place,
+    so browsers may keep them for a year.
     """
-    if not relative_path:
-        return False
-    full_path = os.path.join(current_app.static_folder, relative_path)
-    return os.path.isfile(full_path)
+    if request.path.startswith("/static/uploads/profile_pics/") and response.status_code == 200:
+        if HASHED_NAME.match(request.path.rsplit("/", 1)[-1]):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return response
 
 ##############################################################################
 # Update Profile Photo
@@ -45,20 +47,19 @@ def update_photo():
             flash("Invalid file type. Only PNG/JPG/JPEG/GIF are allowed.", "danger")
             return redirect(url_for("profile_bp.update_photo"))
         
-        # Secure filename and save file
-        filename = secure_filename(file.filename)
-        upload_folder = os.path.join(current_app.static_folder, "uploads", "profile_pics")
-        os.makedirs(upload_folder, exist_ok=True)
-        unique_filename = f"{current_user.user_id}_{filename}"
-        save_path = os.path.join(upload_folder, unique_filename)
-        file.save(save_path)
-        
-        # Store the relative URL (without '/static/')
-        relative_url = f"uploads/profile_pics/{unique_filename}"
-        current_user.profile_pic_url = relative_url
-        db.session.commit()
+        # Thumbnails are generated in the background under content-hashed
+        # names; profile_pic_url is updated once they are written
+        ext = secure_filename(file.filename).rsplit(".", 1)[1].lower()
+        try:
+            stored = photo_processor.submit(current_user.user_id, file.read(), ext)
+        except ValueError:
+            flash("The uploaded file is not a valid image.", "danger")
+            return redirect(url_for("profile_bp.update_photo"))
         
-        flash("Profile photo updated successfully!", "success")
+        if stored:
+            flash("Profile photo updated successfully!", "success")
+        else:
+            flash("Profile photo uploaded! It will appear in a moment.", "success")
         return redirect(url_for("dashboard_bp.dashboard"))
     
     return render_template("update_photo.html")
@@ -145,7 +146,7 @@ def change_password():
             flash("All fields are required.", "danger")
             return redirect(url_for("profile_bp.change_password"))
         
-        if not bcrypt.verify(current_password, current_user.password):
+        if not hasher.verify(current_password, current_user.password):
             flash("Current password is incorrect.", "danger")
             return redirect(url_for("profile_bp.change_password"))
         
@@ -153,7 +154,7 @@ def change_password():
             flash("New password and confirmation do not match.", "danger")
             return redirect(url_for("profile_bp.change_password"))
         
-        current_user.password = bcrypt.hash(new_password)
+        current_user.password = hasher.hash(new_password)
         db.session.commit()
         
         flash("Password changed successfully!", "success")
@@ -170,11 +171,11 @@ def change_password():
 def member_profile(user_id):
     """
     Renders a specific user's profile.
-    If the member's profile_pic_url is invalid, reset it to an empty string.
+    An invalid profile_pic_url shows the default avatar.
     """
     
     
     member = User.query.get_or_404(user_id)
-    if not path_exists_in_static(member.profile_pic_url):
-        member.profile_pic_url = "default-profile.png"
-    return render_template("member_profile.html", member=member)
+    # Profile page shows the large variant; everywhere else uses the 64 px one
+    member_avatar = avatar_url(member.user_id, sized_avatar(member.profile_pic_url, 128))
+    return render_template("member_profile.html", member=member, member_avatar=member_avatar)
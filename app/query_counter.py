@@ -0,0 +1,91 @@
+# app/query_counter.py
+
+import threading
+from contextlib import contextmanager
+
+from flask import g, request
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Counters active in the current thread (greenlet under eventlet)
+_local = threading.local()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    for counter in getattr(_local, "counters", ()):
+        counter.statements.append(statement)
+
+
+class QueryCounter:
+    """
+    Counts the SQL statements executed in the current thread while active.
+    An executemany (bulk insert/update) counts as one statement.
+
+        with QueryCounter() as queries:
+            ...
+        queries.count
+    """
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def __enter__(self):
+        _local.counters = getattr(_local, "counters", ()) + (self,)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _local.counters = tuple(c for c in _local.counters if c is not self)
+        return False
+
+
+@contextmanager
+def assert_max_queries(limit, label="block"):
+    """
+    Fail with AssertionError (listing the statements) if the wrapped block
+    runs more than `limit` SQL statements, e.g. to catch N+1 regressions:
+
+        with assert_max_queries(3, "send_invitations"):
+            send_invitations(meeting, html)
+    """
+    with QueryCounter() as counter:
+        yield counter
+    if counter.count > limit:
+        statements = "\n".join(f"  {i + 1}. {s.strip()}" for i, s in enumerate(counter.statements))
+        raise AssertionError(f"{label} ran {counter.count} queries (limit {limit}):\n{statements}")
+
+
+def init_request_query_counter(app):
+    """
+    Count the SQL statements of every request and report them in an
+    X-Query-Count response header (enable with QUERY_COUNT_HEADERS, meant
+    for development). Requests running more than QUERY_COUNT_WARN
+    statements are logged with the statements.
+    """
+    warn_above = app.config.get("QUERY_COUNT_WARN", 0)
+
+    @app.before_request
+    def _start_query_counter():
+        g.query_counter = QueryCounter().__enter__()
+
+    @app.after_request
+    def _query_count_header(response):
+        counter = g.get("query_counter")
+        if counter is None:
+            return response
+        response.headers["X-Query-Count"] = str(counter.count)
+        if warn_above and counter.count > warn_above:
+            statements = "\n".join(f"  {i + 1}. {s.strip()}" for i, s in enumerate(counter.statements))
+            app.logger.warning(f"{request.method} {request.path} ran {counter.count} queries:\n{statements}")
+        return response
+
+    @app.teardown_request
+    def _stop_query_counter(exc=None):
+        counter = g.pop("query_counter", None)
+        if counter is not None:
+            counter.__exit__(None, None, None)
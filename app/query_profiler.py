@@ -0,0 +1,130 @@
+# app/query_profiler.py
+
+import logging
+import re
+import threading
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.schema import CreateColumn
+
+from app.extensions import db
+
+logger = logging.getLogger(__name__)
+
+# "SCAN chat_messages" / "SCAN TABLE chat_messages AS c" without "USING ... INDEX"
+FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+
+
+def ensure_columns(engine):
+    """
+    Add every nullable model column that an existing table lacks.
+
+    db.create_all() only creates missing tables, so columns added to a model
+    would otherwise break every query on that table until the migration in
+    migrations/ is applied (flask db upgrade). Foreign keys are left to the
+    migration. Returns the "table.column" names added.
+    """
+    inspector = inspect(engine)
+    added = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable and column.server_default is None:
+                logger.error(f"Column {table.name}.{column.name} is missing and NOT NULL; run flask db upgrade")
+                continue
+            spec = CreateColumn(column).compile(dialect=engine.dialect)
+            with engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {engine.dialect.identifier_preparer.format_table(table)} ADD COLUMN {spec}"))
+            added.append(f"{table.name}.{column.name}")
+    if added:
+        logger.info(f"Added missing columns: {', '.join(added)}")
+    return added
+
+
+def ensure_indexes(engine):
+    """
+    Create every index declared on the models that the database lacks.
+
+    db.create_all() only creates missing tables, so indexes added to
+    existing tables would otherwise need a migration before they help.
+    Only missing indexes are created, so it is safe to run on every start.
+    Returns the names of the indexes created.
+    """
+    inspector = inspect(engine)
+    created = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=engine)
+                created.append(index.name)
+    if created:
+        logger.info(f"Created missing indexes: {', '.join(created)}")
+    return created
+
+
+def ensure_schema(engine):
+    """
+    Bring an existing database up to the models on start: missing columns,
+    then missing indexes (tables come from db.create_all()).
+    """
+    ensure_columns(engine)
+    ensure_indexes(engine)
+
+
+class FullScanLogger:
+    """
+    Development aid for SQLite: runs EXPLAIN QUERY PLAN for each distinct
+    SELECT the app executes and logs a warning for those that scan a whole
+    table, with the plan. Each statement is explained once per process.
+
+        FullScanLogger().install(db.engine)
+    """
+
+    def __init__(self):
+        self.full_scans = {}  # statement -> scanned tables
+        self._explained = set()
+        self._lock = threading.Lock()
+
+    def install(self, engine):
+        if engine.dialect.name != "sqlite":
+            logger.info("Full-scan logger only supports SQLite; not installed")
+            return False
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+        return True
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if executemany or not statement.lstrip().upper().startswith("SELECT"):
+            return
+        with self._lock:
+            if statement in self._explained:
+                return
+            self._explained.add(statement)
+
+        # A separate DBAPI cursor: the caller has not read its results yet
+        explain = conn.connection.cursor()
+        try:
+            explain.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+            plan = [row[-1] for row in explain.fetchall()]
+        except Exception as e:
+            logger.debug(f"EXPLAIN QUERY PLAN failed: {e}")
+            return
+        finally:
+            explain.close()
+
+        tables = [m.group(1) for m in map(FULL_SCAN.match, plan) if m]
+        if tables:
+            self.full_scans[statement] = tables
+            logger.warning(
+                "Full table scan on %s:\n  %s\n  plan: %s",
+                ", ".join(tables), " ".join(statement.split()), " | ".join(plan)
+            )
+
+
+full_scan_logger = FullScanLogger()
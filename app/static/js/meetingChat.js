@@ -20,11 +20,21 @@ chatSocket.on("connect", () => {
   console.log("Connected to chat namespace");
 });
 
+// Id for each message sent from this browser, echoed back in the broadcast
+function newClientId() {
+  if (window.crypto && crypto.randomUUID) {
+    return crypto.randomUUID();
+  }
+  return Date.now().toString(36) + Math.random().toString(36).slice(2);
+}
+
 // 3. On chat_message
-chatSocket.on("chat_message", (data) => {
-    const chatMessages = document.getElementById("chatMessages");
+function createChatMessage(data) {
     const msgDiv = document.createElement("div");
     msgDiv.classList.add("chat-message");
+    if (data.client_id) {
+      msgDiv.dataset.clientId = data.client_id;
+    }
 
     // Fallback to default-profile.png if profilePicUrl is empty
     const profilePicUrl =
@@ -44,10 +54,51 @@ chatSocket.on("chat_message", (data) => {
           <strong>${data.username}</strong> ${localTimeString}<br>${data.message}
       </div>
     `;
-    chatMessages.appendChild(msgDiv);
+    return msgDiv;
+}
+
+chatSocket.on("chat_message", (data) => {
+    const chatMessages = document.getElementById("chatMessages");
+    // Ignore a message that is already on screen
+    if (data.client_id && chatMessages.querySelector(`[data-client-id="${CSS.escape(data.client_id)}"]`)) {
+      return;
+    }
+    chatMessages.appendChild(createChatMessage(data));
     chatMessages.scrollTop = chatMessages.scrollHeight;
 });
 
+// Older messages, loaded a page at a time when scrolled to the top
+let loadingChatHistory = false;
+
+function loadOlderChatMessages() {
+    const chatMessages = document.getElementById("chatMessages");
+    const cursor = chatMessages.dataset.nextCursor;
+    if (!cursor || loadingChatHistory) return;
+    loadingChatHistory = true;
+    fetch(`/meetings/${meetingId}/chat_history?before=${encodeURIComponent(cursor)}`)
+      .then(response => response.json())
+      .then(data => {
+        // Keep the visible messages in place while prepending above them
+        const previousHeight = chatMessages.scrollHeight;
+        const fragment = document.createDocumentFragment();
+        data.messages.forEach(msg => fragment.appendChild(createChatMessage(msg)));
+        chatMessages.insertBefore(fragment, chatMessages.firstChild);
+        chatMessages.scrollTop += chatMessages.scrollHeight - previousHeight;
+        chatMessages.dataset.nextCursor = data.next_cursor || "";
+      })
+      .catch(error => console.error("Error loading older messages:", error))
+      .finally(() => { loadingChatHistory = false; });
+}
+
+(function () {
+    const chatMessages = document.getElementById("chatMessages");
+    if (!chatMessages) return;
+    chatMessages.scrollTop = chatMessages.scrollHeight;
+    chatMessages.addEventListener("scroll", () => {
+      if (chatMessages.scrollTop < 40) loadOlderChatMessages();
+    });
+})();
+
 // 4. Handle text messages
 document.getElementById("chatForm").addEventListener("submit", function (e) {
     e.preventDefault();
@@ -59,7 +110,8 @@ document.getElementById("chatForm").addEventListener("submit", function (e) {
         // Emit Socket.IO event to server
         chatSocket.emit("chat_message", {
             meeting_id: meetingId,
-            message: message
+            message: message,
+            client_id: newClientId()
         });
         chatInput.value = "";
     }
@@ -92,7 +144,8 @@ document.getElementById("fileForm").addEventListener("submit", function (event)
         chatSocket.emit("file_upload", {
           meeting_id: meetingId,
           filename: data.filename,
-          file_url: data.file_url
+          file_url: data.file_url,
+          client_id: newClientId()
         });
         fileInput.value = ""; // Clear file field after upload
       } else {
@@ -95,6 +95,63 @@ document.addEventListener("DOMContentLoaded", function () {
     alert(data.error);
   });
 
+  // Meeting-level "Auto Correct All" progress
+  const autocorrectAllStatus = document.getElementById("autocorrectAllStatus");
+  const autocorrectAllBtn = document.getElementById("autocorrectAllBtn");
+
+  transcriptionSocket.on("autocorrect_all_started", (data) => {
+    if (autocorrectAllBtn) autocorrectAllBtn.disabled = true;
+    if (autocorrectAllStatus) autocorrectAllStatus.textContent = `Correcting ${data.transcripts} transcripts...`;
+  });
+
+  transcriptionSocket.on("autocorrect_progress", (data) => {
+    const li = document.getElementById("transcript-li-" + data.transcript_id);
+    if (li) li.dataset.autocorrectProgress = `${data.done}/${data.total}`;
+  });
+
+  // Autocorrect sends word-level edits ([start, end, text] against the raw
+  // transcript words) instead of the full text; patch the view with them.
+  function renderEdits(element, edits) {
+    const words = (element.dataset.raw || "").split(/\s+/).filter(Boolean);
+    const sorted = edits.slice().sort((a, b) => a[0] - b[0] || a[1] - b[1]);
+    const out = [];
+    let pos = 0;
+    sorted.forEach(([start, end, text]) => {
+      out.push(...words.slice(pos, start));
+      if (text) out.push(text);
+      pos = Math.max(pos, end);
+    });
+    out.push(...words.slice(pos));
+    element.textContent = out.join(" ");
+  }
+
+  transcriptionSocket.on("autocorrect_patch", (data) => {
+    const transcriptElement = document.getElementById("transcript-text-" + data.transcript_id);
+    if (!transcriptElement) return;
+    transcriptElement.autocorrectEdits = (transcriptElement.autocorrectEdits || []).concat(data.edits);
+    renderEdits(transcriptElement, transcriptElement.autocorrectEdits);
+  });
+
+  transcriptionSocket.on("autocorrect_complete", (data) => {
+    const transcriptElement = document.getElementById("transcript-text-" + data.transcript_id);
+    if (!transcriptElement || !data.edits) return;
+    transcriptElement.autocorrectEdits = null;
+    renderEdits(transcriptElement, data.edits);
+  });
+
+  transcriptionSocket.on("autocorrect_error", (data) => {
+    console.error("[TranscriptionSocket] Autocorrect failed for transcript", data.transcript_id, data.error);
+  });
+
+  transcriptionSocket.on("autocorrect_all_complete", (data) => {
+    if (autocorrectAllBtn) autocorrectAllBtn.disabled = false;
+    if (autocorrectAllStatus) {
+      autocorrectAllStatus.textContent = data.failed.length
+        ? `${data.failed.length} transcripts could not be corrected.`
+        : "All transcripts corrected.";
+    }
+  });
+
   function createDialog(data) {
     const dialog = document.createElement("div");
     dialog.className = "transcript-dialog mb-3 p-2 border rounded";
@@ -133,6 +190,85 @@ document.addEventListener("DOMContentLoaded", function () {
     return dialog;
   }
 
+  /*****************************************************************
+   * Older saved transcripts, loaded a page at a time on scroll
+   *****************************************************************/
+  const transcriptListContainer = document.getElementById("transcriptListContainer");
+  const savedTranscriptsList = document.getElementById("savedTranscriptsList");
+  let loadingTranscripts = false;
+
+  function createSavedTranscriptItem(t) {
+    const li = document.createElement("li");
+    li.id = "transcript-li-" + t.transcript_id;
+    li.className = "list-group-item";
+
+    const header = document.createElement("div");
+    header.className = "d-flex justify-content-between align-items-center";
+    const speaker = document.createElement("strong");
+    speaker.textContent = t.speaker;
+    const speakerSpan = document.createElement("span");
+    speakerSpan.appendChild(speaker);
+    const timestampSpan = document.createElement("span");
+    timestampSpan.className = "text-muted";
+    timestampSpan.textContent = t.created_timestamp;
+    header.appendChild(speakerSpan);
+    header.appendChild(timestampSpan);
+
+    const text = document.createElement("div");
+    text.id = "transcript-text-" + t.transcript_id;
+    text.className = "mt-2";
+    text.dataset.raw = t.raw_transcript;
+    text.textContent = t.processed_transcript || t.raw_transcript;
+
+    const actions = document.createElement("div");
+    actions.className = "mt-2";
+    [
+      ["Auto Correct", "btn-warning", autoCorrectTranscript],
+      ["Edit", "btn-secondary", editTranscript],
+      ["Reset", "btn-info", resetTranscript],
+      ["Delete", "btn-danger", deleteTranscript]
+    ].forEach(([label, style, action]) => {
+      const button = document.createElement("button");
+      button.className = "btn btn-sm " + style;
+      button.textContent = label;
+      button.onclick = () => action(String(t.transcript_id));
+      actions.appendChild(button);
+      actions.appendChild(document.createTextNode(" "));
+    });
+
+    li.appendChild(header);
+    li.appendChild(text);
+    li.appendChild(actions);
+    return li;
+  }
+
+  function loadOlderTranscripts() {
+    const cursor = transcriptListContainer.dataset.nextCursor;
+    if (!cursor || loadingTranscripts) return;
+    loadingTranscripts = true;
+    fetch(`/meetings/${MEETING_ID}/transcript_history?before=${encodeURIComponent(cursor)}`)
+      .then(response => response.json())
+      .then(data => {
+        // Keep the visible transcripts in place while prepending above them
+        const previousHeight = transcriptListContainer.scrollHeight;
+        const fragment = document.createDocumentFragment();
+        data.transcripts.forEach(t => fragment.appendChild(createSavedTranscriptItem(t)));
+        savedTranscriptsList.insertBefore(fragment, savedTranscriptsList.firstChild);
+        transcriptListContainer.scrollTop += transcriptListContainer.scrollHeight - previousHeight;
+        transcriptListContainer.dataset.nextCursor = data.next_cursor || "";
+      })
+      .catch(error => console.error("Error loading older transcripts:", error))
+      .finally(() => { loadingTranscripts = false; });
+  }
+
+  if (transcriptListContainer && savedTranscriptsList) {
+    // Start at the newest transcripts; scrolling to the top loads older ones
+    transcriptListContainer.scrollTop = transcriptListContainer.scrollHeight;
+    transcriptListContainer.addEventListener("scroll", () => {
+      if (transcriptListContainer.scrollTop < 40) loadOlderTranscripts();
+    });
+  }
+
 
 
   /*****************************************************************
@@ -414,8 +550,25 @@ function autoCorrectTranscript(transcriptId) {
   }
 }
 
+// Auto-correct every transcript of the meeting; progress arrives over the socket.
+function autoCorrectAllTranscripts() {
+  if (!confirm("Do you want to auto correct all transcripts of this meeting?")) return;
+  fetch(`/meetings/${window.config.meetingId}/autocorrect_all`, {
+    method: "POST"
+  })
+  .then(response => response.json().then(data => ({ ok: response.ok, data })))
+  .then(({ ok, data }) => {
+    if (!ok) alert(data.error || "Failed to start auto correction.");
+  })
+  .catch(error => {
+    console.error("Error starting auto correction:", error);
+    alert("Failed to start auto correction.");
+  });
+}
+
 // Expose autoCorrectTranscript globally.
 window.autoCorrectTranscript = autoCorrectTranscript;
+window.autoCorrectAllTranscripts = autoCorrectAllTranscripts;
 
 // Expose functions globally so inline onclick attributes can access them.
 window.editTranscript = editTranscript;
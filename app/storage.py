@@ -0,0 +1,129 @@
+# app/storage.py
+
+import hashlib
+import logging
+import os
+import tempfile
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models import StoredBlob, ChatFile, TaskFile
+
+logger = logging.getLogger(__name__)
+
+BLOB_DIR = "uploads/blobs"
+CHUNK_SIZE = 1024 * 1024
+
+
+def blob_relative_path(digest, ext):
+    """
+    uploads/blobs/ab/cd/abcd...ef.pdf - fanned out so no directory grows huge.
+    """
+    suffix = f".{ext}" if ext else ""
+    return f"{BLOB_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{suffix}"
+
+
+def _extension(filename):
+    return filename.rsplit(".", 1)[1].lower() if "." in filename else ""
+
+
+def _hash_stream(stream):
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+        digest.update(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def _copy_to_temp(stream, folder, hash_while_writing):
+    """
+    Stream into a temporary file in `folder` (same filesystem, so the final
+    rename is atomic). Returns (temp path, sha256 or None, size).
+    """
+    os.makedirs(folder, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=folder, suffix=".part")
+    digest = hashlib.sha256() if hash_while_writing else None
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                if digest is not None:
+                    digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+    except Exception:
+        os.remove(temp_path)
+        raise
+    return temp_path, digest.hexdigest() if digest else None, size
+
+
+def store_upload(file):
+    """
+    Store an uploaded werkzeug FileStorage by content and return its
+    StoredBlob (added to the session; the caller commits).
+
+    - The upload is read in CHUNK_SIZE chunks and hashed with SHA-256.
+    - Content already stored is not written again; every upload of it
+      references the same blob.
+    - New content is written to a temporary file and renamed into its
+      hash-derived path, so a stored file is never overwritten.
+
+    Seekable uploads (werkzeug spools large ones to disk) are hashed before
+    anything is written; others are hashed while being copied.
+    """
+    static_folder = current_app.static_folder
+    ext = _extension(file.filename or "")
+    stream = file.stream
+    temp_path = None
+
+    if stream.seekable():
+        digest, size = _hash_stream(stream)
+        stream.seek(0)
+    else:
+        temp_path, digest, size = _copy_to_temp(stream, os.path.join(static_folder, BLOB_DIR, "tmp"), True)
+
+    blob = db.session.get(StoredBlob, digest)
+    if blob is not None and os.path.isfile(os.path.join(static_folder, blob.storage_path)):
+        if temp_path:
+            os.remove(temp_path)
+        return blob
+
+    relative_path = blob.storage_path if blob is not None else blob_relative_path(digest, ext)
+    final_path = os.path.join(static_folder, relative_path)
+    if temp_path is None:
+        temp_path, _, size = _copy_to_temp(stream, os.path.join(static_folder, BLOB_DIR, "tmp"), False)
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+    os.replace(temp_path, final_path)
+
+    if blob is None:
+        blob = StoredBlob(sha256=digest, storage_path=relative_path, size=size, content_type=file.mimetype or None)
+        try:
+            # A concurrent upload of the same content may have inserted it first
+            with db.session.begin_nested():
+                db.session.add(blob)
+        except IntegrityError:
+            blob = db.session.get(StoredBlob, digest)
+    return blob
+
+
+def release_blob(digest):
+    """
+    Delete a blob's file and row once no ChatFile or TaskFile references it.
+    Call after deleting a referencing row (in the same session). Returns
+    True if the blob was removed.
+    """
+    if not digest:
+        return False
+    if ChatFile.query.filter_by(blob_sha256=digest).first() or TaskFile.query.filter_by(blob_sha256=digest).first():
+        return False
+    blob = db.session.get(StoredBlob, digest)
+    if blob is None:
+        return False
+    path = os.path.join(current_app.static_folder, blob.storage_path)
+    db.session.delete(blob)
+    if os.path.exists(path):
+        os.remove(path)
+    return True
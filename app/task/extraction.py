@@ -0,0 +1,135 @@
+# app/task/extraction.py
+
+import re
+from datetime import datetime
+from difflib import SequenceMatcher
+
+from sqlalchemy import insert, update
+
+from app.config import Config
+from app.extensions import db
+from app.models import ActionItem, TaskExtractionState, Transcript
+from app.agent.structured_output import TASKS_SCHEMA, invoke_structured
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+# Fields a later extraction may fill in on an existing task, but never overwrite
+FILLABLE_FIELDS = ("assigned_to", "start_date", "due_date")
+
+
+def normalize_task_text(text):
+    return _NON_WORD.sub(" ", (text or "").lower()).strip()
+
+
+def task_similarity(a, b, threshold=0.0):
+    """
+    Similarity (0..1) of two normalized task descriptions; 0 for pairs
+    that cannot reach `threshold`.
+    """
+    if a == b:
+        return 1.0
+    matcher = SequenceMatcher(None, a, b, autojunk=False)
+    # Cheap upper bounds first; most pairs are rejected there
+    if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+        return 0.0
+    return matcher.ratio()
+
+
+def _parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+
+
+def merge_tasks(meeting_id, candidates, threshold=None):
+    """
+    Merge extracted task candidates into the meeting's tasks.
+
+    A candidate similar to an existing task (or to another candidate)
+    is a duplicate: it only fills empty assignee/dates of the existing
+    task, so user edits, comments and files are kept. The others are
+    inserted. Inserts and updates each go out as one bulk statement.
+    Returns (inserted, updated) counts.
+    """
+    threshold = Config.TASK_DEDUPE_THRESHOLD if threshold is None else threshold
+    existing = ActionItem.query.filter_by(meeting_id=meeting_id).all()
+    known = [(normalize_task_text(t.description), t) for t in existing]
+
+    inserts = []
+    updates = {}
+    for candidate in candidates:
+        norm = normalize_task_text(candidate["description"])
+        if not norm:
+            continue
+        match = None
+        best = threshold
+        for other_norm, other in known:
+            score = task_similarity(norm, other_norm, threshold)
+            if score >= best:
+                match, best = other, score
+                if score == 1.0:
+                    break
+
+        values = {
+            "assigned_to": candidate["assigned_to"],
+            "start_date": _parse_date(candidate["start_date"]),
+            "due_date": _parse_date(candidate["due_date"]),
+        }
+        if match is None:
+            row = dict(
+                values,
+                meeting_id=meeting_id,
+                description=candidate["description"],
+                status=candidate["status"],
+                priority=candidate["priority"],
+                created_timestamp=datetime.utcnow()
+            )
+            inserts.append(row)
+            known.append((norm, row))
+        elif isinstance(match, ActionItem):
+            pending = updates.setdefault(match.action_item_id, {"action_item_id": match.action_item_id})
+            for field in FILLABLE_FIELDS:
+                if getattr(match, field) is None and values[field] is not None and field not in pending:
+                    pending[field] = values[field]
+        # A match on a row inserted in this run is a duplicate candidate: drop it
+
+    updates = [u for u in updates.values() if len(u) > 1]
+    if inserts:
+        db.session.execute(insert(ActionItem), inserts)
+    if updates:
+        db.session.execute(update(ActionItem), updates)
+    return len(inserts), len(updates)
+
+
+def extract_tasks_incremental(meeting_id, llm, prompt, model_id, full=False):
+    """
+    Extract tasks from the transcripts added since the last extraction of
+    the meeting (all transcripts if `full`), merge them into the existing
+    tasks and move the meeting's high-water mark. Commits.
+    Raises StructuredOutputError if the model output is unusable; the
+    high-water mark is left as it was so the transcripts are retried.
+    """
+    state = db.session.get(TaskExtractionState, meeting_id)
+    mark = 0 if full or state is None else state.last_transcript_id
+
+    transcripts = (
+        Transcript.query
+        .filter(Transcript.meeting_id == meeting_id, Transcript.transcript_id > mark)
+        .order_by(Transcript.transcript_id.asc())
+        .all()
+    )
+    if not transcripts:
+        return {"transcripts": 0, "inserted": 0, "updated": 0}
+
+    text = " ".join(t.processed_transcript or t.raw_transcript for t in transcripts)
+    candidates = invoke_structured(
+        llm, prompt, {"text": text}, TASKS_SCHEMA,
+        model_id=model_id,
+        max_repairs=Config.STRUCTURED_OUTPUT_MAX_REPAIRS
+    )
+    inserted, updated = merge_tasks(meeting_id, candidates)
+
+    if state is None:
+        state = TaskExtractionState(meeting_id=meeting_id)
+        db.session.add(state)
+    state.last_transcript_id = max(mark, transcripts[-1].transcript_id)
+    db.session.commit()
+    return {"transcripts": len(transcripts), "inserted": inserted, "updated": updated}
@@ -13,11 +13,14 @@ from app.config import Config
 from flask_login import current_user
 from app.models import ActionItem, User, Meeting, TaskComment, TaskFile
 from app.extensions import db
+from app.avatars import avatar_url
+from app.storage import store_upload, release_blob
 from datetime import datetime
 
 import os
 from werkzeug.utils import secure_filename
 
+# Uploads from before content-addressed storage (app/storage.py)
 UPLOAD_FOLDER = os.path.join("app", "static", "uploads", "documents")
 ALLOWED_EXTENSIONS = {"pdf", "doc", "docx", "xls", "xlsx", "png", "jpg", "jpeg", "zip"}
 
@@ -65,20 +68,15 @@ def new_task():
         db.session.add(task)
         db.session.commit()
         
-                # Ensure the upload directory exists
-        if not os.path.exists(UPLOAD_FOLDER):
-            os.makedirs(UPLOAD_FOLDER)
-        
-        # Handle File Uploads
+        # Handle File Uploads (content-addressed; identical files are stored once)
         if "task_files" in request.files:
             files = request.files.getlist("task_files")
             for file in files:
                 if file and allowed_file(file.filename):
                     filename = secure_filename(file.filename)
-                    filepath = os.path.join(UPLOAD_FOLDER, filename)
-                    file.save(filepath)
+                    blob = store_upload(file)
 
-                    task_file = TaskFile(task_id=task.action_item_id, filename=filename)
+                    task_file = TaskFile(task_id=task.action_item_id, filename=filename, blob_sha256=blob.sha256)
                     db.session.add(task_file)
 
             db.session.commit()
@@ -111,20 +109,15 @@ def edit_task(task_id):
         
         db.session.commit()
         
-                # Ensure the upload directory exists
-        if not os.path.exists(UPLOAD_FOLDER):
-            os.makedirs(UPLOAD_FOLDER)
-        
-        # Handle File Uploads
+        # Handle File Uploads (content-addressed; identical files are stored once)
         if "task_files" in request.files:
             files = request.files.getlist("task_files")
             for file in files:
                 if file and allowed_file(file.filename):
                     filename = secure_filename(file.filename)
-                    filepath = os.path.join(UPLOAD_FOLDER, filename)
-                    file.save(filepath)
+                    blob = store_upload(file)
 
-                    task_file = TaskFile(task_id=task.action_item_id, filename=filename)
+                    task_file = TaskFile(task_id=task.action_item_id, filename=filename, blob_sha256=blob.sha256)
                     db.session.add(task_file)
 
             db.session.commit()
@@ -135,14 +128,11 @@ def edit_task(task_id):
         return redirect(url_for("task_bp.tasks", task_id=task.action_item_id))
 
     users = User.query.all()
-    for user in users:
-        if user.profile_pic_url:
-            user.profile_pic_url = f"/static/{user.profile_pic_url}"
-        else:
-            user.profile_pic_url = "/static/default-profile.png"
+    # Validated avatar URLs for the comment list, without touching the User rows
+    avatars = {user.user_id: avatar_url(user.user_id, user.profile_pic_url) for user in users}
 
     meetings = Meeting.query.filter_by(organizer_id=current_user.user_id).all()
-    return render_template("task_form.html", task=task, users=users, meetings=meetings)
+    return render_template("task_form.html", task=task, users=users, meetings=meetings, avatars=avatars)
 
 
 @task_bp.route("/<int:task_id>/delete", methods=["POST"])
@@ -194,13 +184,16 @@ def add_comment(task_id):
 def delete_file(file_id):
     """ Delete a file attached to a task. """
     file = TaskFile.query.get_or_404(file_id)
-    file_path = os.path.join(UPLOAD_FOLDER, file.filename)
-
-    # Remove the file from storage
-    if os.path.exists(file_path):
-        os.remove(file_path)
 
     db.session.delete(file)
+    db.session.flush()
+    # Remove the stored content once no other chat/task file references it
+    if file.blob_sha256:
+        release_blob(file.blob_sha256)
+    else:
+        file_path = os.path.join(UPLOAD_FOLDER, file.filename)
+        if os.path.exists(file_path):
+            os.remove(file_path)
     db.session.commit()
     
     flash("File deleted successfully!", "success")
@@ -0,0 +1,334 @@
+# app/transcription/autocorrect.py
+
+import hashlib
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from langchain_ibm import WatsonxLLM
+from langchain_core.prompts import PromptTemplate
+
+from app.config import Config
+from app.extensions import db
+from app.models import AutocorrectChunk, Transcript
+from app.transcription.edits import apply_edits, dump_edits, word_edits
+
+logger = logging.getLogger(__name__)
+
+AUTOCORRECT_TEMPLATE = """
+Correct grammar without changing original meaning of transcript to keep speakers style.
+
+Text to correct:
+{text}
+
+Output only the final corrected text. No explanation or description.
+"""
+# Bump when the prompt changes so cached corrections are not reused
+PROMPT_VERSION = "1"
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+_llm = None
+_llm_lock = threading.Lock()
+
+# Bounded pool shared by every autocorrect request
+_executor = ThreadPoolExecutor(max_workers=Config.AUTOCORRECT_MAX_WORKERS, thread_name_prefix="autocorrect")
+
+# Meetings with an "autocorrect all" job in progress
+_running_meetings = set()
+_running_lock = threading.Lock()
+
+
+def get_autocorrect_llm():
+    """
+    One WatsonxLLM client per process for all autocorrect calls.
+    """
+    global _llm
+    if _llm is None:
+        with _llm_lock:
+            if _llm is None:
+                _llm = WatsonxLLM(
+                    model_id=Config.WATSONX_MODEL_ID_1,
+                    url=Config.WATSONX_URL,
+                    project_id=Config.WATSONX_PROJECT_ID,
+                    apikey=Config.WATSONX_API_KEY,
+                    params={
+                        "decoding_method": "sample",
+                        "max_new_tokens": 1200,
+                        "temperature": 0.8,
+                        "top_k": 25,
+                        "top_p": 1,
+                    }
+                )
+    return _llm
+
+
+def split_into_chunks(text, max_chars=None):
+    """
+    Split text into chunks of at most `max_chars`, cutting on sentence
+    boundaries. Sentences longer than a chunk (STT output often has no
+    punctuation) are cut on word boundaries. Chunks never split a word, so
+    their words line up with text.split() (edit lists rely on this).
+    """
+    max_chars = max_chars or Config.AUTOCORRECT_CHUNK_CHARS
+    chunks = []
+    current = ""
+    for sentence in _SENTENCE_END.split((text or "").strip()):
+        sentence = sentence.strip()
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            if cut <= 0:
+                cut = sentence.find(" ", max_chars)
+                if cut < 0:
+                    break
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if not sentence:
+            continue
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def chunk_hash(chunk):
+    normalized = " ".join(chunk.split())
+    key = f"{Config.WATSONX_MODEL_ID_1}|{PROMPT_VERSION}|{normalized}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def correct_chunk(chunk):
+    """
+    Run one chunk through the model. Called from the worker pool, so it
+    must not touch the database session.
+    """
+    chain = PromptTemplate.from_template(AUTOCORRECT_TEMPLATE) | get_autocorrect_llm()
+    return chain.invoke({"text": chunk}).strip()
+
+
+def load_cached(hashes):
+    if not hashes:
+        return {}
+    rows = AutocorrectChunk.query.filter(AutocorrectChunk.content_hash.in_(list(hashes))).all()
+    return {row.content_hash: row.corrected_text for row in rows}
+
+
+def correct_chunks(chunks_by_hash, on_done=None):
+    """
+    Correct the given {hash: chunk} concurrently on the shared pool,
+    skipping hashes already corrected earlier. New corrections are stored.
+    `on_done(hash, corrected_text, error)` is called as each chunk finishes,
+    from the calling thread. Returns {hash: corrected_text}.
+    """
+    corrected = load_cached(chunks_by_hash.keys())
+    for h in corrected:
+        if on_done:
+            on_done(h, corrected[h], None)
+
+    futures = {
+        _executor.submit(correct_chunk, chunk): h
+        for h, chunk in chunks_by_hash.items() if h not in corrected
+    }
+    for future in as_completed(futures):
+        h = futures[future]
+        try:
+            text = future.result()
+        except Exception as e:
+            logger.error(f"Autocorrect chunk failed: {e}")
+            if on_done:
+                on_done(h, None, e)
+            continue
+        corrected[h] = text
+        db.session.merge(AutocorrectChunk(content_hash=h, corrected_text=text))
+        if on_done:
+            on_done(h, text, None)
+    db.session.commit()
+    return corrected
+
+
+def _chunk_offsets(chunks):
+    """
+    Word offset of each chunk inside the whole text.
+    """
+    offsets = []
+    offset = 0
+    for chunk in chunks:
+        offsets.append(offset)
+        offset += len(chunk.split())
+    return offsets
+
+
+def save_correction(transcript, edits):
+    """
+    Store a correction as edit list plus the rebuilt text. The caller commits.
+    """
+    transcript.processed_edits = dump_edits(edits)
+    transcript.processed_transcript = apply_edits(transcript.raw_transcript, edits)
+
+
+def correct_transcript(transcript):
+    """
+    Autocorrect a single transcript through the chunked, cached pipeline.
+    Returns the edit list against raw_transcript.
+    """
+    chunks = split_into_chunks(transcript.raw_transcript)
+    hashes = [chunk_hash(c) for c in chunks]
+    corrected = correct_chunks(dict(zip(hashes, chunks)))
+    edits = []
+    for h, chunk, offset in zip(hashes, chunks, _chunk_offsets(chunks)):
+        # A failed chunk keeps its original wording
+        if h in corrected:
+            edits.extend(word_edits(chunk, corrected[h], offset))
+    save_correction(transcript, edits)
+    return edits
+
+
+def stream_transcript_correction(transcript):
+    """
+    Correct a transcript chunk after chunk, yielding the edits of each
+    chunk as soon as it is done (empty chunks of edits are skipped).
+    Chunks corrected before are served from the cache; the others go to
+    the model and are stored. The correction is saved on the transcript
+    at the end; the caller commits.
+    """
+    chunks = split_into_chunks(transcript.raw_transcript)
+    hashes = [chunk_hash(c) for c in chunks]
+    cached = load_cached(hashes)
+
+    edits = []
+    for h, chunk, offset in zip(hashes, chunks, _chunk_offsets(chunks)):
+        if h not in cached:
+            cached[h] = correct_chunk(chunk)
+            db.session.merge(AutocorrectChunk(content_hash=h, corrected_text=cached[h]))
+        patch = word_edits(chunk, cached[h], offset)
+        if patch:
+            edits.extend(patch)
+            yield patch
+    save_correction(transcript, edits)
+
+
+def start_meeting_autocorrect(app, socketio, meeting_id):
+    """
+    Start the "autocorrect all" job for a meeting in the background.
+    Returns False if a job for that meeting is already running.
+    """
+    with _running_lock:
+        if meeting_id in _running_meetings:
+            return False
+        _running_meetings.add(meeting_id)
+    socketio.start_background_task(_run_meeting_autocorrect, app, socketio, meeting_id)
+    return True
+
+
+def _run_meeting_autocorrect(app, socketio, meeting_id):
+    try:
+        with app.app_context():
+            autocorrect_meeting(socketio, meeting_id)
+    except Exception as e:
+        logger.error(f"Autocorrect job for meeting {meeting_id} failed: {e}")
+        socketio.emit(
+            "error_message",
+            {"error": f"Autocorrect failed: {e}"},
+            namespace="/transcription",
+            room=f"meeting_{meeting_id}"
+        )
+    finally:
+        with _running_lock:
+            _running_meetings.discard(meeting_id)
+
+
+def autocorrect_meeting(socketio, meeting_id):
+    """
+    Autocorrect every transcript of a meeting as one job.
+
+    All transcripts are split into chunks up front, identical chunks are
+    corrected once, and chunks are processed concurrently. Progress is
+    emitted per transcript on /transcription to meeting_{id}:
+      - autocorrect_progress   {transcript_id, done, total}
+      - autocorrect_complete   {transcript_id, edits}
+      - autocorrect_all_complete when every transcript is done
+    """
+    room = f"meeting_{meeting_id}"
+    transcripts = Transcript.query.filter_by(meeting_id=meeting_id).order_by(Transcript.created_timestamp.asc()).all()
+
+    plan = {}
+    chunks_by_hash = {}
+    for t in transcripts:
+        chunks = split_into_chunks(t.raw_transcript)
+        if not chunks:
+            continue
+        hashes = [chunk_hash(c) for c in chunks]
+        plan[t.transcript_id] = {
+            "transcript": t,
+            "chunks": chunks,
+            "hashes": hashes,
+            "offsets": _chunk_offsets(chunks),
+            "done": set(),
+            "failed": False
+        }
+        chunks_by_hash.update(zip(hashes, chunks))
+
+    # Which transcripts wait on each chunk
+    waiting = {}
+    for transcript_id, item in plan.items():
+        for h in item["hashes"]:
+            waiting.setdefault(h, set()).add(transcript_id)
+
+    socketio.emit("autocorrect_all_started", {
+        "meeting_id": meeting_id,
+        "transcripts": len(plan),
+        "chunks": len(chunks_by_hash)
+    }, namespace="/transcription", room=room)
+
+    results = {}
+
+    def on_done(h, text, error):
+        results[h] = text
+        for transcript_id in waiting.get(h, ()):
+            item = plan[transcript_id]
+            item["done"].add(h)
+            item["failed"] = item["failed"] or error is not None
+            total = len(set(item["hashes"]))
+            socketio.emit("autocorrect_progress", {
+                "transcript_id": transcript_id,
+                "done": len(item["done"]),
+                "total": total
+            }, namespace="/transcription", room=room)
+            if len(item["done"]) == total:
+                _finish_transcript(socketio, room, item, results)
+
+    correct_chunks(chunks_by_hash, on_done=on_done)
+    db.session.commit()
+
+    socketio.emit("autocorrect_all_complete", {
+        "meeting_id": meeting_id,
+        "transcripts": len(plan),
+        "failed": [tid for tid, item in plan.items() if item["failed"]]
+    }, namespace="/transcription", room=room)
+
+
+def _finish_transcript(socketio, room, item, results):
+    transcript = item["transcript"]
+    if item["failed"]:
+        socketio.emit("autocorrect_error", {
+            "transcript_id": transcript.transcript_id,
+            "error": "Some parts of this transcript could not be corrected."
+        }, namespace="/transcription", room=room)
+        return
+    edits = []
+    for h, chunk, offset in zip(item["hashes"], item["chunks"], item["offsets"]):
+        edits.extend(word_edits(chunk, results[h], offset))
+    save_correction(transcript, edits)
+    # Clients rebuild the text from raw_transcript and the changed spans
+    socketio.emit("autocorrect_complete", {
+        "transcript_id": transcript.transcript_id,
+        "edits": edits
+    }, namespace="/transcription", room=room)
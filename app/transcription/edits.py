@@ -0,0 +1,52 @@
+# app/transcription/edits.py
+
+import json
+from difflib import SequenceMatcher
+
+# An edit list is a compact JSON array of [start, end, text] entries:
+# raw words [start:end] are replaced by `text` (end == start inserts,
+# empty text deletes). Word indexes refer to raw_transcript.split().
+
+
+def word_edits(raw, corrected, offset=0):
+    """
+    Word-level diff of `corrected` against `raw`, with word indexes
+    shifted by `offset` (position of `raw` inside the whole transcript).
+    """
+    a = raw.split()
+    b = corrected.split()
+    edits = []
+    for op, i1, i2, j1, j2 in SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if op != "equal":
+            edits.append([i1 + offset, i2 + offset, " ".join(b[j1:j2])])
+    return edits
+
+
+def apply_edits(raw, edits):
+    """
+    Rebuild the corrected text from the raw text and an edit list.
+    """
+    words = raw.split()
+    out = []
+    pos = 0
+    # Inserts sort before a replace starting at the same word
+    for start, end, text in sorted(edits, key=lambda e: (e[0], e[1])):
+        out.extend(words[pos:start])
+        if text:
+            out.append(text)
+        pos = max(pos, end)
+    out.extend(words[pos:])
+    return " ".join(out)
+
+
+def dump_edits(edits):
+    return json.dumps(edits, separators=(",", ":"))
+
+
+def load_edits(value):
+    if not value:
+        return []
+    try:
+        return json.loads(value)
+    except ValueError:
+        return []
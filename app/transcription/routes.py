@@ -9,6 +9,10 @@ from flask_socketio import SocketIO, emit, join_room
 from threading import Lock
 from app.config import Config
 from app.transcription.transcription import TranscriptionSession
+from app.transcription.autocorrect import stream_transcript_correction
+from app.transcription.edits import load_edits
+from app.agent.structured_output import StructuredOutputError
+from app.task.extraction import extract_tasks_incremental
 from app.models import db, Transcript, Summary, Meeting, ActionItem  # Ensure the Transcript model is imported
 from flask_login import current_user
 
@@ -55,6 +59,7 @@ def update_transcript(transcript_id):
 
     transcript = Transcript.query.get_or_404(transcript_id)
     transcript.processed_transcript = new_text
+    transcript.processed_edits = None  # hand edits are stored as text only
     db.session.commit()
 
     return jsonify({
@@ -91,71 +96,20 @@ def autocorrect_transcript(transcript_id):
     meeting_id = transcript.meeting_id  # ✅ Get the meeting_id dynamically
     # Ensure we are emitting to the correct room
     meeting_room = f"meeting_{meeting_id}"  # ✅ Correct room
-    # Determine which field to correct. Often you'd correct the raw_transcript,
-    # or if the user has previously edited it, you might use processed_transcript.
-    text_to_correct = transcript.raw_transcript.strip()
-
-    # Use your WatsonxLLM or whichever LLM you have configured.
-    # For example:
-    from langchain_ibm import WatsonxLLM
-    from langchain_core.prompts import PromptTemplate
-    from app.config import Config
-
-    watsonx_llm = WatsonxLLM(
-        model_id=Config.WATSONX_MODEL_ID_1,
-        url=Config.WATSONX_URL,
-        project_id=Config.WATSONX_PROJECT_ID,
-        apikey=Config.WATSONX_API_KEY,
-        # Model parameters, etc.
-        params={
-            "decoding_method": "sample",
-            "max_new_tokens": 1200,
-            "temperature": 0.8,
-            "top_k": 25,
-            "top_p": 1,
-        }
-    )
-
-    # Create a prompt that instructs the model to correct grammar/punctuation.
-    # Emphasize minimal alteration to preserve the speaker’s meaning.
-    template = """
-    You are a professional editor. Your task is to correct the following text by fixing grammar and punctuation errors **without changing its original meaning or style**.
-
-    Input text:
-    {text}
-
-    Output Format:
-    - Only return the corrected text.
-    - Do not provide explanations, steps, or any additional formatting.
-    - Do not add any headings, lists, or markdown-style sections.
-    - Do not say "Here is the final corrected text".
-
-    Output:
-    """
-
-    prompt = PromptTemplate.from_template(template)
-    llm_chain = prompt | watsonx_llm
-    
-    # Generate the corrected text
-    corrected_text = llm_chain.stream({"text": text_to_correct})
-    
-    accumulator = ""
-    for chunk in corrected_text:
-        accumulator += chunk
-        print(chunk)
-        #socketio.emit("autocorrect_update", {"transcript_id": transcript_id, "chunk": chunk}, namespace="/transcription")
-        socketio.emit("autocorrect_update", {"transcript_id": transcript_id, "chunk": chunk}, namespace="/transcription", room=meeting_room)
+    # Only the changed word spans of each corrected chunk are sent;
+    # clients patch their view of raw_transcript with them.
+    for patch in stream_transcript_correction(transcript):
+        socketio.emit("autocorrect_patch", {"transcript_id": transcript_id, "edits": patch}, namespace="/transcription", room=meeting_room)
     
     print("Auto Correction complete")
     
     
-    # After streaming save the full corrected text
-    transcript.processed_transcript = accumulator.strip()
+    # After streaming save the edit list and the corrected text
     db.session.commit()
     
     
     # Notify frontend that autocorrect is complete
-    socketio.emit("autocorrect_complete", {"transcript_id": transcript_id, "processed_transcript": transcript.processed_transcript}, namespace="/transcription", room=meeting_room)
+    socketio.emit("autocorrect_complete", {"transcript_id": transcript_id, "edits": load_edits(transcript.processed_edits)}, namespace="/transcription", room=meeting_room)
 
 
     #emit("autocorrect_complete", {"transcript_id": transcript_id, "processed_transcript": transcript.processed_transcript}, namespace="/transcription", room=request.)
@@ -169,6 +123,7 @@ def reset_transcript(transcript_id):
     transcript = Transcript.query.get_or_404(transcript_id)
     # Clear the processed transcript so the raw transcript is used on display.
     transcript.processed_transcript = ''
+    transcript.processed_edits = None
     db.session.commit()
 
     return jsonify({
@@ -179,6 +134,7 @@ def reset_transcript(transcript_id):
 
 
 import json  # Add at the top along with other imports
+from datetime import datetime
 
 # In the create_app() function, after your existing transcript routes:
 
@@ -196,13 +152,6 @@ def extract_tasks():
     except ValueError:
         return jsonify({"error": "Invalid meeting_id"}), 400
 
-    # Get all transcripts for the meeting and aggregate the text.
-    transcripts = Transcript.query.filter_by(meeting_id=meeting_id).all()
-    full_text = " ".join([
-        t.processed_transcript if t.processed_transcript else t.raw_transcript
-        for t in transcripts
-    ])
-    
     # Use your LLM to extract tasks.
     from langchain_ibm import WatsonxLLM
     from langchain_core.prompts import PromptTemplate
@@ -238,39 +187,18 @@ def extract_tasks():
     Output:
     """
     prompt = PromptTemplate.from_template(prompt_template)
-    llm_chain = prompt | watsonx_llm
 
-    result = llm_chain.invoke({"text": full_text})
+    # Process only transcripts added since the last extraction and merge
+    # the results into the existing action items.
     try:
-        tasks = json.loads(result)
-    except Exception as e:
-        return jsonify({"error": "Failed to parse tasks JSON", "details": str(e), "raw_output": result}), 500
-
-    # Delete existing action items for the meeting
-    existing_tasks = ActionItem.query.filter_by(meeting_id=meeting_id).all()
-    for task in existing_tasks:
-        db.session.delete(task)
-    db.session.commit()
-
-    # Create new action items
-    new_tasks = []
-    for task_data in tasks:
-        description = task_data.get("description", "").strip()
-        if not description:
-            continue  # Skip tasks with no description
-        new_task = ActionItem(
-            meeting_id=meeting_id,
-            description=description,
-            assigned_to=task_data.get("assigned_to"),
-            status=task_data.get("status", "pending"),
-            priority=task_data.get("priority", "medium"),
-            start_date=task_data.get("start_date") if task_data.get("start_date") else None,
-            due_date=task_data.get("due_date") if task_data.get("due_date") else None,
+        result = extract_tasks_incremental(
+            meeting_id, watsonx_llm, prompt, Config.WATSONX_MODEL_ID_2,
+            full=bool(data.get("full"))
         )
-        db.session.add(new_task)
-        new_tasks.append(new_task)
-    db.session.commit()
+    except StructuredOutputError as e:
+        return jsonify({"error": "Failed to parse tasks JSON", "details": str(e), "raw_output": e.raw_output}), 500
 
+    tasks = ActionItem.query.filter_by(meeting_id=meeting_id).order_by(ActionItem.action_item_id.asc()).all()
     tasks_list = [{
         "action_item_id": t.action_item_id,
         "description": t.description,
@@ -280,9 +208,9 @@ def extract_tasks():
         "start_date": t.start_date.isoformat() if t.start_date else None,
         "due_date": t.due_date.isoformat() if t.due_date else None,
         "created_timestamp": t.created_timestamp.strftime("%Y-%m-%d %H:%M:%S")
-    } for t in new_tasks]
+    } for t in tasks]
 
-    return jsonify({"tasks": tasks_list})
+    return jsonify({"tasks": tasks_list, **result})
 
 
 @transcription_bp.route("/action_item/<int:action_item_id>/update_status", methods=["POST"])
@@ -50,6 +50,21 @@ class WSRecognizeCallback(RecognizeCallback):
         self.full_transcript = ""
         self.app = app
         self.socketio = socketio_instance
+        self._speaker_info = None
+
+    def _speaker(self):
+        """
+        Username and profile picture of the speaker, loaded once per session
+        instead of twice per STT result.
+        """
+        if self._speaker_info is None:
+            from app.avatars import avatar_url
+            from app.models import User
+            user = User.query.get(self.user_id)
+            username = user.username if user else "Unknown"
+            profile_pic = avatar_url(self.user_id, user.profile_pic_url if user else None)
+            self._speaker_info = (username, profile_pic)
+        return self._speaker_info
 
     def on_data(self, data):
         # Push an application context for each callback execution.
@@ -61,18 +76,7 @@ class WSRecognizeCallback(RecognizeCallback):
                 print("Watson STT returned empty results.")
                 return
 
-            def get_username(user_id):
-                from app.models import User
-                user = User.query.get(user_id)
-                return user.username if user else "Unknown"
-
-            def get_profile_pic(user_id):
-                from app.models import User
-                user = User.query.get(user_id)
-                if user and user.profile_pic_url:
-                    return f"/static/{user.profile_pic_url}"
-                else:
-                    return "/static/default-profile.png"
+            speaker_username, speaker_pic = self._speaker()
 
             for result in data["results"]:
                 transcript_text = result["alternatives"][0]["transcript"].strip()
@@ -80,8 +84,8 @@ class WSRecognizeCallback(RecognizeCallback):
                 payload = {
                     "transcript": transcript_text,
                     "speaker_id": self.user_id,
-                    "speaker_username": get_username(self.user_id),
-                    "profile_pic_url": get_profile_pic(self.user_id),
+                    "speaker_username": speaker_username,
+                    "profile_pic_url": speaker_pic,
                     "created_timestamp": transcript_created.isoformat(),
                     "final": result.get("final", False)
                 }
@@ -2,12 +2,29 @@
 from flask import current_app
 from flask_socketio import join_room
 from app.extensions import SocketIO
+from app.websockets.identity import authenticate_socket, socket_identity, forget_socket
 
 def register_agent_events(socketio: SocketIO):
+
+    @socketio.on('connect', namespace="/agent")
+    def handle_connect(auth=None):
+        if authenticate_socket() is None:
+            return False
+
+    @socketio.on('disconnect', namespace="/agent")
+    def handle_disconnect(*args):
+        forget_socket()
     
     @socketio.on('join', namespace="/agent")
     def handle_join(data):
         room = data.get('room')
-        if room:
-            join_room(room)
-            current_app.logger.info(f"Client joined room: {room}")
\ No newline at end of file
+        if not room:
+            return
+        # Rooms are meeting_<id>; meeting_0 is the agent page without a meeting
+        identity = socket_identity()
+        meeting_id = room[len("meeting_"):] if room.startswith("meeting_") else None
+        if identity is None or (meeting_id != "0" and not identity.can_join(meeting_id)):
+            current_app.logger.info(f"Refused join to room: {room}")
+            return
+        join_room(room)
+        current_app.logger.info(f"Client joined room: {room}")
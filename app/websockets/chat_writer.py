@@ -0,0 +1,187 @@
+# app/websockets/chat_writer.py
+
+import atexit
+import logging
+import re
+import signal
+import threading
+from collections import deque
+
+from sqlalchemy import insert
+
+from app.config import Config
+from app.extensions import db
+from app.models import ChatMessage
+
+logger = logging.getLogger(__name__)
+
+CLIENT_ID_MAX_LENGTH = ChatMessage.__table__.c.client_id.type.length
+# Browsers use the id in a CSS selector; UUIDs and base-36 ids both fit
+CLIENT_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]+")
+
+
+def clean_client_id(value):
+    """
+    The browser-generated message id if it is a string of [A-Za-z0-9_-]
+    that fits the column, else None (the message is still stored, only
+    de-duplication is lost).
+    """
+    if (
+        isinstance(value, str)
+        and len(value) <= CLIENT_ID_MAX_LENGTH
+        and CLIENT_ID_PATTERN.fullmatch(value)
+    ):
+        return value
+    return None
+
+
+class ChatWriteBehind:
+    """
+    Buffers chat messages that have already been broadcast and writes them
+    with one bulk INSERT per batch.
+
+    - A batch is committed once `batch_size` messages are waiting or
+      `flush_ms` after the first one arrived, whichever comes first.
+    - A single writer drains one FIFO queue, so messages of a meeting are
+      stored in the order they were accepted (message_id follows that order).
+    - A failed commit keeps the batch at the front of the queue for the next
+      attempt. After `max_retries` failed attempts the batch is written row
+      by row and rows that still fail are logged and dropped, so one bad
+      row cannot hold back the messages queued behind it.
+    - Anything still buffered is written when the process exits, including
+      on SIGTERM (docker stop, process managers), which skips atexit.
+    """
+
+    def __init__(self, batch_size=100, flush_ms=200, max_retries=3):
+        self.batch_size = batch_size
+        self.flush_ms = flush_ms
+        self.max_retries = max_retries
+        self._failures = 0  # failed attempts of the batch at the head
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._app = None
+        self._previous_sigterm = None
+
+    def start(self, app, socketio):
+        with self._lock:
+            if self._app is not None:
+                return
+            self._app = app
+        atexit.register(self.flush)
+        self._install_sigterm_handler()
+        socketio.start_background_task(self._run)
+
+    def _install_sigterm_handler(self):
+        if threading.current_thread() is not threading.main_thread():
+            logger.warning("Chat write-behind started off the main thread; SIGTERM will not flush it")
+            return
+        self._previous_sigterm = signal.signal(signal.SIGTERM, self._handle_sigterm)
+
+    def _handle_sigterm(self, signum, frame):
+        """
+        Write the buffer, then hand over to the previous handler or exit.
+        """
+        self.flush()
+        previous = self._previous_sigterm
+        if callable(previous):
+            previous(signum, frame)
+        else:
+            raise SystemExit(128 + signum)
+
+    @property
+    def running(self):
+        return self._app is not None
+
+    def enqueue(self, row):
+        """
+        Queue one chat_messages row (a dict of column values).
+        """
+        row = dict(row, client_id=clean_client_id(row.get("client_id")))
+        with self._lock:
+            self._pending.append(row)
+            size = len(self._pending)
+        # Wake the writer for the first message of a batch and for a full one
+        if size == 1 or size >= self.batch_size:
+            self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            # Give a burst up to flush_ms to fill the batch
+            if len(self._pending) < self.batch_size:
+                self._wakeup.wait(self.flush_ms / 1000)
+                self._wakeup.clear()
+            try:
+                while self.flush_batch():
+                    pass
+            except Exception as e:
+                logger.error(f"Chat write-behind error: {e}")
+                self._wakeup.wait(self.flush_ms / 1000)
+            if self._pending:
+                self._wakeup.set()
+
+    def flush_batch(self):
+        """
+        Write up to `batch_size` buffered messages. Returns the number written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            if not batch:
+                return 0
+            with self._app.app_context():
+                if self._failures >= self.max_retries:
+                    self._failures = 0
+                    return self._write_rows(batch)
+                try:
+                    db.session.execute(insert(ChatMessage), batch)
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    self._failures += 1
+                    with self._lock:
+                        self._pending.extendleft(reversed(batch))
+                    raise
+            self._failures = 0
+            return len(batch)
+
+    def _write_rows(self, batch):
+        """
+        Insert a batch that keeps failing one row per transaction, dropping
+        the rows the database rejects. Returns the number of rows handled.
+        """
+        for row in batch:
+            try:
+                db.session.execute(insert(ChatMessage), [row])
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(
+                    f"Dropping chat message for meeting {row.get('meeting_id')} "
+                    f"from user {row.get('user_id')} that could not be stored: {e}"
+                )
+        return len(batch)
+
+    def flush(self):
+        """
+        Write everything buffered so far (shutdown, tests). A failing batch is
+        retried and then written row by row, so this always drains the queue.
+        """
+        if self._app is None:
+            return
+        while True:
+            try:
+                if not self.flush_batch():
+                    return
+            except Exception as e:
+                logger.error(f"Chat write-behind batch failed ({self._failures}/{self.max_retries}): {e}")
+
+
+chat_writer = ChatWriteBehind(
+    batch_size=Config.CHAT_WRITE_BATCH_SIZE,
+    flush_ms=Config.CHAT_WRITE_FLUSH_MS,
+    max_retries=Config.CHAT_WRITE_MAX_RETRIES
+)
@@ -2,14 +2,16 @@
 
 import os
 from flask import current_app, request
-from flask_login import current_user
 from werkzeug.utils import secure_filename
 from flask_socketio import SocketIO, emit, join_room
 from datetime import datetime
 
 # Import your DB and ChatMessage model
+from app.config import Config
 from app.extensions import db
-from app.models import ChatMessage, User, ChatFile
+from app.models import ChatMessage, ChatFile
+from app.websockets.identity import authenticate_socket, socket_identity, forget_socket
+from app.websockets.chat_writer import chat_writer, clean_client_id
 
 UPLOAD_FOLDER = "app/static/uploads/documents"
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf', 'docx', 'xlsx'}
@@ -18,6 +20,37 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def broadcast_chat_message(row, profile_pic_url):
+    """
+    Store a chat_messages row and broadcast it to the meeting room.
+
+    With CHAT_WRITE_BEHIND the message goes out first and is written later
+    by the batched chat writer; otherwise it is committed before the emit.
+    """
+    row = dict(row, client_id=clean_client_id(row.get("client_id")))
+    write_behind = Config.CHAT_WRITE_BEHIND and chat_writer.running
+    if not write_behind:
+        db.session.add(ChatMessage(**row))
+        db.session.commit()
+
+    # Send timestamp as "YYYY-MM-DD HH:MM:SS" to the UI
+    emit(
+        "chat_message",
+        {
+            "username": row["username"],
+            "message": row["message"],
+            "timestamp": row["timestamp"].strftime("%Y-%m-%d %H:%M:%S"),
+            "profile_pic_url": profile_pic_url,
+            "client_id": row["client_id"]
+        },
+        room=f"meeting_{row['meeting_id']}",
+        namespace="/chat"
+    )
+
+    if write_behind:
+        chat_writer.enqueue(row)
+
+
 
 def register_chat_events(socketio: SocketIO):
     """
@@ -27,6 +60,11 @@ def register_chat_events(socketio: SocketIO):
     def chat_connect(auth):
         print("[CHAT] CONNECT CALLED")
 
+        identity = authenticate_socket()
+        if identity is None:
+            print("[CHAT] ❌ Unauthenticated handshake rejected.")
+            return False
+
         meeting_id = None
 
         # Try auth (works in websocket handshake)
@@ -40,12 +78,17 @@ def register_chat_events(socketio: SocketIO):
         print("ARGS:", request.args)
         print(f"[CHAT] MEETING ID {meeting_id}")
 
-        if meeting_id:
+        if meeting_id and identity.can_join(meeting_id):
             join_room(f"meeting_{meeting_id}")
             print(f"[CHAT] Client joined room meeting_{meeting_id}")
+        elif meeting_id:
+            print(f"[CHAT] ❌ {identity.username} is not a participant of meeting {meeting_id}, not joining.")
         else:
             print("[CHAT] ❌ No meeting_id provided, not joining any room.")
 
+    @socketio.on("disconnect", namespace="/chat")
+    def chat_disconnect(*args):
+        forget_socket()
 
 
     @socketio.on("chat_message", namespace="/chat")
@@ -56,44 +99,22 @@ def register_chat_events(socketio: SocketIO):
         except (TypeError, ValueError):
             meeting_id = None
             
-        message = data.get("message", "")
-        user = User.query.get(current_user.user_id) if current_user.is_authenticated else None
-        username = user.username if user else "Anonymous"
-        
-        # Build profile pic URL
-        profile_pic_url = user.profile_pic_url if (user and user.profile_pic_url) else "default-profile.png"
-        if not profile_pic_url.startswith("/static/"):
-            profile_pic_url = "/static/" + profile_pic_url
-        
-        # Create a real datetime
-        timestamp_dt = datetime.utcnow()
-
-        # Store the message in DB
-        chat_msg = ChatMessage(
-            meeting_id=meeting_id,
-            user_id=user.user_id if user else None,
-            username=username,
-            message=message,
-            timestamp=timestamp_dt
-        )
-        db.session.add(chat_msg)
-        db.session.commit()
-        
-        
-        # Send timestamp as ISO string or "YYYY-MM-DD HH:MM:SS" to the UI
-        timestamp_str = timestamp_dt.strftime("%Y-%m-%d %H:%M:%S")
-
-        # Broadcast to everyone in the room
-        emit(
-            "chat_message",
+        # Identity was resolved at connect; no user lookup per message
+        identity = socket_identity()
+        if identity is None or not identity.can_join(meeting_id):
+            return
+
+        # One timestamp for both the broadcast and the stored row
+        broadcast_chat_message(
             {
-                "username": username,
-                "message": message,
-                "timestamp": timestamp_str,
-                "profile_pic_url": profile_pic_url
+                "meeting_id": meeting_id,
+                "user_id": identity.user_id,
+                "username": identity.username,
+                "message": data.get("message", ""),
+                "timestamp": datetime.utcnow(),
+                "client_id": data.get("client_id")
             },
-            room=f"meeting_{meeting_id}",
-            namespace="/chat"
+            identity.profile_pic_url
         )
     
     @socketio.on("file_upload", namespace="/chat")
@@ -107,43 +128,22 @@ def register_chat_events(socketio: SocketIO):
         except (TypeError, ValueError):
             meeting_id = None
             
+        identity = socket_identity()
+        if identity is None or not identity.can_join(meeting_id):
+            return
+
         filename = data.get("filename")
         file_url = data.get("file_url")
 
-        user = User.query.get(current_user.user_id) if current_user.is_authenticated else None
-        username = user.username if user else "Anonymous"
-
-        # Build profile pic
-        profile_pic_url = user.profile_pic_url if (user and user.profile_pic_url) else "default-profile.png"
-        if not profile_pic_url.startswith("/static/"):
-            profile_pic_url = "/static/" + profile_pic_url
-
-        timestamp_dt = datetime.utcnow()
-
-
-        # Create a ChatMessage with the file link
-        chat_message = ChatMessage(
-            meeting_id=meeting_id,
-            user_id=(user.user_id if user else None),
-            username=username,
-            message=f'<a href="{file_url}" target="_blank">📄 {filename}</a>',
-            timestamp=timestamp_dt
-        )
-        db.session.add(chat_message)
-        db.session.commit()
-        
-        timestamp_str = timestamp_dt.strftime("%Y-%m-%d %H:%M:%S")
-
-
-        # Notify all attendees in the room
-        emit(
-            "chat_message",
+        # Chat message with the file link, broadcast to all attendees in the room
+        broadcast_chat_message(
             {
-                "username": username,
+                "meeting_id": meeting_id,
+                "user_id": identity.user_id,
+                "username": identity.username,
                 "message": f'<a href="{file_url}" target="_blank">📄 {filename}</a>',
-                "timestamp": timestamp_str,
-                "profile_pic_url": profile_pic_url
+                "timestamp": datetime.utcnow(),
+                "client_id": data.get("client_id")
             },
-            room=f"meeting_{meeting_id}",
-            namespace="/chat"
-        )
\ No newline at end of file
+            identity.profile_pic_url
+        )
@@ -0,0 +1,84 @@
+# app/websockets/identity.py
+
+from threading import Lock
+
+from flask import request
+from flask_login import current_user
+
+from app.extensions import db
+from app.models import Participant
+
+SOCKET_IDENTITIES = {}
+SOCKET_IDENTITIES_LOCK = Lock()
+
+
+class SocketIdentity:
+    """
+    Who is on the other end of a Socket.IO connection, resolved once in the
+    namespace's connect handler and reused by every event on that sid.
+    """
+
+    __slots__ = ("user_id", "username", "profile_pic_url", "meeting_ids")
+
+    def __init__(self, user_id, username, profile_pic_url, meeting_ids):
+        self.user_id = user_id
+        self.username = username
+        self.profile_pic_url = profile_pic_url
+        self.meeting_ids = meeting_ids
+
+    def can_join(self, meeting_id):
+        """
+        True if the user is a participant of the meeting. A miss is checked
+        against the database once, so a user added to a meeting after
+        connecting does not have to reconnect.
+        """
+        try:
+            meeting_id = int(meeting_id)
+        except (TypeError, ValueError):
+            return False
+        if meeting_id in self.meeting_ids:
+            return True
+        if Participant.query.filter_by(meeting_id=meeting_id, user_id=self.user_id).first() is None:
+            return False
+        self.meeting_ids = self.meeting_ids | {meeting_id}
+        return True
+
+
+def authenticate_socket():
+    """
+    Call from a namespace's connect handler. Resolves the logged-in user
+    (cached principal) and their meeting ids, stores them for this sid and
+    returns the identity; returns None for an unauthenticated handshake,
+    which the handler should reject by returning False.
+    """
+    if not current_user.is_authenticated:
+        return None
+    meeting_ids = frozenset(
+        row.meeting_id for row in
+        db.session.query(Participant.meeting_id).filter(Participant.user_id == current_user.user_id)
+    )
+    identity = SocketIdentity(
+        user_id=current_user.user_id,
+        username=current_user.username,
+        profile_pic_url=current_user.avatar_url,
+        meeting_ids=meeting_ids
+    )
+    with SOCKET_IDENTITIES_LOCK:
+        SOCKET_IDENTITIES[request.sid] = identity
+    return identity
+
+
+def socket_identity():
+    """
+    Identity stored for the current sid by authenticate_socket(), or None.
+    """
+    with SOCKET_IDENTITIES_LOCK:
+        return SOCKET_IDENTITIES.get(request.sid)
+
+
+def forget_socket():
+    """
+    Drop the current sid's identity; call from the disconnect handler.
+    """
+    with SOCKET_IDENTITIES_LOCK:
+        return SOCKET_IDENTITIES.pop(request.sid, None)
@@ -11,6 +11,9 @@ from app.config import Config
 from app.extensions import db
 from app.models import Transcript, Summary
 from app.transcription.transcription import TranscriptionSession
+from app.transcription.autocorrect import stream_transcript_correction
+from app.transcription.edits import load_edits
+from app.websockets.identity import authenticate_socket, socket_identity, forget_socket
 from langchain_ibm import WatsonxLLM
 from langchain_core.prompts import PromptTemplate
 
@@ -20,18 +23,26 @@ ACTIVE_SESSIONS_LOCK = Lock()
 def register_transcription_events(socketio: SocketIO):
     @socketio.on("connect", namespace="/transcription")
     def transcription_connect():
+        identity = authenticate_socket()
+        if identity is None:
+            return False
         meeting_id = request.args.get("meeting_id")
-        if meeting_id:
+        if meeting_id and identity.can_join(meeting_id):
             join_room(f"meeting_{meeting_id}")
             print(f"[Transcription] Client joined room meeting_{meeting_id}")
 
+    @socketio.on("disconnect", namespace="/transcription")
+    def transcription_disconnect(*args):
+        forget_socket()
+
     @socketio.on("start_transcription", namespace="/transcription")
     def handle_start_transcription(data):
         meeting_id = str(data.get("meeting_id"))
-        user_id = data.get("user_id")  # speaker id
-        if not meeting_id or not user_id:
-            emit("error_message", {"error": "Missing meeting_id or user_id."})
+        identity = socket_identity()
+        if identity is None or not identity.can_join(meeting_id):
+            emit("error_message", {"error": "Not a participant of this meeting."})
             return
+        user_id = identity.user_id  # speaker id
 
         key = f"{meeting_id}_{user_id}"
         with ACTIVE_SESSIONS_LOCK:
@@ -56,10 +67,11 @@ def register_transcription_events(socketio: SocketIO):
     @socketio.on("audio_chunk", namespace="/transcription")
     def handle_audio_chunk(data):
         meeting_id = str(data.get("meeting_id"))
-        user_id = data.get("user_id")  # may be included from the client if needed
+        identity = socket_identity()
         chunk_b64 = data.get("chunk")
-        if not meeting_id or not chunk_b64:
+        if identity is None or not chunk_b64:
             return
+        user_id = identity.user_id
 
         key = f"{meeting_id}_{user_id}"
         with ACTIVE_SESSIONS_LOCK:
@@ -75,9 +87,10 @@ def register_transcription_events(socketio: SocketIO):
     @socketio.on("stop_transcription", namespace="/transcription")
     def handle_stop_transcription(data):
         meeting_id = str(data.get("meeting_id"))
-        user_id = data.get("user_id")
-        if not meeting_id or not user_id:
+        identity = socket_identity()
+        if identity is None:
             return
+        user_id = identity.user_id
         key = f"{meeting_id}_{user_id}"
         with ACTIVE_SESSIONS_LOCK:
             session = ACTIVE_SESSIONS.pop(key, None)
@@ -179,47 +192,15 @@ def register_transcription_events(socketio: SocketIO):
                 emit("error_message", {"error": "Transcript not found."})
                 return
 
-            text_to_correct = transcript.raw_transcript.strip()
-
-            watsonx_llm = WatsonxLLM(
-                model_id=Config.WATSONX_MODEL_ID_1,
-                url=Config.WATSONX_URL,
-                project_id=Config.WATSONX_PROJECT_ID,
-                apikey=Config.WATSONX_API_KEY,
-                params={
-                    "decoding_method": "sample",
-                    "max_new_tokens": 1200,
-                    "temperature": 0.8,
-                    "top_k": 25,
-                    "top_p": 1,
-                }
-            )
-
-            template = """
-            Correct grammar without changing the original meaning or style of the transcript.
-
-            Text to correct:
-            {text}
-
-            Output only the final corrected text.
-            """
-            prompt = PromptTemplate.from_template(template)
-            llm_chain = prompt | watsonx_llm
-
-            corrected_text = ""
-            for chunk in llm_chain.stream({"text": text_to_correct}):
-                corrected_text += chunk
+            # Emit only the changed word spans of each corrected chunk
+            for patch in stream_transcript_correction(transcript):
                 emit(
-                    "autocorrect_update",
-                    {"transcript_id": transcript_id, "chunk": chunk},
+                    "autocorrect_patch",
+                    {"transcript_id": transcript_id, "edits": patch},
                     namespace="/transcription",
                     room=request.sid
                 )
 
-            # Ensure the transcript instance is attached before updating it
-            transcript = db.session.merge(transcript)
-            transcript.processed_transcript = corrected_text.strip()
-
             # Commit inside the session to prevent detachment
             db.session.commit()
 
@@ -231,10 +212,10 @@ def register_transcription_events(socketio: SocketIO):
                 }, room=f"meeting_{transcript.meeting_id}", namespace="/transcription")
             """
             
-            # Notify completion without resending the entire corrected text
+            # Notify completion with the edit list, not the entire corrected text
             socketio.emit(
                 "autocorrect_complete",
-                {"transcript_id": transcript.transcript_id},
+                {"transcript_id": transcript.transcript_id, "edits": load_edits(transcript.processed_edits)},
                 room=f"meeting_{transcript.meeting_id}",
                 namespace="/transcription"
             )
\ No newline at end of file
@@ -2,28 +2,34 @@
 
 from flask_socketio import SocketIO, emit, join_room, leave_room
 from flask import request
-from flask_login import current_user
 from threading import Lock
 
+from app.websockets.identity import authenticate_socket, forget_socket
+
 WEBRTC_USERS = {}
 WEBRTC_USERS_LOCK = Lock()
 
 def register_webrtc_events(socketio: SocketIO):
     @socketio.on("connect", namespace="/webrtc")
     def webrtc_connect(auth):
+        identity = authenticate_socket()
+        if identity is None:
+            return False
         with WEBRTC_USERS_LOCK:
             WEBRTC_USERS[request.sid] = {
-                "user_id": current_user.user_id,
-                "username": current_user.username,
+                "user_id": identity.user_id,
+                "username": identity.username,
+                "identity": identity,
                 "meeting_id": None
             }
-        print(f"[webrtc_connect] {request.sid} => user {current_user.username}")
+        print(f"[webrtc_connect] {request.sid} => user {identity.username}")
 
     @socketio.on("disconnect", namespace="/webrtc")
     def webrtc_disconnect(*args):
         """
         Immediately notify other participants that this user left.
         """
+        forget_socket()
         with WEBRTC_USERS_LOCK:
             user_info = WEBRTC_USERS.pop(request.sid, None)
         if user_info and user_info["meeting_id"]:
@@ -41,10 +47,14 @@ def register_webrtc_events(socketio: SocketIO):
     @socketio.on("webrtc_join", namespace="/webrtc")
     def handle_webrtc_join(data):
         meeting_id = data.get("meeting_id")
+        with WEBRTC_USERS_LOCK:
+            user_info = WEBRTC_USERS.get(request.sid)
+        if not user_info or not user_info["identity"].can_join(meeting_id):
+            print(f"[webrtc_join] sid={request.sid} refused for meeting_id={meeting_id}")
+            return
         join_room(f"meeting_{meeting_id}")
 
         with WEBRTC_USERS_LOCK:
-            user_info = WEBRTC_USERS.get(request.sid)
             if user_info:
                 user_info["meeting_id"] = meeting_id
                 print(f"[webrtc_join] sid={request.sid}, meeting_id={meeting_id}, user_id={user_info['user_id']}, username={user_info['username']}")
@@ -0,0 +1,127 @@
+#
+# benchmarks/freebusy_latency.py
+#
+
+#-------------------------------------
+# Free/busy latency with a realistic calendar load (app/calendar/freebusy.py).
+#
+# Seeds an in-memory SQLite database with `--users` users, each holding
+# `--events` one-off rows (a third each meetings, custom events and tasks)
+# spread over a year plus three recurring series, then times what /calendar/freebusy does for
+# `--group` users over a `--days` window: busy_intervals() for the group,
+# the merge of their busy time and free_slots().
+#
+# "cold" clears the occurrence cache before each call, "warm" reuses it.
+#
+#   python benchmarks/freebusy_latency.py --users 50 --events 600 --group 8 --days 14
+#-------------------------------------
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import insert
+
+from app.calendar.freebusy import busy_intervals, free_slots, merge_intervals
+from app.calendar.occurrences import occurrence_cache
+from app.extensions import db
+from app.models import ActionItem, CalendarEvent, Meeting, Participant, User
+
+YEAR_START = datetime(2026, 1, 1)
+
+
+def seed(users, events, rng):
+    db.session.execute(insert(User), [
+        {"user_id": u, "username": f"user{u}", "email": f"user{u}@example.com", "password": "x"}
+        for u in range(1, users + 1)
+    ])
+
+    def when():
+        return YEAR_START + timedelta(days=rng.randrange(365), minutes=rng.randrange(8 * 60, 18 * 60, 15))
+
+    meetings, participants, custom, tasks = [], [], [], []
+    meeting_id = 0
+    for u in range(1, users + 1):
+        for _ in range(events // 3):
+            meeting_id += 1
+            meetings.append({
+                "meeting_id": meeting_id, "title": "Meeting", "organizer_id": u,
+                "date_time": when(), "duration": timedelta(minutes=rng.choice((30, 45, 60)))
+            })
+            participants.append({"meeting_id": meeting_id, "user_id": rng.randrange(1, users + 1)})
+            start = when()
+            custom.append({
+                "title": "Event", "event_type": "custom", "user_id": u,
+                "start_date": start, "end_date": start + timedelta(minutes=rng.choice((15, 30, 90)))
+            })
+            tasks.append({
+                "meeting_id": meeting_id, "description": "Task", "assigned_to": u,
+                "due_date": date.fromordinal(YEAR_START.toordinal() + rng.randrange(365))
+            })
+    db.session.execute(insert(Meeting), meetings)
+    db.session.execute(insert(Participant), participants)
+    db.session.execute(insert(CalendarEvent), custom)
+    db.session.execute(insert(ActionItem), tasks)
+
+    # A few recurring series per user, through the ORM so recurrence_until
+    # is filled in
+    for u in range(1, users + 1):
+        for rule in ("FREQ=WEEKLY;BYDAY=MO,WE,FR", "FREQ=DAILY;INTERVAL=2", "FREQ=MONTHLY;BYMONTHDAY=1,15"):
+            db.session.add(Meeting(title="Series", organizer_id=u, date_time=when(),
+                                   duration=timedelta(minutes=30), recurrence_rule=rule))
+    db.session.commit()
+
+
+def measure(label, group, start, end, duration, repeat, cold):
+    timings = []
+    for _ in range(repeat):
+        if cold:
+            occurrence_cache._entries.clear()
+        started = time.perf_counter()
+        busy = busy_intervals(group, start, end)
+        combined = merge_intervals([i for intervals in busy.values() for i in intervals])
+        slots = free_slots(combined, start, end, duration)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"{label:<6} median {statistics.median(timings):7.2f} ms   p95 {p95:7.2f} ms   "
+          f"{len(combined)} busy intervals, {len(slots)} slots")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Free/busy latency benchmark")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--events", type=int, default=600, help="one-off rows per user")
+    parser.add_argument("--group", type=int, default=8, help="users asked about at once")
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI="sqlite://")
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        rng = random.Random(args.seed)
+        started = time.perf_counter()
+        seed(args.users, args.events, rng)
+        print(f"{args.users} users x {args.events} rows seeded in {time.perf_counter() - started:.1f} s; "
+              f"{args.group} users over {args.days} days")
+
+        group = list(range(1, min(args.group, args.users) + 1))
+        start = datetime(2026, 6, 1)
+        end = start + timedelta(days=args.days)
+        measure("cold", group, start, end, timedelta(minutes=30), args.repeat, cold=True)
+        measure("warm", group, start, end, timedelta(minutes=30), args.repeat, cold=False)
+
+
+if __name__ == "__main__":
+    main()
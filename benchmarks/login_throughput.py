@@ -0,0 +1,72 @@
+#
+# benchmarks/login_throughput.py
+#
+
+#-------------------------------------
+# Login throughput under eventlet: bcrypt verify on the hub vs. the
+# native password hasher pool (app/auth/passwords.py).
+#
+# A heartbeat green thread sleeps 10 ms in a loop and records how late it
+# wakes up; that is the stall every other green thread (socket emits, live
+# transcription) sees while logins are being verified.
+#
+#   python benchmarks/login_throughput.py --logins 40 --concurrency 8 --rounds 12
+#-------------------------------------
+
+import eventlet
+eventlet.monkey_patch()
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from passlib.hash import bcrypt
+
+from app.auth.passwords import PasswordHasher, configure_native_threads
+
+
+def heartbeat(stats, stop):
+    while not stop["done"]:
+        started = time.perf_counter()
+        eventlet.sleep(0.01)
+        stats["max_stall_ms"] = max(stats["max_stall_ms"], (time.perf_counter() - started - 0.01) * 1000)
+
+
+def run(label, verify, password_hash, logins, concurrency):
+    stats = {"max_stall_ms": 0.0}
+    stop = {"done": False}
+    beat = eventlet.spawn(heartbeat, stats, stop)
+    pool = eventlet.GreenPool(concurrency)
+
+    started = time.perf_counter()
+    results = list(pool.imap(lambda _: verify("correct horse", password_hash), range(logins)))
+    elapsed = time.perf_counter() - started
+
+    stop["done"] = True
+    beat.wait()
+    assert all(results)
+    print(f"{label:<10} {logins / elapsed:8.1f} logins/s   max hub stall {stats['max_stall_ms']:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    configure_native_threads(args.threads)
+    hasher = PasswordHasher(rounds=args.rounds, max_pending=args.logins)
+    password_hash = bcrypt.using(rounds=args.rounds).hash("correct horse")
+
+    print(f"bcrypt cost {args.rounds}, {args.logins} logins, {args.concurrency} concurrent, {args.threads} native threads")
+    run("inline", bcrypt.verify, password_hash, args.logins, args.concurrency)
+    run("offloaded", hasher.verify, password_hash, args.logins, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
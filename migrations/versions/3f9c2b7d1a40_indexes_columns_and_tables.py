@@ -0,0 +1,145 @@
+"""Indexes, columns and tables added since the baseline schema
+
+Adds the composite indexes for meeting-scoped queries, the new columns
+(transcripts.processed_edits, chat_messages.client_id, blob_sha256 on
+chat/task files, updated_timestamp and recurrence columns) and the tables
+stored_blobs, outbound_emails, task_extraction_state and autocorrect_chunks.
+
+The baseline tables were created by db.create_all() and create_app() still
+runs it (plus ensure_schema) on start, so every step checks the live schema
+first: the revision applies to a baseline database and to one that is
+already up to date.
+
+Revision ID: 3f9c2b7d1a40
+Revises:
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2b7d1a40'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+NEW_COLUMNS = [
+    ('transcripts', lambda: sa.Column('processed_edits', sa.Text(), nullable=True)),
+    ('chat_messages', lambda: sa.Column('client_id', sa.String(length=64), nullable=True)),
+    ('action_items', lambda: sa.Column('updated_timestamp', sa.DateTime(), nullable=True)),
+    ('meetings', lambda: sa.Column('recurrence_rule', sa.String(length=255), nullable=True)),
+    ('meetings', lambda: sa.Column('recurrence_until', sa.DateTime(), nullable=True)),
+    ('meetings', lambda: sa.Column('updated_timestamp', sa.DateTime(), nullable=True)),
+    ('calendar_events', lambda: sa.Column('recurrence_rule', sa.String(length=255), nullable=True)),
+    ('calendar_events', lambda: sa.Column('recurrence_until', sa.DateTime(), nullable=True)),
+    ('calendar_events', lambda: sa.Column('updated_timestamp', sa.DateTime(), nullable=True)),
+    ('chat_files', lambda: sa.Column(
+        'blob_sha256', sa.String(length=64),
+        sa.ForeignKey('stored_blobs.sha256', name='fk_chat_files_blob_sha256'), nullable=True)),
+    ('task_files', lambda: sa.Column(
+        'blob_sha256', sa.String(length=64),
+        sa.ForeignKey('stored_blobs.sha256', name='fk_task_files_blob_sha256'), nullable=True)),
+]
+
+NEW_INDEXES = [
+    ('ix_transcripts_meeting_created', 'transcripts', ['meeting_id', 'created_timestamp', 'transcript_id']),
+    ('ix_summaries_meeting_type_created', 'summaries', ['meeting_id', 'summary_type', 'created_timestamp']),
+    ('ix_action_items_meeting_created', 'action_items', ['meeting_id', 'created_timestamp']),
+    ('ix_action_items_assigned_status', 'action_items', ['assigned_to', 'status']),
+    ('ix_action_items_assigned_due', 'action_items', ['assigned_to', 'due_date']),
+    ('ix_meetings_organizer_date', 'meetings', ['organizer_id', 'date_time']),
+    ('ix_participants_meeting_user', 'participants', ['meeting_id', 'user_id']),
+    ('ix_participants_user', 'participants', ['user_id']),
+    ('ix_chat_messages_meeting_timestamp', 'chat_messages', ['meeting_id', 'timestamp', 'message_id']),
+    ('ix_calendar_events_user_start', 'calendar_events', ['user_id', 'start_date']),
+    ('ix_task_files_uploaded', 'task_files', ['uploaded_at']),
+    ('ix_task_files_task', 'task_files', ['task_id']),
+    ('ix_chat_files_meeting_uploaded', 'chat_files', ['meeting_id', 'uploaded_at']),
+    ('ix_chat_files_uploaded', 'chat_files', ['uploaded_at']),
+    ('ix_organization_members_user_status', 'organization_members', ['user_id', 'status']),
+    ('ix_organization_members_org_user', 'organization_members', ['org_id', 'user_id']),
+    ('ix_outbound_emails_status', 'outbound_emails', ['status']),
+    ('ix_outbound_emails_claim_token', 'outbound_emails', ['claim_token']),
+]
+
+
+def _create_tables(inspector):
+    if not inspector.has_table('stored_blobs'):
+        op.create_table(
+            'stored_blobs',
+            sa.Column('sha256', sa.String(length=64), primary_key=True),
+            sa.Column('storage_path', sa.String(length=255), nullable=False),
+            sa.Column('size', sa.BigInteger(), nullable=False),
+            sa.Column('content_type', sa.String(length=255), nullable=True),
+            sa.Column('created_timestamp', sa.DateTime(), nullable=True),
+        )
+    if not inspector.has_table('outbound_emails'):
+        op.create_table(
+            'outbound_emails',
+            sa.Column('email_id', sa.Integer(), primary_key=True),
+            sa.Column('recipient', sa.String(length=255), nullable=False),
+            sa.Column('subject', sa.String(length=255), nullable=False),
+            sa.Column('html', sa.Text(), nullable=False),
+            sa.Column('sender_name', sa.String(length=100), nullable=True),
+            sa.Column('sender_email', sa.String(length=255), nullable=True),
+            sa.Column('status', sa.String(length=20), nullable=True),
+            sa.Column('attempts', sa.Integer(), nullable=True),
+            sa.Column('next_attempt_at', sa.DateTime(), nullable=True),
+            sa.Column('claim_token', sa.String(length=32), nullable=True),
+            sa.Column('claimed_at', sa.DateTime(), nullable=True),
+            sa.Column('last_error', sa.Text(), nullable=True),
+            sa.Column('created_timestamp', sa.DateTime(), nullable=True),
+            sa.Column('sent_timestamp', sa.DateTime(), nullable=True),
+        )
+    if not inspector.has_table('task_extraction_state'):
+        op.create_table(
+            'task_extraction_state',
+            sa.Column('meeting_id', sa.Integer(), sa.ForeignKey('meetings.meeting_id'), primary_key=True),
+            sa.Column('last_transcript_id', sa.Integer(), nullable=False),
+            sa.Column('updated_timestamp', sa.DateTime(), nullable=True),
+        )
+    if not inspector.has_table('autocorrect_chunks'):
+        op.create_table(
+            'autocorrect_chunks',
+            sa.Column('content_hash', sa.String(length=64), primary_key=True),
+            sa.Column('corrected_text', sa.Text(), nullable=False),
+            sa.Column('created_timestamp', sa.DateTime(), nullable=True),
+        )
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    _create_tables(inspector)
+
+    for table, make_column in NEW_COLUMNS:
+        column = make_column()
+        if column.name in {c['name'] for c in inspector.get_columns(table)}:
+            continue
+        # Batch mode: SQLite cannot add a column with a foreign key in place
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(column)
+
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns in NEW_INDEXES:
+        if name not in {ix['name'] for ix in inspector.get_indexes(table)}:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns in reversed(NEW_INDEXES):
+        if inspector.has_table(table) and name in {ix['name'] for ix in inspector.get_indexes(table)}:
+            op.drop_index(name, table_name=table)
+
+    for table, make_column in reversed(NEW_COLUMNS):
+        column = make_column()
+        if column.name in {c['name'] for c in inspector.get_columns(table)}:
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.drop_column(column.name)
+
+    for table in ('autocorrect_chunks', 'task_extraction_state', 'outbound_emails', 'stored_blobs'):
+        if inspector.has_table(table):
+            op.drop_table(table)
@@ -0,0 +1,27 @@
+# tests/conftest.py
+
+import pytest
+from flask import Flask
+
+from app.extensions import db
+
+
+@pytest.fixture
+def app(tmp_path):
+    """
+    A bare Flask app on an in-memory SQLite database with every model table,
+    for testing services without the blueprints and background workers
+    that create_app() starts.
+    """
+    app = Flask("app_tests", static_folder=str(tmp_path / "static"))
+    app.config.update(
+        TESTING=True,
+        SECRET_KEY="test",
+        SQLALCHEMY_DATABASE_URI="sqlite://",
+    )
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
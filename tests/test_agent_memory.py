@@ -0,0 +1,40 @@
+# tests/test_agent_memory.py
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.agent.memory import MemoryPolicy
+
+
+class CountingLLM:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        return AIMessage(content=f"summary {self.calls}")
+
+
+def _stored(state, update):
+    if "messages" not in update:
+        return state["messages"]
+    # The update starts with RemoveMessage(REMOVE_ALL_MESSAGES)
+    return update["messages"][1:]
+
+
+def test_summarizes_once_per_half_window_not_every_turn():
+    llm = CountingLLM()
+    policy = MemoryPolicy(llm, window=12)
+    state = {"messages": []}
+    turns = 30
+
+    for n in range(turns):
+        state["messages"] = state["messages"] + [
+            HumanMessage(content=f"question {n}"), AIMessage(content=f"answer {n}")
+        ]
+        update = policy.pre_model_hook(state, {})
+        state["messages"] = _stored(state, update)
+        history = [m for m in state["messages"] if isinstance(m, (HumanMessage, AIMessage))]
+        assert len(history) <= policy.window
+
+    # Each summary leaves 6 messages, so the next one is due 4 turns later
+    assert llm.calls == 6
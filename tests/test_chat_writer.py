@@ -0,0 +1,94 @@
+# tests/test_chat_writer.py
+
+import os
+import signal
+from datetime import datetime
+
+import pytest
+
+from app.extensions import db
+from app.models import ChatMessage
+from app.websockets.chat_writer import ChatWriteBehind, clean_client_id
+
+
+def _row(message, username="alice", client_id=None):
+    return {
+        "meeting_id": 1,
+        "user_id": 1,
+        "username": username,
+        "message": message,
+        "timestamp": datetime.utcnow(),
+        "client_id": client_id,
+    }
+
+
+def test_poison_row_does_not_block_rows_behind_it(app):
+    writer = ChatWriteBehind(batch_size=10, max_retries=2)
+    writer._app = app  # attached without starting the background task
+
+    writer.enqueue(_row("first"))
+    writer.enqueue(_row("poison", username=None))  # violates NOT NULL
+    writer.enqueue(_row("third"))
+
+    writer.flush()
+
+    stored = [m.message for m in ChatMessage.query.order_by(ChatMessage.message_id)]
+    assert stored == ["first", "third"]
+    assert not writer._pending
+
+    # Later messages go back to batched inserts
+    writer.enqueue(_row("fourth"))
+    assert writer.flush_batch() == 1
+    assert ChatMessage.query.count() == 3
+
+
+def test_failed_batch_is_retried_before_falling_back(app):
+    writer = ChatWriteBehind(batch_size=10, max_retries=3)
+    writer._app = app
+    writer.enqueue(_row("poison", username=None))
+
+    for attempt in range(3):
+        try:
+            writer.flush_batch()
+        except Exception:
+            pass
+        assert len(writer._pending) == 1
+
+    assert writer.flush_batch() == 1
+    assert not writer._pending
+    assert db.session.query(ChatMessage).count() == 0
+
+
+def test_client_id_is_validated_on_enqueue(app):
+    writer = ChatWriteBehind()
+    writer._app = app
+    writer.enqueue(_row("long id", client_id="x" * 65))
+    writer.enqueue(_row("selector id", client_id='x"] *'))
+    writer.enqueue(_row("ok id", client_id="0f8c2a1e-93b4-4c1e-8d2f-5a6b7c8d9e0f"))
+    writer.flush()
+
+    ids = {m.message: m.client_id for m in ChatMessage.query}
+    assert ids == {"long id": None, "selector id": None, "ok id": "0f8c2a1e-93b4-4c1e-8d2f-5a6b7c8d9e0f"}
+    assert clean_client_id(123) is None
+    assert clean_client_id("") is None
+
+
+class _NoBackgroundTasks:
+    def start_background_task(self, target, *args):
+        pass
+
+
+def test_sigterm_flushes_buffer_before_exit(app):
+    previous = signal.getsignal(signal.SIGTERM)
+    writer = ChatWriteBehind()
+    try:
+        writer.start(app, _NoBackgroundTasks())
+        writer.enqueue(_row("said just before shutdown"))
+
+        with pytest.raises(SystemExit) as exit_info:
+            os.kill(os.getpid(), signal.SIGTERM)
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+
+    assert exit_info.value.code == 128 + signal.SIGTERM
+    assert [m.message for m in ChatMessage.query] == ["said just before shutdown"]
@@ -0,0 +1,117 @@
+# tests/test_freebusy.py
+
+from datetime import date, datetime, timedelta
+
+from app.calendar.freebusy import busy_intervals, free_slots, merge_intervals, visible_user_ids
+from app.calendar.occurrences import occurrence_cache
+from app.extensions import db
+from app.models import ActionItem, CalendarEvent, Meeting, Organization, OrganizationMember, Participant, User
+
+HOUR = timedelta(hours=1)
+
+
+def _at(day, hour, minute=0):
+    # 2026-11-02 is a Monday
+    return datetime(2026, 11, day, hour, minute)
+
+
+def test_merge_joins_overlapping_touching_and_nested_intervals():
+    intervals = [
+        (_at(2, 13), _at(2, 14)),
+        (_at(2, 9), _at(2, 12)),
+        (_at(2, 10), _at(2, 11)),  # nested
+        (_at(2, 12), _at(2, 12, 30)),  # touches the end of 9-12
+        (_at(2, 15), _at(2, 16)),
+        (_at(2, 15, 30), _at(2, 17)),  # overlaps
+    ]
+    assert merge_intervals(intervals) == [
+        (_at(2, 9), _at(2, 12, 30)),
+        (_at(2, 13), _at(2, 14)),
+        (_at(2, 15), _at(2, 17)),
+    ]
+    assert merge_intervals([]) == []
+
+
+def test_free_slots_skip_busy_time_spanning_midnight():
+    busy = [(_at(2, 16), _at(3, 10, 15))]
+    slots = free_slots(busy, _at(2, 0), _at(4, 0), HOUR, limit=100)
+    starts = [s for s, _ in slots]
+
+    assert starts[0] == _at(2, 9)
+    assert starts[-1] == _at(3, 16)
+    assert _at(2, 15) in starts and _at(2, 15, 30) not in starts
+    # Tuesday resumes on the 30-minute grid after the busy block
+    assert [s for s in starts if s.day == 3][0] == _at(3, 10, 30)
+    assert all(end - start == HOUR for start, end in slots)
+
+
+def test_free_slots_skip_weekends_and_respect_limit():
+    friday, monday = _at(6, 16), _at(9, 0)
+    slots = free_slots([], friday, monday + timedelta(days=1), HOUR)
+    assert [s for s, _ in slots][:2] == [_at(6, 16), _at(9, 9)]
+    assert len(slots) == 10
+
+    weekend = free_slots([], friday, monday + timedelta(days=1), HOUR, weekdays_only=False, limit=3)
+    assert [s for s, _ in weekend] == [_at(6, 16), _at(7, 9), _at(7, 9, 30)]
+
+
+def test_free_slots_align_window_start_to_the_grid():
+    slots = free_slots([], _at(2, 9, 10), _at(2, 12), timedelta(minutes=45), step=timedelta(minutes=15))
+    assert [s for s, _ in slots][:3] == [_at(2, 9, 15), _at(2, 9, 30), _at(2, 9, 45)]
+
+
+def _user(name):
+    user = User(username=name, email=f"{name}@example.com", password="x")
+    db.session.add(user)
+    db.session.flush()
+    return user
+
+
+def test_busy_intervals_merge_every_source(app):
+    occurrence_cache._entries.clear()
+    alice, bob = _user("alice"), _user("bob")
+    meeting = Meeting(title="Review", date_time=_at(2, 9), duration=HOUR, organizer_id=bob.user_id)
+    standup = Meeting(title="Standup", date_time=_at(2, 10), duration=timedelta(minutes=15),
+                      organizer_id=bob.user_id, recurrence_rule="FREQ=DAILY;COUNT=2")
+    db.session.add_all([meeting, standup])
+    db.session.flush()
+    db.session.add_all([
+        Participant(meeting_id=meeting.meeting_id, user_id=alice.user_id),
+        Participant(meeting_id=standup.meeting_id, user_id=alice.user_id),
+        CalendarEvent(title="Lunch", event_type="custom", start_date=_at(2, 9, 30), end_date=_at(2, 10),
+                      user_id=alice.user_id),
+        ActionItem(meeting_id=meeting.meeting_id, description="Report", assigned_to=alice.user_id,
+                   due_date=date(2026, 11, 3)),
+    ])
+    db.session.commit()
+
+    busy = busy_intervals([alice.user_id, bob.user_id], _at(2, 0), _at(4, 0), task_minutes=60)
+    assert busy[alice.user_id] == [
+        (_at(2, 9), _at(2, 10, 15)),
+        (_at(3, 10), _at(3, 10, 15)),
+        (_at(3, 23), _at(4, 0)),
+    ]
+    assert busy[bob.user_id] == [
+        (_at(2, 9), _at(2, 10, 15)),
+        (_at(3, 10), _at(3, 10, 15)),
+    ]
+    occurrence_cache._entries.clear()
+
+
+def test_visible_user_ids_limited_to_active_members_of_shared_organizations(app):
+    me, colleague, invited, stranger = (_user(n) for n in ("me", "colleague", "invited", "stranger"))
+    org = Organization(name="Acme", owner_id=me.user_id)
+    other = Organization(name="Other", owner_id=stranger.user_id)
+    db.session.add_all([org, other])
+    db.session.flush()
+    db.session.add_all([
+        OrganizationMember(org_id=org.org_id, user_id=me.user_id, status="active"),
+        OrganizationMember(org_id=org.org_id, user_id=colleague.user_id, status="active"),
+        OrganizationMember(org_id=org.org_id, user_id=invited.user_id, status="invited"),
+        OrganizationMember(org_id=other.org_id, user_id=stranger.user_id, status="active"),
+    ])
+    db.session.commit()
+
+    ids = [me.user_id, colleague.user_id, invited.user_id, stranger.user_id]
+    assert visible_user_ids(me.user_id, ids) == {me.user_id, colleague.user_id}
+    assert visible_user_ids(stranger.user_id, ids) == {stranger.user_id}
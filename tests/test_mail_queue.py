@@ -0,0 +1,93 @@
+# tests/test_mail_queue.py
+
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.mail_queue import MailQueueWorker, RecordingMailer, enqueue_email
+from app.models import OutboundEmail
+
+SENDER = ("Meeting Ledger", "noreply@example.com")
+
+
+def _enqueue(count):
+    return enqueue_email([f"user{i}@example.com" for i in range(count)], "Invitation", "<p>Hi</p>", sender=SENDER)
+
+
+def _emails():
+    db.session.expire_all()
+    return OutboundEmail.query.order_by(OutboundEmail.email_id).all()
+
+
+def test_each_batch_is_sent_over_one_connection(app):
+    mailer = RecordingMailer()
+    worker = MailQueueWorker(mailer=mailer, batch_size=3)
+    _enqueue(5)
+
+    while worker.drain_batch():
+        pass
+
+    assert mailer.connections == 2
+    assert sorted(m.recipients[0] for m in mailer.outbox) == [f"user{i}@example.com" for i in range(5)]
+    assert {e.status for e in _emails()} == {"sent"}
+    assert all(e.attempts == 1 and e.claim_token is None and e.sent_timestamp for e in _emails())
+
+
+def test_claimed_messages_are_not_sent_twice(app):
+    first, second = MailQueueWorker(mailer=RecordingMailer()), MailQueueWorker(mailer=RecordingMailer())
+    _enqueue(3)
+
+    claimed = first._claim()
+    assert len(claimed) == 3
+    assert second.drain_batch() == 0
+    assert second.mailer.outbox == []
+
+    # A claim older than STALE_CLAIM belongs to a dead worker and is released
+    for email in claimed:
+        email.claimed_at = datetime.utcnow() - timedelta(hours=1)
+    db.session.commit()
+    assert second.drain_batch() == 3
+    assert len(second.mailer.outbox) == 3
+
+
+def test_failed_send_is_retried_with_backoff(app):
+    mailer = RecordingMailer(fail_times=2)
+    worker = MailQueueWorker(mailer=mailer, backoff_seconds=30)
+    _enqueue(1)
+
+    before = datetime.utcnow()
+    assert worker.drain_batch() == 1
+    email = _emails()[0]
+    assert (email.status, email.attempts) == ("queued", 1)
+    assert "rejected" in email.last_error
+    assert before + timedelta(seconds=30) <= email.next_attempt_at <= datetime.utcnow() + timedelta(seconds=30)
+
+    # Not due yet
+    assert worker.drain_batch() == 0
+
+    email.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+    before = datetime.utcnow()
+    assert worker.drain_batch() == 1
+    email = _emails()[0]
+    assert (email.status, email.attempts) == ("queued", 2)
+    assert email.next_attempt_at >= before + timedelta(seconds=60)
+
+    email.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+    assert worker.drain_batch() == 1
+    email = _emails()[0]
+    assert (email.status, email.attempts, email.last_error) == ("sent", 3, None)
+    assert len(mailer.outbox) == 1
+
+
+def test_message_fails_after_max_attempts(app):
+    worker = MailQueueWorker(mailer=RecordingMailer(fail_connect=True), max_attempts=3, backoff_seconds=0)
+    _enqueue(2)
+
+    for _ in range(3):
+        assert worker.drain_batch() == 2
+    assert worker.drain_batch() == 0
+
+    emails = _emails()
+    assert [(e.status, e.attempts) for e in emails] == [("failed", 3), ("failed", 3)]
+    assert all("refused" in e.last_error for e in emails)
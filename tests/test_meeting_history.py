@@ -0,0 +1,28 @@
+# tests/test_meeting_history.py
+
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.meeting.history import chat_history_page
+from app.models import ChatMessage, User
+
+
+def test_chat_history_includes_agent_replies(app):
+    user = User(username="alice", email="alice@example.com", password="x")
+    db.session.add(user)
+    db.session.flush()
+    now = datetime(2026, 10, 19, 12, 0)
+    db.session.add_all([
+        ChatMessage(meeting_id=1, user_id=user.user_id, username="alice",
+                    message="@agent summarize", timestamp=now),
+        ChatMessage(meeting_id=1, user_id=None, username="Agent",
+                    message="Here is the summary", timestamp=now + timedelta(seconds=1)),
+    ])
+    db.session.commit()
+
+    messages, next_cursor = chat_history_page(1)
+
+    assert [m["username"] for m in messages] == ["alice", "Agent"]
+    assert messages[1]["message"] == "Here is the summary"
+    assert messages[1]["profile_pic_url"].startswith("/static/")
+    assert next_cursor is None
@@ -0,0 +1,32 @@
+# tests/test_passwords.py
+
+import pytest
+
+from app.auth.passwords import PasswordHasher
+
+
+@pytest.fixture
+def hasher():
+    return PasswordHasher(rounds=4)
+
+
+def test_verify_rejects_wrong_password_and_bad_hashes(hasher):
+    stored = hasher.hash("correct horse")
+
+    assert hasher.verify("correct horse", stored) is True
+    assert hasher.verify("battery staple", stored) is False
+    assert hasher.verify("correct horse", None) is False
+    assert hasher.verify("correct horse", "") is False
+    assert hasher.verify("correct horse", "plaintext") is False
+    assert hasher.verify("correct horse", "$2b$12$short") is False
+
+
+def test_verify_reraises_backend_errors(hasher, monkeypatch):
+    stored = hasher.hash("correct horse")
+
+    def broken(*args):
+        raise ValueError("bcrypt backend unavailable")
+
+    monkeypatch.setattr(hasher._scheme, "verify", broken)
+    with pytest.raises(ValueError, match="backend unavailable"):
+        hasher.verify("correct horse", stored)
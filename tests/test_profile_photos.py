@@ -0,0 +1,36 @@
+# tests/test_profile_photos.py
+
+import io
+import os
+
+import pytest
+
+from app.avatars import PROFILE_PICS_DIR
+from app.extensions import db
+from app.models import User
+from app.profile.photos import AVATAR_SIZES, ProfilePhotoProcessor
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def _png():
+    out = io.BytesIO()
+    Image.new("RGBA", (300, 200), (200, 30, 30, 128)).save(out, "PNG")
+    return out.getvalue()
+
+
+def test_upload_writes_only_webp_thumbnails(app):
+    user = User(username="alice", email="alice@example.com", password="x")
+    db.session.add(user)
+    db.session.commit()
+
+    url = ProfilePhotoProcessor().submit(user.user_id, _png(), "png")
+
+    folder = os.path.join(app.static_folder, PROFILE_PICS_DIR)
+    written = sorted(os.listdir(folder))
+    digest = url.rsplit("/", 1)[1].split("_")[0]
+    assert written == sorted(f"{digest}_{size}.webp" for size in AVATAR_SIZES)
+    assert url == f"{PROFILE_PICS_DIR}/{digest}_64.webp"
+    assert db.session.get(User, user.user_id).profile_pic_url == url
+    with Image.open(os.path.join(folder, f"{digest}_128.webp")) as thumb:
+        assert thumb.format == "WEBP" and thumb.size == (128, 128)
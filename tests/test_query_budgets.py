@@ -0,0 +1,131 @@
+# tests/test_query_budgets.py
+
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from flask import Blueprint
+
+from app.auth.principal import load_principal, principal_cache
+from app.extensions import db, login_manager
+from app.models import (
+    ActionItem, ChatFile, Invitation, Meeting, Organization, OrganizationMember, Participant, TaskFile, User
+)
+from app.query_counter import assert_max_queries
+
+APP_DIR = Path(__file__).resolve().parent.parent / "app"
+
+# Statement budgets; each page must stay within its budget at every data size
+DASHBOARD_QUERIES = 7
+MEETING_LIST_QUERIES = 3
+DOCUMENTS_QUERIES = 1
+SEND_INVITATIONS_QUERIES = 3
+
+
+@pytest.fixture
+def client(app):
+    """
+    A test client with the page blueprints registered, as create_app() does.
+    """
+    from app.auth.routes import auth_bp
+    from app.calendar.routes import calendar_bp
+    from app.dashboard.routes import dashboard_bp
+    from app.documents.routes import documents_bp
+    from app.main.routes import main_bp
+    from app.meeting.routes import meeting_bp
+    from app.organization.routes import organization_bp
+    from app.profile.routes import profile_bp
+    from app.task.routes import task_bp
+
+    app.register_blueprint(main_bp)
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(profile_bp, url_prefix="/profile")
+    app.register_blueprint(dashboard_bp, url_prefix="/dashboard")
+    app.register_blueprint(meeting_bp, url_prefix="/meetings")
+    app.register_blueprint(task_bp, url_prefix="/tasks")
+    app.register_blueprint(calendar_bp, url_prefix="/calendar")
+    app.register_blueprint(documents_bp, url_prefix="/documents")
+    app.register_blueprint(organization_bp, url_prefix="/organization")
+    # base.html includes the agent panel; only its templates are needed here
+    app.register_blueprint(Blueprint(
+        "agent_templates", __name__, root_path=str(APP_DIR / "agent"), template_folder="templates"
+    ))
+    login_manager.init_app(app)
+    login_manager.user_loader(load_principal)
+    principal_cache._entries.clear()
+    yield app.test_client()
+    principal_cache._entries.clear()
+
+
+def _login(client, user):
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user.user_id)
+        session["_fresh"] = True
+
+
+def _seed(size):
+    """
+    A user who organizes and attends `size` meetings each, with tasks,
+    files, organization members and pending invitations growing with size.
+    """
+    me = User(username="me", email="me@example.com", password="x", role="user", first_name="Me")
+    others = [
+        User(username=f"user{i}", email=f"user{i}@example.com", password="x", role="user", first_name=f"U{i}")
+        for i in range(size)
+    ]
+    db.session.add_all([me, *others])
+    db.session.flush()
+
+    org = Organization(name="Acme", owner_id=me.user_id)
+    pending = [Organization(name=f"Pending {i}", owner_id=others[i].user_id) for i in range(size)]
+    db.session.add_all([org, *pending])
+    db.session.flush()
+    db.session.add(OrganizationMember(org_id=org.org_id, user_id=me.user_id, status="active"))
+    for i, user in enumerate(others):
+        db.session.add(OrganizationMember(org_id=org.org_id, user_id=user.user_id, status="active"))
+        db.session.add(OrganizationMember(org_id=pending[i].org_id, user_id=me.user_id, status="invited"))
+        db.session.add(Invitation(token=f"token{i}", org_id=pending[i].org_id, email=me.email))
+
+    start = datetime(2026, 10, 1, 9)
+    for i, user in enumerate(others):
+        mine = Meeting(title=f"Mine {i}", date_time=start + timedelta(days=i), organizer_id=me.user_id)
+        theirs = Meeting(title=f"Theirs {i}", date_time=start + timedelta(days=i), organizer_id=user.user_id)
+        db.session.add_all([mine, theirs])
+        db.session.flush()
+        for meeting in (mine, theirs):
+            db.session.add(Participant(meeting_id=meeting.meeting_id, user_id=me.user_id))
+            db.session.add(Participant(meeting_id=meeting.meeting_id, user_id=user.user_id))
+            task = ActionItem(meeting_id=meeting.meeting_id, description="Follow up", assigned_to=user.user_id)
+            db.session.add(task)
+            db.session.flush()
+            db.session.add(TaskFile(task_id=task.action_item_id, filename=f"task{i}.pdf"))
+            db.session.add(ChatFile(meeting_id=meeting.meeting_id, user_id=user.user_id, username=user.username,
+                                    filename=f"chat{i}.pdf", file_url=f"/static/uploads/chat{i}.pdf"))
+    db.session.commit()
+    return me
+
+
+@pytest.mark.parametrize("size", [2, 30])
+@pytest.mark.parametrize("url, budget", [
+    ("/dashboard/", DASHBOARD_QUERIES),
+    ("/meetings/", MEETING_LIST_QUERIES),
+    ("/documents/", DOCUMENTS_QUERIES),
+])
+def test_page_query_count_does_not_grow_with_data(client, size, url, budget):
+    me = _seed(size)
+    _login(client, me)
+    client.get(url)  # warm the principal cache
+
+    with assert_max_queries(budget, url):
+        response = client.get(url)
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("size", [2, 30])
+def test_send_invitations_query_count(app, size):
+    agent_routes = pytest.importorskip("app.agent.routes", exc_type=ImportError)
+    me = _seed(size)
+    meeting = Meeting.query.filter_by(organizer_id=me.user_id).first()
+
+    with assert_max_queries(SEND_INVITATIONS_QUERIES, "send_invitations"):
+        agent_routes.send_invitations(meeting, "<p>Join us</p>")
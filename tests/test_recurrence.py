@@ -0,0 +1,195 @@
+# tests/test_recurrence.py
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.calendar.feed import meetings_in_range
+from app.calendar.occurrences import OccurrenceCache, occurrence_cache
+from app.calendar.recurrence import InvalidRecurrence, RecurrenceRule
+from app.extensions import db
+from app.models import CalendarEvent, Meeting, Participant, User
+
+
+RULES = [
+    ("FREQ=DAILY;INTERVAL=3", datetime(2026, 1, 5, 9)),
+    ("FREQ=DAILY;COUNT=40", datetime(2026, 1, 5, 23, 30)),
+    ("FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE,FR", datetime(2026, 1, 7, 10)),
+    ("FREQ=WEEKLY;BYDAY=TU,SU;COUNT=25", datetime(2026, 1, 8, 8)),
+    ("FREQ=MONTHLY;BYMONTHDAY=31;COUNT=9", datetime(2026, 1, 31, 12)),
+    ("FREQ=MONTHLY;INTERVAL=2;BYMONTHDAY=1,-1", datetime(2026, 2, 10, 7)),
+    ("FREQ=YEARLY", datetime(2024, 2, 29, 15)),
+    ("FREQ=DAILY;UNTIL=20260320", datetime(2026, 1, 1, 18)),
+]
+
+WINDOWS = [
+    (None, None),
+    (datetime(2026, 1, 1), datetime(2026, 2, 1)),
+    (datetime(2026, 3, 3, 10, 30), datetime(2026, 3, 20, 18)),
+    (datetime(2026, 6, 1), datetime(2027, 1, 1)),
+    (datetime(2030, 2, 1), datetime(2033, 3, 1)),
+]
+
+
+def _full_expansion(rule, dtstart, start, end, duration):
+    """
+    Every occurrence from dtstart on, filtered to the window afterwards.
+    """
+    overlapping = []
+    for occurrence in rule.between(dtstart, None, None, limit=5000):
+        if end is not None and occurrence >= end:
+            break
+        if start is None or occurrence + duration > start or (not duration and occurrence >= start):
+            overlapping.append(occurrence)
+    return overlapping
+
+
+@pytest.mark.parametrize("text, dtstart", RULES)
+@pytest.mark.parametrize("start, end", WINDOWS)
+@pytest.mark.parametrize("duration", [timedelta(0), timedelta(minutes=90)])
+def test_windowed_expansion_matches_full_expansion(text, dtstart, start, end, duration):
+    rule = RecurrenceRule.parse(text)
+    windowed = list(rule.between(dtstart, start, end, duration, limit=5000))
+    if end is None:
+        windowed = windowed[:len(_full_expansion(rule, dtstart, start, datetime(2040, 1, 1), duration))]
+        end = datetime(2040, 1, 1)
+    assert windowed == _full_expansion(rule, dtstart, start, end, duration)
+
+
+def test_weekly_byday_with_interval():
+    rule = RecurrenceRule.parse("FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE,FR")
+    starts = list(rule.between(datetime(2026, 1, 7, 10), None, None, limit=6))
+    assert [s.day for s in starts] == [7, 9, 19, 21, 23, 2]
+    assert all(s.hour == 10 for s in starts)
+
+
+def test_monthly_day_31_skips_short_months_and_counts_only_real_dates():
+    rule = RecurrenceRule.parse("FREQ=MONTHLY;BYMONTHDAY=31;COUNT=4")
+    starts = list(rule.between(datetime(2026, 1, 31, 12), None, None))
+    assert [(s.month, s.day) for s in starts] == [(1, 31), (3, 31), (5, 31), (7, 31)]
+    assert rule.last_start(datetime(2026, 1, 31, 12)) == datetime(2026, 7, 31, 12)
+
+
+def test_monthly_last_day():
+    rule = RecurrenceRule.parse("FREQ=MONTHLY;BYMONTHDAY=-1;COUNT=3")
+    starts = list(rule.between(datetime(2026, 1, 31), None, None))
+    assert [(s.month, s.day) for s in starts] == [(1, 31), (2, 28), (3, 31)]
+
+
+def test_yearly_29_february_only_in_leap_years():
+    rule = RecurrenceRule.parse("FREQ=YEARLY")
+    starts = list(rule.between(datetime(2024, 2, 29), datetime(2025, 1, 1), datetime(2037, 1, 1)))
+    assert [s.year for s in starts] == [2028, 2032, 2036]
+
+
+def test_date_only_until_includes_the_whole_day():
+    rule = RecurrenceRule.parse("FREQ=DAILY;UNTIL=20260110")
+    starts = list(rule.between(datetime(2026, 1, 8, 23, 45), None, None))
+    assert starts == [datetime(2026, 1, d, 23, 45) for d in (8, 9, 10)]
+    assert str(rule) == "FREQ=DAILY;UNTIL=20260110T235959Z"
+
+
+def test_limit_caps_expansion():
+    rule = RecurrenceRule.parse("FREQ=DAILY")
+    assert len(list(rule.between(datetime(2026, 1, 1), None, None, limit=7))) == 7
+
+
+@pytest.fixture
+def cache():
+    occurrence_cache._entries.clear()
+    yield occurrence_cache
+    occurrence_cache._entries.clear()
+
+
+def _user(name):
+    user = User(username=name, email=f"{name}@example.com", password="x")
+    db.session.add(user)
+    db.session.flush()
+    return user
+
+
+def test_attendee_cache_dropped_when_meeting_becomes_recurring(app, cache):
+    organizer, attendee = _user("olive"), _user("adam")
+    meeting = Meeting(title="Sync", date_time=datetime(2026, 11, 2, 10), organizer_id=organizer.user_id)
+    db.session.add(meeting)
+    db.session.flush()
+    db.session.add(Participant(meeting_id=meeting.meeting_id, user_id=attendee.user_id))
+    db.session.commit()
+
+    start, end = datetime(2026, 11, 1), datetime(2026, 12, 6)
+    assert cache.occurrences(attendee.user_id, start, end) == []
+    assert len(meetings_in_range(attendee.user_id, start, end)) == 1
+
+    meeting.recurrence_rule = "FREQ=WEEKLY"
+    db.session.commit()
+
+    assert len(cache.occurrences(organizer.user_id, start, end)) == 5
+    assert len(cache.occurrences(attendee.user_id, start, end)) == 5
+    assert meetings_in_range(attendee.user_id, start, end) == []
+
+
+@pytest.mark.parametrize("text", [
+    "FREQ=DAILY;INTERVAL=100000000",
+    "FREQ=MONTHLY;INTERVAL=100000",
+    "FREQ=DAILY;COUNT=3000000",
+])
+def test_parse_rejects_absurd_interval_and_count(text):
+    with pytest.raises(InvalidRecurrence):
+        RecurrenceRule.parse(text)
+
+
+@pytest.mark.parametrize("text", [
+    "FREQ=DAILY",
+    "FREQ=DAILY;INTERVAL=36525",
+    "FREQ=WEEKLY;INTERVAL=5218;BYDAY=MO,SU",
+    "FREQ=MONTHLY;INTERVAL=1200;BYMONTHDAY=-1",
+    "FREQ=YEARLY;INTERVAL=100",
+    "FREQ=DAILY;UNTIL=99991231",
+])
+def test_expansion_stops_at_end_of_datetime_range(text):
+    rule = RecurrenceRule.parse(text)
+    dtstart = datetime(2026, 1, 1, 9)
+    occurrences = list(rule.between(dtstart, datetime(9999, 12, 1), None, timedelta(days=2)))
+    assert all(o + timedelta(days=2) <= datetime.max for o in occurrences)
+    rule.last_start(dtstart)
+
+
+def test_cache_dropped_when_participant_or_event_changes(app, cache):
+    organizer, attendee = _user("olive"), _user("adam")
+    meeting = Meeting(title="Standup", date_time=datetime(2026, 11, 2, 9), organizer_id=organizer.user_id,
+                      recurrence_rule="FREQ=DAILY")
+    db.session.add(meeting)
+    db.session.commit()
+    start, end = datetime(2026, 11, 2), datetime(2026, 11, 9)
+    assert cache.occurrences(attendee.user_id, start, end) == []
+
+    participant = Participant(meeting_id=meeting.meeting_id, user_id=attendee.user_id)
+    db.session.add(participant)
+    db.session.commit()
+    assert len(cache.occurrences(attendee.user_id, start, end)) == 7
+
+    db.session.add(CalendarEvent(title="Gym", event_type="custom", start_date=datetime(2026, 11, 3, 18),
+                                 end_date=datetime(2026, 11, 3, 19), user_id=attendee.user_id,
+                                 recurrence_rule="FREQ=WEEKLY"))
+    db.session.commit()
+    kinds = [o.kind for o in cache.occurrences(attendee.user_id, start, end)]
+    assert kinds.count("custom") == 1
+
+    db.session.delete(participant)
+    db.session.commit()
+    assert [o.kind for o in cache.occurrences(attendee.user_id, start, end)] == ["custom"]
+
+
+def test_cache_expires_and_evicts_least_recent_users(app):
+    users = [_user(f"user{i}") for i in range(3)]
+    cache = OccurrenceCache(ttl=60, max_users=2)
+    start, end = datetime(2026, 11, 2), datetime(2026, 11, 9)
+    for user in users:
+        cache.occurrences(user.user_id, start, end)
+    assert list(cache._entries) == [users[1].user_id, users[2].user_id]
+
+    cache._entries[users[2].user_id].expires_at = 0
+    db.session.add(CalendarEvent(title="Focus", event_type="custom", start_date=datetime(2026, 11, 4, 14),
+                                 user_id=users[2].user_id, recurrence_rule="FREQ=DAILY;COUNT=2"))
+    db.session.commit()
+    assert len(cache.occurrences(users[2].user_id, start, end)) == 2
@@ -0,0 +1,56 @@
+# tests/test_storage.py
+
+import io
+import os
+
+from werkzeug.datastructures import FileStorage
+
+from app.extensions import db
+from app.models import ActionItem, ChatFile, Meeting, StoredBlob, TaskFile, User
+from app.storage import release_blob, store_upload
+
+
+def _upload(data, filename="notes.txt"):
+    return FileStorage(stream=io.BytesIO(data), filename=filename, content_type="text/plain")
+
+
+def test_blob_survives_until_its_last_reference_is_deleted(app):
+    user = User(username="alice", email="alice@example.com", password="x")
+    db.session.add(user)
+    db.session.flush()
+    meeting = Meeting(title="Weekly", date_time=db.func.now(), organizer_id=user.user_id)
+    db.session.add(meeting)
+    db.session.flush()
+    task = ActionItem(meeting_id=meeting.meeting_id, description="Review notes")
+    db.session.add(task)
+    db.session.flush()
+
+    chat_blob = store_upload(_upload(b"same content"))
+    db.session.add(ChatFile(
+        meeting_id=meeting.meeting_id, user_id=user.user_id, username=user.username,
+        filename="notes.txt", file_url=chat_blob.url, blob_sha256=chat_blob.sha256
+    ))
+    task_blob = store_upload(_upload(b"same content", "copy.txt"))
+    task_file = TaskFile(task_id=task.action_item_id, filename="copy.txt", blob_sha256=task_blob.sha256)
+    db.session.add(task_file)
+    db.session.commit()
+
+    assert chat_blob.sha256 == task_blob.sha256
+    path = os.path.join(app.static_folder, chat_blob.storage_path)
+    assert os.path.isfile(path)
+
+    # Deleting one reference keeps the blob the chat link points at
+    db.session.delete(task_file)
+    db.session.flush()
+    assert release_blob(task_blob.sha256) is False
+    db.session.commit()
+    assert os.path.isfile(path)
+    assert db.session.get(StoredBlob, chat_blob.sha256) is not None
+
+    # Deleting the last one removes it
+    db.session.delete(ChatFile.query.one())
+    db.session.flush()
+    assert release_blob(chat_blob.sha256) is True
+    db.session.commit()
+    assert not os.path.exists(path)
+    assert db.session.get(StoredBlob, chat_blob.sha256) is None
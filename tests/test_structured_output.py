@@ -0,0 +1,31 @@
+# tests/test_structured_output.py
+
+import pytest
+
+from app.agent.structured_output import TASKS_SCHEMA, extract_json, _relaxed
+
+
+def test_relaxing_leaves_string_values_alone():
+    text = '[{"description": "True story, None left", "done": False, "owner": None,},]'
+    assert extract_json(text) == [{"description": "True story, None left", "done": False, "owner": None}]
+
+
+def test_relaxing_handles_escaped_quotes():
+    assert _relaxed('{"a": "say \\"None\\", True", "b": True,}') == '{"a": "say \\"None\\", True", "b": true}'
+
+
+def test_relaxed_payload_wins_over_stray_strict_value():
+    output = 'See item [1] below.\n[{"description": "Send the report", "assigned_to": None,}]'
+    tasks = extract_json(output, TASKS_SCHEMA.validate)
+    assert [t["description"] for t in tasks] == ["Send the report"]
+
+
+def test_largest_value_that_validates_is_returned():
+    output = 'Example: {"description": "x"} Result: [{"title": 1}, {"title": 2}, {"title": 3}] and [{"description": "Real task"}]'
+    tasks = extract_json(output, TASKS_SCHEMA.validate)
+    assert [t["description"] for t in tasks] == ["Real task"]
+
+
+def test_no_json_raises():
+    with pytest.raises(ValueError):
+        extract_json("nothing here")